@@ -0,0 +1,59 @@
+import logging
+import os
+from dotenv import load_dotenv
+from cache import CacheStats, build_tiered_cache, hash_key
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# Past analyses with the section hashes they were made from, so that a re-uploaded
+# resume only sends its changed sections to the model. memory | sqlite | disk | none
+# Entries hold candidates' personal data, so by default they are kept in memory
+# for an hour; sqlite or disk persists them under ANALYSIS_STORE_PATH.
+ANALYSIS_STORE_BACKEND = os.getenv('ANALYSIS_STORE_BACKEND', 'memory').lower()
+ANALYSIS_STORE_PATH = os.getenv('ANALYSIS_STORE_PATH', os.path.join('.cache', 'analyses'))
+ANALYSIS_STORE_TTL = int(os.getenv('ANALYSIS_STORE_TTL', 3600))
+ANALYSIS_STORE_MAX_ENTRIES = int(os.getenv('ANALYSIS_STORE_MAX_ENTRIES', 1024))
+
+
+class AnalysisStore:
+    """Latest analysis per (kind, resume identity, scope).
+
+    Entries are {'hashes': {section: hash}, 'result': ...}. scope separates
+    analyses of the same resume against different jobs.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.stats = CacheStats()
+
+    def get(self, kind, identity, scope=''):
+        if self.store is None or identity is None:
+            return None
+        return self.store.get(hash_key(kind, identity, scope))
+
+    def set(self, kind, identity, hashes, result, scope=''):
+        if self.store is not None and identity is not None:
+            self.store.set(hash_key(kind, identity, scope), {'hashes': hashes, 'result': result})
+
+    def record(self, outcome, sections_sent=0, sections_total=0):
+        # outcome is 'full', 'incremental' or 'unchanged'.
+        self.stats.incr(outcome)
+        self.stats.incr('sections_sent', sections_sent)
+        self.stats.incr('sections_total', sections_total)
+
+    def info(self):
+        info = self.stats.snapshot()
+        info['backend'] = ANALYSIS_STORE_BACKEND
+        if self.store is not None:
+            info['store'] = self.store.info()
+        return info
+
+
+def build_analysis_store(backend=ANALYSIS_STORE_BACKEND):
+    return AnalysisStore(build_tiered_cache(
+        backend, ANALYSIS_STORE_PATH, ANALYSIS_STORE_TTL, ANALYSIS_STORE_MAX_ENTRIES, 'ANALYSIS_STORE_BACKEND'
+    ))
+
+
+analysis_store = build_analysis_store()
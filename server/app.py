@@ -1,46 +1,161 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
-from recommendations import get_job_recommendations, generate_resume, process_submitted_resume
-from resume_utils import analyze_resume, convert_to_latex, export_to_pdf
-import logging
+from recommendations import (
+    generate_resume, generate_resume_stream, process_submitted_resumes, recommendation_options, BULK_MAX_RESUMES
+)
+from resume_utils import convert_to_latex_stream, export_cache_info, export_etag, export_pdf_file
+from analysis_store import analysis_store
+from recommendation_snapshots import snapshot_request_error, snapshot_scheduler
+from task_handlers import (
+    analysis_result, latex_result, recommendations_result, snapshot_result, submitted_resume_result
+)
+from job_store import job_store
+from llm import llm_flight, token_usage
+from llm_cache import completion_cache
+from pdf_text import extraction_cache_info
+from task_queue import QueueFullError, task_queue
+from resilience import clear_deadline, start_deadline
+from timing import request_spans, server_timing, stage_summary, start_request
+from metrics import request_finished, request_started, route_summary
+from logging_config import configure_logging, log_payload
+from warmup import WARMUP_ON_START, readiness, start_warmup
 import io
+import json
+import os
 
 app = Flask(__name__)
 CORS(app)
 
-logging.basicConfig(level=logging.DEBUG)
+configure_logging()
+
+# Upper bound for all downstream calls (PDF download, Gemini) made while serving one request.
+REQUEST_DEADLINE_SECONDS = float(os.getenv('REQUEST_DEADLINE_SECONDS', 120))
+
+@app.before_request
+def begin_request_deadline():
+    start_deadline(REQUEST_DEADLINE_SECONDS)
+    start_request()
+    request_started(request.url_rule.rule if request.url_rule else 'unmatched')
+
+@app.after_request
+def add_server_timing(response):
+    # Per-stage durations (download, pdf_parse, prompt, llm, response_parse, render).
+    spans = request_spans()
+    if spans:
+        response.headers['Server-Timing'] = server_timing(spans)
+    # Streamed responses are timed up to their headers.
+    request_finished(response.status_code)
+    return response
+
+@app.teardown_request
+def end_request_deadline(exc):
+    request_finished(500)
+    clear_deadline()
+
+def sse_response(events):
+    # Server-Sent Events from (event, payload) pairs. An "error" event is sent if the
+    # generator fails part-way, since the status code has already gone out.
+    def stream():
+        try:
+            for event, payload in events:
+                yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+        except Exception as e:
+            app.logger.error("An error occurred while streaming: %s", e)
+            yield f"event: error\ndata: {json.dumps({'error': 'An unexpected error occurred'})}\n\n"
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+def text_events(chunks):
+    # One "chunk" event per piece of model output, then "done".
+    for chunk in chunks:
+        yield 'chunk', {'text': chunk}
+    yield 'done', {'done': True}
+
+def run_or_enqueue(endpoint, data, handler, *args, **kwargs):
+    if not data.get('async'):
+        payload, status_code = handler(*args, **kwargs)
+        return jsonify(payload), status_code
+
+    try:
+        task_id = task_queue.submit(endpoint, handler, *args, **kwargs)
+    except QueueFullError as e:
+        app.logger.warning("Rejected %s task: %s", endpoint, e)
+        return jsonify({"error": "Server is busy, please retry later"}), 503
+
+    return jsonify({"taskId": task_id, "status": "queued", "statusUrl": f"/tasks/{task_id}"}), 202
 
 @app.route('/', methods=['GET'])
 def index():
     return jsonify({"message": "Flask server is running correctly!"}), 200
 
+@app.route('/ready', methods=['GET'])
+def ready():
+    # 503 until the warmup has loaded the model client, PDF libraries and indexes.
+    is_ready, details = readiness()
+    return jsonify(details), 200 if is_ready else 503
+
 @app.route('/get_recommendations', methods=['POST'])
 def get_recommendations():
     try:
         data = request.json
-        app.logger.debug(f"Received data: {data}")
+        log_payload(app.logger, "Received data: %s", data)
         
         pdf_url = data.get('pdfUrl')
         jobs = data.get('jobs')
 
-        if not pdf_url or not jobs:
-            return jsonify({"error": "Missing PDF URL or jobs data"}), 400
+        options, error = recommendation_options(data)
+        if error:
+            return jsonify({"error": error}), 400
 
-        recommendations = get_job_recommendations(pdf_url, jobs)
-        
-        if isinstance(recommendations, str) and recommendations.startswith("Error"):
-            return jsonify({"error": recommendations}), 500
+        # Served from the user's precomputed snapshot, refreshed in the background.
+        if data.get('snapshot'):
+            error = snapshot_request_error(data, options)
+            if error:
+                return jsonify({"error": error}), 400
+            return run_or_enqueue('get_recommendations', data, snapshot_result, pdf_url, data.get('userId'), options)
+
+        return run_or_enqueue('get_recommendations', data, recommendations_result, pdf_url, jobs, **options)
+    except Exception as e:
+        app.logger.error("An error occurred: %s", e)
+        return jsonify({"error": "An unexpected error occurred"}), 500
+
+@app.route('/jobs', methods=['POST'])
+def upsert_jobs():
+    try:
+        data = request.json
+        jobs = data.get('jobs') if isinstance(data, dict) else None
+        if not jobs or not isinstance(jobs, list) or not all(isinstance(job, dict) for job in jobs):
+            return jsonify({"error": "Missing jobs data"}), 400
+
+        ids = job_store.upsert(jobs)
+        snapshot_scheduler.notify()
 
-        return jsonify(recommendations)
+        return jsonify({"ids": ids, "version": job_store.version})
     except Exception as e:
-        app.logger.error(f"An error occurred: {str(e)}")
+        app.logger.error("An error occurred while storing jobs: %s", e)
+        return jsonify({"error": "An unexpected error occurred"}), 500
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def delete_job(job_id):
+    try:
+        if not job_store.delete(job_id):
+            return jsonify({"error": "Job not found"}), 404
+        snapshot_scheduler.notify()
+
+        return jsonify({"deleted": job_id, "version": job_store.version})
+    except Exception as e:
+        app.logger.error("An error occurred while deleting job %s: %s", job_id, e)
         return jsonify({"error": "An unexpected error occurred"}), 500
 
 @app.route('/generate_resume', methods=['POST'])
 def create_resume():
     try:
         data = request.json
-        app.logger.debug(f"Received data for resume generation: {data}")
+        log_payload(app.logger, "Received data for resume generation: %s", data)
 
         if not data:
             return jsonify({"error": "Missing user input data"}), 400
@@ -52,93 +167,197 @@ def create_resume():
 
         return jsonify({"resume": resume})
     except Exception as e:
-        app.logger.error(f"An error occurred during resume generation: {str(e)}")
+        app.logger.error("An error occurred during resume generation: %s", e)
+        return jsonify({"error": "An unexpected error occurred"}), 500
+
+@app.route('/generate_resume/stream', methods=['POST'])
+def create_resume_stream():
+    try:
+        data = request.json
+        log_payload(app.logger, "Received data for streamed resume generation: %s", data)
+
+        if not data:
+            return jsonify({"error": "Missing user input data"}), 400
+
+        chunks = generate_resume_stream(data)
+
+        if isinstance(chunks, str) and chunks.startswith("Error"):
+            return jsonify({"error": chunks}), 500
+
+        return sse_response(text_events(chunks))
+    except Exception as e:
+        app.logger.error("An error occurred during streamed resume generation: %s", e)
         return jsonify({"error": "An unexpected error occurred"}), 500
 
 @app.route('/analyze_resume', methods=['POST'])
 def analyze_resume_route():
     try:
         data = request.json
-        app.logger.debug(f"Received data for resume analysis: {data}")
+        log_payload(app.logger, "Received data for resume analysis: %s", data)
 
         pdf_url = data.get('resumeUrl')
         if not pdf_url:
             return jsonify({"error": "Missing resume URL"}), 400
 
-        analysis = analyze_resume(pdf_url)
-
-        if isinstance(analysis, str) and analysis.startswith("Error"):
-            return jsonify({"error": analysis}), 500
-
-        return jsonify({"analysis": analysis})
+        # With a userId, a re-uploaded resume only has its changed sections re-analyzed.
+        return run_or_enqueue('analyze_resume', data, analysis_result, pdf_url, data.get('userId'))
     except Exception as e:
-        app.logger.error(f"An error occurred during resume analysis: {str(e)}")
+        app.logger.error("An error occurred during resume analysis: %s", e)
         return jsonify({"error": "An unexpected error occurred"}), 500
 
 @app.route('/convert_to_latex', methods=['POST'])
 def convert_to_latex_route():
     try:
         data = request.json
-        app.logger.debug(f"Received data for LaTeX conversion: {data}")
+        log_payload(app.logger, "Received data for LaTeX conversion: %s", data)
 
         pdf_url = data.get('resumeUrl')
         if not pdf_url:
             return jsonify({"error": "Missing resume URL"}), 400
 
-        latex_content = convert_to_latex(pdf_url)
+        return run_or_enqueue('convert_to_latex', data, latex_result, pdf_url)
+    except Exception as e:
+        app.logger.error("An error occurred during LaTeX conversion: %s", e)
+        return jsonify({"error": "An unexpected error occurred"}), 500
 
-        if isinstance(latex_content, str) and latex_content.startswith("Error"):
-            return jsonify({"error": latex_content}), 500
+@app.route('/convert_to_latex/stream', methods=['POST'])
+def convert_to_latex_stream_route():
+    try:
+        data = request.json
+        log_payload(app.logger, "Received data for streamed LaTeX conversion: %s", data)
 
-        return jsonify({"latex": latex_content})
+        pdf_url = data.get('resumeUrl')
+        if not pdf_url:
+            return jsonify({"error": "Missing resume URL"}), 400
+
+        chunks = convert_to_latex_stream(pdf_url)
+
+        if isinstance(chunks, str) and chunks.startswith("Error"):
+            return jsonify({"error": chunks}), 500
+
+        return sse_response(text_events(chunks))
     except Exception as e:
-        app.logger.error(f"An error occurred during LaTeX conversion: {str(e)}")
+        app.logger.error("An error occurred during streamed LaTeX conversion: %s", e)
         return jsonify({"error": "An unexpected error occurred"}), 500
 
 @app.route('/export_to_pdf', methods=['POST'])
 def export_to_pdf_route():
     try:
         data = request.json
-        app.logger.debug(f"Received data for PDF export: {data}")
+        log_payload(app.logger, "Received data for PDF export: %s", data)
+
+        # Either LaTeX from /convert_to_latex or Markdown from /generate_resume.
+        content_format = 'markdown' if data.get('markdown') else 'latex'
+        content = data.get(content_format)
+        if not content:
+            return jsonify({"error": "Missing LaTeX or Markdown content"}), 400
 
-        latex_content = data.get('latex')
-        if not latex_content:
-            return jsonify({"error": "Missing LaTeX content"}), 400
+        # The ETag is the content hash, so a repeat export is answered before rendering.
+        etag = export_etag(content, content_format)
+        if request.if_none_match.contains(etag):
+            return Response(status=304, headers={'ETag': f'"{etag}"'})
 
-        pdf_buffer = export_to_pdf(latex_content)
+        pdf_file, etag = export_pdf_file(content, content_format)
 
         return send_file(
-            pdf_buffer,
+            pdf_file,
             mimetype='application/pdf',
             as_attachment=True,
-            download_name='resume.pdf'
+            download_name='resume.pdf',
+            etag=etag
         )
     except Exception as e:
-        app.logger.error(f"An error occurred during PDF export: {str(e)}")
+        app.logger.error("An error occurred during PDF export: %s", e)
         return jsonify({"error": "An unexpected error occurred"}), 500
 
 @app.route('/process_submitted_resume', methods=['POST'])
 def process_submitted_resume_route():
     try:
         data = request.json
-        app.logger.debug(f"Received data for resume processing: {data}")
+        log_payload(app.logger, "Received data for resume processing: %s", data)
 
         resume_url = data.get('resumeUrl')
         job = data.get('job')
         if not resume_url or not job:
             return jsonify({"error": "Missing resume URL or job data"}), 400
 
-        analysis = process_submitted_resume(resume_url, job)
+        return run_or_enqueue(
+            'process_submitted_resume', data, submitted_resume_result, resume_url, job, data.get('userId')
+        )
+    except Exception as e:
+        app.logger.error("An error occurred during resume processing: %s", e)
+        return jsonify({"error": "An unexpected error occurred"}), 500
 
-        if isinstance(analysis, str) and analysis.startswith("Error"):
-            return jsonify({"error": analysis}), 500
+@app.route('/process_submitted_resumes', methods=['POST'])
+def process_submitted_resumes_route():
+    try:
+        data = request.json
+        log_payload(app.logger, "Received data for bulk resume processing: %s", data)
 
-        return jsonify({"analysis": analysis})
+        resume_urls = data.get('resumeUrls')
+        job = data.get('job')
+        if not resume_urls or not isinstance(resume_urls, list) or not job:
+            return jsonify({"error": "Missing resume URLs or job data"}), 400
+        if len(resume_urls) > BULK_MAX_RESUMES:
+            return jsonify({"error": f"At most {BULK_MAX_RESUMES} resumes can be processed per request"}), 400
+
+        def events():
+            failed = 0
+            for item in process_submitted_resumes(resume_urls, job):
+                failed += 'error' in item
+                yield 'result', item
+            yield 'done', {"total": len(resume_urls), "failed": failed}
+
+        return sse_response(events())
     except Exception as e:
-        app.logger.error(f"An error occurred during resume processing: {str(e)}")
+        app.logger.error("An error occurred during bulk resume processing: %s", e)
         return jsonify({"error": "An unexpected error occurred"}), 500
 
+@app.route('/tasks/<task_id>', methods=['GET'])
+def get_task(task_id):
+    task = task_queue.get(task_id)
+    if task is None:
+        return jsonify({"error": "Task not found or expired"}), 404
+
+    return jsonify({
+        "taskId": task_id,
+        "status": task['status'],
+        "statusCode": task.get('status_code'),
+        "result": task.get('result'),
+    })
+
+@app.route('/tasks/metrics', methods=['GET'])
+def task_metrics():
+    return jsonify(task_queue.metrics())
+
+def cache_info():
+    # "coalescing" counts calls that joined an identical in-flight download or Gemini call.
+    llm_info = completion_cache.info()
+    llm_info['coalescing'] = llm_flight.info()
+    llm_info['usage'] = token_usage()
+    return {
+        "pdf": extraction_cache_info(), "llm": llm_info, "export": export_cache_info(), "analysis": analysis_store.info(),
+        "snapshots": snapshot_scheduler.info(),
+    }
+
+@app.route('/cache/metrics', methods=['GET'])
+def cache_metrics():
+    return jsonify(cache_info())
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    # Per-route latency histograms, in-flight counts and token usage, per-stage
+    # timings, cache hit rates and the background task queue.
+    return jsonify({
+        "routes": route_summary(),
+        "stages": stage_summary(),
+        "caches": cache_info(),
+        "tasks": task_queue.metrics(),
+    })
 
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    if WARMUP_ON_START:
+        start_warmup()
+    app.run(host='0.0.0.0', port=int(os.getenv('PORT', 5000)),
+            debug=os.getenv('FLASK_DEBUG', 'true').lower() in ('1', 'true', 'yes'))
\ No newline at end of file
@@ -0,0 +1,404 @@
+from quart import Quart, Response, request, jsonify, send_file
+from quart_cors import cors
+import async_pipeline
+from async_pipeline import run_blocking
+from recommendations import recommendation_options, BULK_MAX_RESUMES
+from resume_utils import export_cache_info, export_etag
+from resilience import clear_deadline, start_deadline
+from timing import request_spans, server_timing, stage_summary, start_request
+from metrics import request_finished, request_started, route_summary
+from analysis_store import analysis_store
+from recommendation_snapshots import snapshot_recommendations, snapshot_request_error, snapshot_scheduler
+from job_store import job_store
+from llm import llm_flight, token_usage
+from llm_cache import completion_cache
+from pdf_text import extraction_cache_info
+from task_queue import QueueFullError, task_queue
+from task_handlers import analysis_result, latex_result, recommendations_result, snapshot_result, submitted_resume_result
+from logging_config import configure_logging, log_payload
+from warmup import WARMUP_ON_START, readiness, start_warmup
+import io
+import json
+import os
+
+# Asyncio serving path: the same routes and JSON contracts as app.py, with PDF
+# downloads and Gemini calls awaited as coroutines instead of blocking a thread
+# per request. Run with: hypercorn asgi_app:app --bind 0.0.0.0:5000
+app = Quart(__name__)
+app = cors(app)
+
+configure_logging()
+
+REQUEST_DEADLINE_SECONDS = float(os.getenv('REQUEST_DEADLINE_SECONDS', 120))
+
+@app.before_request
+async def begin_request_deadline():
+    start_deadline(REQUEST_DEADLINE_SECONDS)
+    start_request()
+    request_started(request.url_rule.rule if request.url_rule else 'unmatched')
+
+@app.after_request
+async def add_server_timing(response):
+    # Per-stage durations (download, pdf_parse, prompt, llm, response_parse, render).
+    spans = request_spans()
+    if spans:
+        response.headers['Server-Timing'] = server_timing(spans)
+    request_finished(response.status_code)
+    return response
+
+@app.teardown_request
+async def end_request_deadline(exc):
+    request_finished(500)
+    clear_deadline()
+
+@app.before_serving
+async def begin_warmup():
+    # Building the client's SSL context takes ~150 ms; do it before taking traffic
+    # rather than on the event loop inside the first request.
+    async_pipeline.get_async_client()
+    if WARMUP_ON_START:
+        start_warmup()
+
+@app.after_serving
+async def close_http_client():
+    await async_pipeline.close_async_client()
+
+def sse_response(events):
+    # Server-Sent Events from an async iterator of (event, payload) pairs, as in app.py.
+    async def stream():
+        try:
+            async for event, payload in events:
+                yield f"event: {event}\ndata: {json.dumps(payload)}\n\n".encode()
+        except Exception as e:
+            app.logger.error("An error occurred while streaming: %s", e)
+            yield f"event: error\ndata: {json.dumps({'error': 'An unexpected error occurred'})}\n\n".encode()
+
+    return Response(
+        stream(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+async def text_events(chunks):
+    async for chunk in chunks:
+        yield 'chunk', {'text': chunk}
+    yield 'done', {'done': True}
+
+def enqueue(endpoint, handler, *args, **kwargs):
+    # "async": true requests run the blocking handler on the task queue's threads,
+    # exactly as in app.py.
+    try:
+        task_id = task_queue.submit(endpoint, handler, *args, **kwargs)
+    except QueueFullError as e:
+        app.logger.warning("Rejected %s task: %s", endpoint, e)
+        return jsonify({"error": "Server is busy, please retry later"}), 503
+
+    return jsonify({"taskId": task_id, "status": "queued", "statusUrl": f"/tasks/{task_id}"}), 202
+
+@app.route('/', methods=['GET'])
+async def index():
+    return jsonify({"message": "Quart server is running correctly!"}), 200
+
+@app.route('/ready', methods=['GET'])
+async def ready():
+    is_ready, details = readiness()
+    return jsonify(details), 200 if is_ready else 503
+
+def cache_info():
+    llm_info = completion_cache.info()
+    llm_info['coalescing'] = llm_flight.info()
+    llm_info['usage'] = token_usage()
+    return {
+        "pdf": extraction_cache_info(), "llm": llm_info, "export": export_cache_info(), "analysis": analysis_store.info(),
+        "snapshots": snapshot_scheduler.info(),
+    }
+
+@app.route('/cache/metrics', methods=['GET'])
+async def cache_metrics():
+    # Cache info counts SQLite rows and disk files.
+    return jsonify(await run_blocking(cache_info))
+
+@app.route('/metrics', methods=['GET'])
+async def metrics():
+    return jsonify({
+        "routes": route_summary(),
+        "stages": stage_summary(),
+        "caches": await run_blocking(cache_info),
+        "tasks": task_queue.metrics(),
+    })
+
+@app.route('/tasks/<task_id>', methods=['GET'])
+async def get_task(task_id):
+    task = task_queue.get(task_id)
+    if task is None:
+        return jsonify({"error": "Task not found or expired"}), 404
+
+    return jsonify({
+        "taskId": task_id,
+        "status": task['status'],
+        "statusCode": task.get('status_code'),
+        "result": task.get('result'),
+    })
+
+@app.route('/tasks/metrics', methods=['GET'])
+async def task_metrics():
+    return jsonify(task_queue.metrics())
+
+@app.route('/get_recommendations', methods=['POST'])
+async def get_recommendations():
+    try:
+        data = await request.get_json()
+        log_payload(app.logger, "Received data: %s", data)
+
+        pdf_url = data.get('pdfUrl')
+        jobs = data.get('jobs')
+
+        options, error = recommendation_options(data)
+        if error:
+            return jsonify({"error": error}), 400
+
+        if data.get('snapshot'):
+            error = snapshot_request_error(data, options)
+            if error:
+                return jsonify({"error": error}), 400
+            if data.get('async'):
+                return enqueue('get_recommendations', snapshot_result, pdf_url, data.get('userId'), options)
+            # A snapshot hit is a key lookup; a miss computes it on a worker thread.
+            recommendations, snapshot = await run_blocking(
+                snapshot_recommendations, pdf_url, data.get('userId'), options
+            )
+            if isinstance(recommendations, str) and recommendations.startswith("Error"):
+                return jsonify({"error": recommendations}), 500
+            return jsonify({"recommendations": recommendations, "snapshot": snapshot})
+
+        if data.get('async'):
+            return enqueue('get_recommendations', recommendations_result, pdf_url, jobs, **options)
+
+        recommendations = await async_pipeline.get_job_recommendations(pdf_url, jobs, **options)
+
+        if isinstance(recommendations, str) and recommendations.startswith("Error"):
+            return jsonify({"error": recommendations}), 500
+
+        return jsonify(recommendations)
+    except Exception as e:
+        app.logger.error("An error occurred: %s", e)
+        return jsonify({"error": "An unexpected error occurred"}), 500
+
+@app.route('/jobs', methods=['POST'])
+async def upsert_jobs():
+    try:
+        data = await request.get_json()
+        jobs = data.get('jobs') if isinstance(data, dict) else None
+        if not jobs or not isinstance(jobs, list) or not all(isinstance(job, dict) for job in jobs):
+            return jsonify({"error": "Missing jobs data"}), 400
+
+        # Appends to the job store's log under its lock.
+        ids = await run_blocking(job_store.upsert, jobs)
+        snapshot_scheduler.notify()
+
+        return jsonify({"ids": ids, "version": job_store.version})
+    except Exception as e:
+        app.logger.error("An error occurred while storing jobs: %s", e)
+        return jsonify({"error": "An unexpected error occurred"}), 500
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+async def delete_job(job_id):
+    try:
+        if not await run_blocking(job_store.delete, job_id):
+            return jsonify({"error": "Job not found"}), 404
+        snapshot_scheduler.notify()
+
+        return jsonify({"deleted": job_id, "version": job_store.version})
+    except Exception as e:
+        app.logger.error("An error occurred while deleting job %s: %s", job_id, e)
+        return jsonify({"error": "An unexpected error occurred"}), 500
+
+@app.route('/generate_resume', methods=['POST'])
+async def create_resume():
+    try:
+        data = await request.get_json()
+        log_payload(app.logger, "Received data for resume generation: %s", data)
+
+        if not data:
+            return jsonify({"error": "Missing user input data"}), 400
+
+        resume = await async_pipeline.generate_resume(data)
+
+        if isinstance(resume, str) and resume.startswith("Error"):
+            return jsonify({"error": resume}), 500
+
+        return jsonify({"resume": resume})
+    except Exception as e:
+        app.logger.error("An error occurred during resume generation: %s", e)
+        return jsonify({"error": "An unexpected error occurred"}), 500
+
+@app.route('/generate_resume/stream', methods=['POST'])
+async def create_resume_stream():
+    try:
+        data = await request.get_json()
+        log_payload(app.logger, "Received data for streamed resume generation: %s", data)
+
+        if not data:
+            return jsonify({"error": "Missing user input data"}), 400
+
+        chunks = async_pipeline.generate_resume_stream(data)
+
+        if isinstance(chunks, str) and chunks.startswith("Error"):
+            return jsonify({"error": chunks}), 500
+
+        return sse_response(text_events(chunks))
+    except Exception as e:
+        app.logger.error("An error occurred during streamed resume generation: %s", e)
+        return jsonify({"error": "An unexpected error occurred"}), 500
+
+@app.route('/analyze_resume', methods=['POST'])
+async def analyze_resume_route():
+    try:
+        data = await request.get_json()
+        log_payload(app.logger, "Received data for resume analysis: %s", data)
+
+        pdf_url = data.get('resumeUrl')
+        if not pdf_url:
+            return jsonify({"error": "Missing resume URL"}), 400
+
+        if data.get('async'):
+            return enqueue('analyze_resume', analysis_result, pdf_url, data.get('userId'))
+
+        analysis = await async_pipeline.analyze_resume(pdf_url, data.get('userId'))
+
+        if isinstance(analysis, str) and analysis.startswith("Error"):
+            return jsonify({"error": analysis}), 500
+
+        return jsonify({"analysis": analysis})
+    except Exception as e:
+        app.logger.error("An error occurred during resume analysis: %s", e)
+        return jsonify({"error": "An unexpected error occurred"}), 500
+
+@app.route('/convert_to_latex', methods=['POST'])
+async def convert_to_latex_route():
+    try:
+        data = await request.get_json()
+        log_payload(app.logger, "Received data for LaTeX conversion: %s", data)
+
+        pdf_url = data.get('resumeUrl')
+        if not pdf_url:
+            return jsonify({"error": "Missing resume URL"}), 400
+
+        if data.get('async'):
+            return enqueue('convert_to_latex', latex_result, pdf_url)
+
+        latex_content = await async_pipeline.convert_to_latex(pdf_url)
+
+        if isinstance(latex_content, str) and latex_content.startswith("Error"):
+            return jsonify({"error": latex_content}), 500
+
+        return jsonify({"latex": latex_content})
+    except Exception as e:
+        app.logger.error("An error occurred during LaTeX conversion: %s", e)
+        return jsonify({"error": "An unexpected error occurred"}), 500
+
+@app.route('/convert_to_latex/stream', methods=['POST'])
+async def convert_to_latex_stream_route():
+    try:
+        data = await request.get_json()
+        log_payload(app.logger, "Received data for streamed LaTeX conversion: %s", data)
+
+        pdf_url = data.get('resumeUrl')
+        if not pdf_url:
+            return jsonify({"error": "Missing resume URL"}), 400
+
+        chunks = await async_pipeline.convert_to_latex_stream(pdf_url)
+
+        if isinstance(chunks, str) and chunks.startswith("Error"):
+            return jsonify({"error": chunks}), 500
+
+        return sse_response(text_events(chunks))
+    except Exception as e:
+        app.logger.error("An error occurred during streamed LaTeX conversion: %s", e)
+        return jsonify({"error": "An unexpected error occurred"}), 500
+
+@app.route('/export_to_pdf', methods=['POST'])
+async def export_to_pdf_route():
+    try:
+        data = await request.get_json()
+        log_payload(app.logger, "Received data for PDF export: %s", data)
+
+        # Either LaTeX from /convert_to_latex or Markdown from /generate_resume.
+        content_format = 'markdown' if data.get('markdown') else 'latex'
+        content = data.get(content_format)
+        if not content:
+            return jsonify({"error": "Missing LaTeX or Markdown content"}), 400
+
+        etag = export_etag(content, content_format)
+        if request.if_none_match.contains(etag):
+            return Response('', status=304, headers={'ETag': f'"{etag}"'})
+
+        pdf_file, etag = await async_pipeline.export_pdf_file(content, content_format)
+        if not isinstance(pdf_file, str):
+            # Quart only sends paths and BytesIO; this is the uncached spool file.
+            with pdf_file:
+                pdf_file = io.BytesIO(pdf_file.read())
+
+        response = await send_file(
+            pdf_file,
+            mimetype='application/pdf',
+            as_attachment=True,
+            attachment_filename='resume.pdf',
+            add_etags=False
+        )
+        response.set_etag(etag)
+        return response
+    except Exception as e:
+        app.logger.error("An error occurred during PDF export: %s", e)
+        return jsonify({"error": "An unexpected error occurred"}), 500
+
+@app.route('/process_submitted_resume', methods=['POST'])
+async def process_submitted_resume_route():
+    try:
+        data = await request.get_json()
+        log_payload(app.logger, "Received data for resume processing: %s", data)
+
+        resume_url = data.get('resumeUrl')
+        job = data.get('job')
+        if not resume_url or not job:
+            return jsonify({"error": "Missing resume URL or job data"}), 400
+
+        if data.get('async'):
+            return enqueue(
+                'process_submitted_resume', submitted_resume_result, resume_url, job, data.get('userId')
+            )
+
+        analysis = await async_pipeline.process_submitted_resume(resume_url, job, data.get('userId'))
+
+        if isinstance(analysis, str) and analysis.startswith("Error"):
+            return jsonify({"error": analysis}), 500
+
+        return jsonify({"analysis": analysis})
+    except Exception as e:
+        app.logger.error("An error occurred during resume processing: %s", e)
+        return jsonify({"error": "An unexpected error occurred"}), 500
+
+@app.route('/process_submitted_resumes', methods=['POST'])
+async def process_submitted_resumes_route():
+    try:
+        data = await request.get_json()
+        log_payload(app.logger, "Received data for bulk resume processing: %s", data)
+
+        resume_urls = data.get('resumeUrls')
+        job = data.get('job')
+        if not resume_urls or not isinstance(resume_urls, list) or not job:
+            return jsonify({"error": "Missing resume URLs or job data"}), 400
+        if len(resume_urls) > BULK_MAX_RESUMES:
+            return jsonify({"error": f"At most {BULK_MAX_RESUMES} resumes can be processed per request"}), 400
+
+        async def events():
+            failed = 0
+            async for item in async_pipeline.process_submitted_resumes(resume_urls, job):
+                failed += 'error' in item
+                yield 'result', item
+            yield 'done', {"total": len(resume_urls), "failed": failed}
+
+        return sse_response(events())
+    except Exception as e:
+        app.logger.error("An error occurred during bulk resume processing: %s", e)
+        return jsonify({"error": "An unexpected error occurred"}), 500
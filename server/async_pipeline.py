@@ -0,0 +1,315 @@
+import asyncio
+import json
+import logging
+import os
+import httpx
+from dotenv import load_dotenv
+import http_client
+import pdf_text
+import recommendations
+import resume_utils
+import llm
+from llm import generate_text_async
+from resilience import run_in_context, time_remaining
+from timing import timed
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# Connections shared by all in-flight requests on the event loop.
+ASYNC_HTTP_MAX_CONNECTIONS = int(os.getenv('ASYNC_HTTP_MAX_CONNECTIONS', 200))
+
+_client = None
+
+
+def get_async_client():
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=ASYNC_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=http_client.HTTP_POOL_SIZE,
+            ),
+            transport=httpx.AsyncHTTPTransport(retries=http_client.HTTP_RETRIES),
+            follow_redirects=True,
+        )
+    return _client
+
+
+async def close_async_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def run_blocking(fn, *args):
+    # Cache/store lookups (SQLite, disk), ranking and PDF parsing block; run them on
+    # the default executor with the request's context so the event loop stays free.
+    return await asyncio.get_running_loop().run_in_executor(None, run_in_context(fn), *args)
+
+
+async def iterate_blocking(iterable):
+    # Drive a blocking iterator (e.g. a streamed Gemini response) one item per executor call.
+    iterator = iter(iterable)
+    done = object()
+    try:
+        while True:
+            item = await run_blocking(next, iterator, done)
+            if item is done:
+                return
+            yield item
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            try:
+                close()
+            except ValueError:
+                # Cancelled while a worker thread is still inside next(); it finishes on its own.
+                pass
+
+
+@timed('download')
+async def _download(pdf_url, headers):
+    read_timeout = time_remaining(http_client.HTTP_READ_TIMEOUT)
+    timeout = httpx.Timeout(read_timeout, connect=min(http_client.HTTP_CONNECT_TIMEOUT, read_timeout))
+    breaker = http_client.breaker_for(pdf_url)
+    breaker.before_call()
+    recorded = False
+    try:
+        async with get_async_client().stream('GET', pdf_url, headers=headers, timeout=timeout) as response:
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            recorded = True
+            if response.status_code == 304:
+                return pdf_text.Download(304, b'', response.headers)
+            response.raise_for_status()
+
+            declared = response.headers.get('Content-Length')
+            if declared and declared.isdigit() and int(declared) > pdf_text.PDF_MAX_BYTES:
+                raise pdf_text.PdfTooLargeError(f"PDF is {declared} bytes, the limit is {pdf_text.PDF_MAX_BYTES}")
+            chunks = []
+            received = 0
+            async for chunk in response.aiter_bytes(64 * 1024):
+                time_remaining()
+                received += len(chunk)
+                if received > pdf_text.PDF_MAX_BYTES:
+                    raise pdf_text.PdfTooLargeError(f"PDF exceeds the {pdf_text.PDF_MAX_BYTES} byte limit")
+                chunks.append(chunk)
+            return pdf_text.Download(response.status_code, b''.join(chunks), response.headers)
+    except httpx.TransportError:
+        if not recorded:
+            breaker.record_failure()
+        raise
+    except Exception:
+        if not recorded:
+            breaker.record_success()
+        raise
+    except BaseException:
+        # Cancelled: nothing learned about the host, but the trial slot must be freed.
+        breaker.release()
+        raise
+
+
+async def extract_text_from_pdf(pdf_url):
+    try:
+        return await pdf_text.pdf_flight.do_async(pdf_url, _extract_cached, pdf_url)
+    except Exception as e:
+        logger.error("Error extracting text from PDF: %s", e)
+        return None
+
+
+async def _extract_cached(pdf_url):
+    text, meta = await run_blocking(pdf_text.cached_text_for_url, pdf_url)
+    if text is not None:
+        return text
+
+    response = await _download(pdf_url, pdf_text.conditional_headers(meta))
+    if response.status_code == 304:
+        text = await run_blocking(pdf_text.revalidated_text, pdf_url, meta)
+        if text is not None:
+            return text
+        response = await _download(pdf_url, {})
+
+    content_hash = pdf_text.hash_key(response.content)
+    text = await run_blocking(pdf_text.cached_text_for_content, content_hash)
+    if text is not None:
+        await run_blocking(pdf_text.remember_extraction, pdf_url, content_hash, response.headers, text)
+        return text
+    # Parsing runs in the parser processes; waiting on them blocks as well.
+    extraction = await run_blocking(pdf_text.parse_pdf, response.content)
+    if not extraction.partial:
+        await run_blocking(pdf_text.remember_extraction, pdf_url, content_hash, response.headers, extraction.text)
+    return extraction.text
+
+
+async def get_job_recommendations(pdf_url, jobs=None, batch_size=None, top_k=None, mode='llm', filters=None):
+    try:
+        resume_text = await extract_text_from_pdf(pdf_url)
+        if not resume_text:
+            raise ValueError("Unable to extract text from the provided PDF.")
+
+        candidates, similarities = await run_blocking(recommendations.rank_candidates, resume_text, jobs, top_k, filters)
+
+        if mode == 'lite':
+            return recommendations.lite_recommendations(candidates, similarities)
+
+        try:
+            assessments = await score_jobs(resume_text, candidates, batch_size)
+        except Exception as e:
+            if not recommendations.RECOMMENDATION_LITE_FALLBACK:
+                raise
+            logger.warning("LLM scoring failed, falling back to local ranking: %s", e)
+            return recommendations.lite_recommendations(candidates, similarities)
+
+        recommendations.annotate_recommendations(assessments, candidates, similarities)
+        return assessments
+    except Exception as e:
+        logger.error("Error in get_job_recommendations: %s", e)
+        return f"Error generating recommendations: {str(e)}"
+
+
+async def score_jobs(resume_text, jobs, batch_size=None):
+    chunks = recommendations.chunk_jobs(jobs, batch_size)
+    slots = asyncio.Semaphore(recommendations.RECOMMENDATION_MAX_WORKERS)
+
+    async def score(chunk):
+        async with slots:
+            return await score_job_chunk(resume_text, chunk)
+
+    results = await asyncio.gather(*(score(chunk) for chunk in chunks))
+    return [item for chunk_result in results for item in chunk_result]
+
+
+async def score_job_chunk(resume_text, jobs, retries=None):
+    retries = recommendations.RECOMMENDATION_CHUNK_RETRIES if retries is None else retries
+    scored = []
+
+    for attempt in range(retries + 1):
+        remaining = jobs[len(scored):]
+        try:
+            response_text = await generate_text_async(
+                recommendations.build_job_scoring_prompt(resume_text, remaining),
+                generation_config=recommendations.JOB_SCORING_CONFIG,
+                validate=lambda text: recommendations.parse_job_assessments(text, remaining),
+            )
+            return scored + recommendations.parse_job_assessments(response_text, remaining)
+        except recommendations.PartialAssessmentsError as e:
+            scored += e.assessments
+            if attempt == retries:
+                raise
+            logger.warning("Re-scoring %s jobs missing from a truncated response", len(jobs) - len(scored))
+        except Exception as e:
+            if attempt == retries:
+                raise
+            logger.warning("Retrying job chunk of %s after error: %s", len(remaining), e)
+
+
+async def process_submitted_resume(resume_url, job, user_id=None):
+    try:
+        resume_text = await extract_text_from_pdf(resume_url)
+        if not resume_text:
+            raise ValueError("Unable to extract text from the provided PDF.")
+
+        return await screen_resume_text(resume_text, job, user_id)
+    except Exception as e:
+        logger.error("Error in process_submitted_resume: %s", e)
+        return recommendations.submitted_resume_error(e)
+
+
+async def screen_resume_text(resume_text, job, user_id=None):
+    # Planning and finishing read and write the analysis store.
+    plan = await run_blocking(recommendations.plan_screening, resume_text, job, user_id)
+    if plan.prompt is None:
+        return await run_blocking(recommendations.finish_screening, plan)
+
+    response_text = await generate_text_async(plan.prompt, generation_config=recommendations.SCREENING_CONFIG)
+    return await run_blocking(recommendations.finish_screening, plan, response_text)
+
+
+async def process_submitted_resumes(resume_urls, job):
+    """Async counterpart of recommendations.process_submitted_resumes, yielding results as they finish."""
+    slots = asyncio.Semaphore(recommendations.BULK_LLM_CONCURRENCY)
+
+    async def screen(index, resume_url):
+        try:
+            resume_text = await extract_text_from_pdf(resume_url)
+            if not resume_text:
+                raise ValueError("Unable to extract text from the provided PDF.")
+            async with slots:
+                analysis = await screen_resume_text(resume_text, job)
+            return {"index": index, "resumeUrl": resume_url, "analysis": analysis}
+        except Exception as e:
+            logger.error("Error screening resume %s: %s", resume_url, e)
+            return {"index": index, "resumeUrl": resume_url, "error": f"Error processing submitted resume: {str(e)}"}
+
+    tasks = [asyncio.ensure_future(screen(index, url)) for index, url in enumerate(resume_urls)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Runs when the client disconnects too.
+        for task in tasks:
+            task.cancel()
+
+
+async def generate_resume(user_input):
+    try:
+        return await generate_text_async(
+            recommendations.build_resume_prompt(user_input),
+            generation_config=recommendations.RESUME_GENERATION_CONFIG,
+        )
+    except Exception as e:
+        logger.error("Error in generate_resume: %s", e)
+        return f"Error generating resume: {str(e)}"
+
+
+def generate_resume_stream(user_input):
+    try:
+        prompt = recommendations.build_resume_prompt(user_input)
+    except Exception as e:
+        logger.error("Error in generate_resume_stream: %s", e)
+        return f"Error generating resume: {str(e)}"
+
+    return iterate_blocking(llm.stream_text(prompt, generation_config=recommendations.RESUME_GENERATION_CONFIG))
+
+
+async def analyze_resume(pdf_url, user_id=None):
+    resume_text = await extract_text_from_pdf(pdf_url)
+    if not resume_text:
+        return json.dumps({"error": "Unable to extract text from the provided PDF."})
+
+    plan = await run_blocking(resume_utils.plan_analysis, resume_text, user_id)
+    if plan.prompt is None:
+        return await run_blocking(resume_utils.finish_analysis, plan)
+
+    response_text = await generate_text_async(plan.prompt, generation_config=resume_utils.ANALYSIS_GENERATION_CONFIG)
+    return await run_blocking(resume_utils.finish_analysis, plan, response_text)
+
+
+async def convert_to_latex(pdf_url):
+    resume_text = await extract_text_from_pdf(pdf_url)
+    if not resume_text:
+        return "Error: Unable to extract text from the provided PDF."
+
+    return await generate_text_async(
+        resume_utils.build_latex_prompt(resume_text),
+        generation_config=resume_utils.LATEX_GENERATION_CONFIG,
+    )
+
+
+async def convert_to_latex_stream(pdf_url):
+    # Extracted before streaming starts, as in resume_utils.convert_to_latex_stream.
+    resume_text = await extract_text_from_pdf(pdf_url)
+    if not resume_text:
+        return "Error: Unable to extract text from the provided PDF."
+
+    return iterate_blocking(llm.stream_text(
+        resume_utils.build_latex_prompt(resume_text), generation_config=resume_utils.LATEX_GENERATION_CONFIG
+    ))
+
+
+async def export_pdf_file(content, content_format='latex'):
+    return await run_blocking(resume_utils.export_pdf_file, content, content_format)
@@ -0,0 +1,122 @@
+"""Compare the structured-output parsers against the previous regex/split parsing.
+
+Runs over recorded Gemini responses in corpus/llm_responses.jsonl (clean, fenced,
+prose-wrapped, nested and truncated outputs) and reports, per response kind, how
+many responses parse, how many job assessments are recovered, and the mean parse
+time. Run from the server directory:
+
+    python benchmarks/bench_parsers.py [--repeat 200]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommendations import PartialAssessmentsError, parse_job_assessments, parse_screening_response  # noqa: E402
+from resume_utils import parse_analysis_response  # noqa: E402
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus', 'llm_responses.jsonl')
+
+
+# The parsers as they were before json_extract, kept here as the baseline.
+
+def legacy_job_assessments(text, jobs):
+    assessments = json.loads(text)
+    if not isinstance(assessments, list) or len(assessments) != jobs:
+        raise ValueError("wrong number of assessments")
+    return assessments
+
+
+def legacy_screening(text):
+    json_match = re.search(r'\{[^}]*\}', text, re.DOTALL)
+    if not json_match:
+        raise ValueError("no JSON object")
+    return json.loads(re.sub(r'\s+', ' ', json_match.group(0)))
+
+
+def legacy_analysis(text):
+    sections = text.split('\n\n')
+    return {
+        "overall_impression": sections[0].replace("OVERALL IMPRESSION:\n", "").strip(),
+        "pros": [item.strip('- ') for item in sections[1].replace("PROS:\n", "").split('\n') if item.strip()],
+        "cons": [item.strip('- ') for item in sections[2].replace("CONS:\n", "").split('\n') if item.strip()],
+        "suggestions": [item.strip('- ') for item in sections[3].replace("SUGGESTIONS:\n", "").split('\n') if item.strip()],
+    }
+
+
+def run_legacy(record):
+    """Return the number of usable items (assessments, or 1 for a whole object)."""
+    try:
+        if record['kind'] == 'job_scoring':
+            return len(legacy_job_assessments(record['text'], record['jobs']))
+        if record['kind'] == 'screening':
+            legacy_screening(record['text'])
+            return 1
+        analysis = legacy_analysis(record['text'])
+        # The old parser "succeeds" on a shifted split; count only correct section contents.
+        return int(bool(analysis['pros']) and not analysis['pros'][0].upper().startswith(('PROS', 'CONS', '**', '#')))
+    except Exception:
+        return 0
+
+
+def run_current(record):
+    if record['kind'] == 'job_scoring':
+        jobs = list(range(record['jobs']))
+        try:
+            return len(parse_job_assessments(record['text'], jobs))
+        except PartialAssessmentsError as e:
+            return len(e.assessments)
+        except ValueError:
+            return 0
+    if record['kind'] == 'screening':
+        return int('error' not in parse_screening_response(record['text']))
+    return int('error' not in json.loads(parse_analysis_response(record['text'])))
+
+
+def timed(fn, record, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn(record)
+    return result, (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=200, help='parses per response when timing')
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.CRITICAL)
+
+    with open(CORPUS, 'r', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+
+    totals = {}
+    for record in records:
+        expected = record['jobs'] or 1
+        legacy_items, legacy_seconds = timed(run_legacy, record, args.repeat)
+        current_items, current_seconds = timed(run_current, record, args.repeat)
+        row = totals.setdefault(record['kind'], {
+            'responses': 0, 'expected': 0, 'legacy': [0, 0, 0.0], 'current': [0, 0, 0.0],
+        })
+        row['responses'] += 1
+        row['expected'] += expected
+        for name, items, seconds in (('legacy', legacy_items, legacy_seconds), ('current', current_items, current_seconds)):
+            row[name][0] += items > 0
+            row[name][1] += items
+            row[name][2] += seconds
+
+    print(f"{'kind':<12} {'parser':<8} {'parsed':>10} {'items':>12} {'mean us':>10}")
+    for kind, row in totals.items():
+        for name in ('legacy', 'current'):
+            parsed, items, seconds = row[name]
+            print(f"{kind:<12} {name:<8} {parsed:>4}/{row['responses']:<5} {items:>5}/{row['expected']:<6} "
+                  f"{seconds / row['responses'] * 1e6:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
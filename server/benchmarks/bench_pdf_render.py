@@ -0,0 +1,102 @@
+"""Benchmark PDF export: pages/second and peak memory per render.
+
+Renders the sample LaTeX and Markdown resumes in corpus/, repeated to produce
+longer documents, with the current renderer (pdf_render) and with the previous
+line-by-line export kept below as a baseline. The baseline's page counts are
+inflated by a spacer after every line and by preamble commands printed as text,
+so compare ms/render per document as well as pages/s. Run from the server
+directory:
+
+    python benchmarks/bench_pdf_render.py [--repeat 20] [--sizes 1,5,20]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PyPDF2  # noqa: E402
+from reportlab.lib.pagesizes import letter  # noqa: E402
+from reportlab.lib.styles import getSampleStyleSheet  # noqa: E402
+from reportlab.lib.units import inch  # noqa: E402
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer  # noqa: E402
+
+from pdf_render import render_latex, render_markdown  # noqa: E402
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+
+
+def legacy_export(content):
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = getSampleStyleSheet()
+    flowables = []
+    for line in content.split('\n'):
+        if line.startswith('\\section'):
+            flowables.append(Paragraph(line.replace('\\section{', '').replace('}', ''), styles['Heading1']))
+        elif line.startswith('\\subsection'):
+            flowables.append(Paragraph(line.replace('\\subsection{', '').replace('}', ''), styles['Heading2']))
+        elif line.strip().startswith('\\item'):
+            text = line.replace('\\item', '').strip()
+            flowables.append(Paragraph(f"• {text}", styles['BodyText']))
+        elif line.strip():
+            flowables.append(Paragraph(line, styles['BodyText']))
+        flowables.append(Spacer(1, 0.2 * inch))
+    doc.build(flowables)
+    buffer.seek(0)
+    return buffer
+
+
+def latex_body(text):
+    start = text.index('\\begin{document}') + len('\\begin{document}')
+    return text[start:text.index('\\end{document}')]
+
+
+def repeat_latex(text, times):
+    preamble = text[:text.index('\\begin{document}')]
+    return preamble + '\\begin{document}\n' + latex_body(text) * times + '\\end{document}\n'
+
+
+def measure(render, content, repeat):
+    pages = len(PyPDF2.PdfReader(render(content)).pages)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        render(content)
+    seconds = (time.perf_counter() - started) / repeat
+
+    tracemalloc.start()
+    render(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return pages, seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20, help='renders per measurement')
+    parser.add_argument('--sizes', default='1,5,20', help='how many copies of the sample resume per document')
+    args = parser.parse_args()
+
+    with open(os.path.join(CORPUS, 'resume.tex'), 'r', encoding='utf-8') as f:
+        latex = f.read()
+    with open(os.path.join(CORPUS, 'resume.md'), 'r', encoding='utf-8') as f:
+        markdown = f.read()
+
+    print(f"{'renderer':<16} {'copies':>6} {'pages':>6} {'ms/render':>10} {'pages/s':>9} {'peak MiB':>9}")
+    for copies in (int(size) for size in args.sizes.split(',')):
+        cases = (
+            ('legacy latex', legacy_export, repeat_latex(latex, copies)),
+            ('latex', render_latex, repeat_latex(latex, copies)),
+            ('markdown', render_markdown, '\n\n'.join([markdown] * copies)),
+        )
+        for name, render, content in cases:
+            pages, seconds, peak = measure(render, content, args.repeat)
+            print(f"{name:<16} {copies:>6} {pages:>6} {seconds * 1000:>10.1f} {pages / seconds:>9.1f} "
+                  f"{peak / (1024 * 1024):>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Benchmark local skill extraction: resumes/second over a synthetic corpus.
+
+Builds --resumes resumes from the sample resume in corpus/ with skills from the
+dictionary (data/skills.json) swapped in at random. Each resume is matched with
+the token Aho-Corasick automaton (skill_extractor) and with two regex
+baselines: one compiled pattern per phrase, and a single alternation of all
+phrases. The baselines are slow, so they run on the first --baseline-resumes
+only. Reports throughput and the mean number of skills found per resume; the
+per-phrase baseline also counts phrases nested in longer ones ("react" in
+"react native"). Run from the server directory:
+
+    python benchmarks/bench_skills.py [--resumes 5000] [--baseline-resumes 500] [--seed 0]
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from skill_extractor import SKILLS_DICTIONARY_PATH, SkillExtractor  # noqa: E402
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+
+_FILLER = (
+    'Worked closely with the product team to ship features on a weekly cadence.',
+    'Owned the migration of a legacy service and documented the rollout plan.',
+    'Mentored two junior engineers and ran the weekly review of open issues.',
+    'Reduced support tickets by 20% after redesigning the onboarding flow.',
+    'Presented quarterly results to the regional management team.',
+)
+
+
+def synthetic_resumes(count, dictionary, seed):
+    rng = random.Random(seed)
+    with open(os.path.join(CORPUS, 'resume.md'), 'r', encoding='utf-8') as f:
+        base = f.read()
+    phrases = [phrase for entries in dictionary.values() for values in entries.values() for phrase in values]
+    resumes = []
+    for index in range(count):
+        skills = ', '.join(rng.sample(phrases, 12))
+        bullets = '\n'.join(f'- {rng.choice(_FILLER)} Used {rng.choice(phrases)}.' for _ in range(rng.randint(4, 12)))
+        resumes.append(f'{base.replace("Jane Smith", f"Candidate {index}")}\n## More Experience\n{bullets}\n'
+                       f'## Additional Skills\n{skills}\n')
+    return resumes
+
+
+def regex_per_phrase(dictionary):
+    patterns = [
+        (re.compile(r'(?<![\w+#.])' + re.escape(phrase) + r'(?![\w+#])', re.IGNORECASE), canonical)
+        for entries in dictionary.values() for canonical, phrases in entries.items() for phrase in phrases
+    ]
+
+    def find(text):
+        return {canonical for pattern, canonical in patterns if pattern.search(text)}
+    return find
+
+
+def regex_alternation(dictionary):
+    canonical_for = {}
+    for entries in dictionary.values():
+        for canonical, phrases in entries.items():
+            for phrase in phrases:
+                canonical_for.setdefault(phrase.lower(), canonical)
+    alternation = '|'.join(re.escape(phrase) for phrase in sorted(canonical_for, key=len, reverse=True))
+    pattern = re.compile(r'(?<![\w+#.])(?:' + alternation + r')(?![\w+#])', re.IGNORECASE)
+
+    def find(text):
+        return {canonical_for[match.group(0).lower()] for match in pattern.finditer(text)}
+    return find
+
+
+def measure(find, resumes):
+    started = time.perf_counter()
+    results = [find(text) for text in resumes]
+    return time.perf_counter() - started, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--resumes', type=int, default=5000, help='synthetic resumes to match')
+    parser.add_argument('--baseline-resumes', type=int, default=500, help='resumes matched by the regex baselines')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with open(SKILLS_DICTIONARY_PATH, 'r', encoding='utf-8') as f:
+        dictionary = json.load(f)
+    started = time.perf_counter()
+    extractor = SkillExtractor(dictionary)
+    build_ms = (time.perf_counter() - started) * 1000
+    resumes = synthetic_resumes(args.resumes, dictionary, args.seed)
+    megabytes = sum(len(text) for text in resumes) / (1024 * 1024)
+    print(f"{len(extractor)} dictionary terms, automaton built in {build_ms:.1f} ms; "
+          f"{len(resumes)} resumes, {megabytes:.1f} MiB")
+    print()
+
+    print(f"{'matcher':<18} {'resumes':>8} {'seconds':>8} {'resumes/s':>10} {'MiB/s':>7} {'skills/resume':>14}")
+    cases = (
+        ('aho-corasick', extractor.find, resumes),
+        ('regex per phrase', regex_per_phrase(dictionary), resumes[:args.baseline_resumes]),
+        ('regex alternation', regex_alternation(dictionary), resumes[:args.baseline_resumes]),
+    )
+    for name, find, texts in cases:
+        seconds, results = measure(find, texts)
+        size = sum(len(text) for text in texts) / (1024 * 1024)
+        print(f"{name:<18} {len(texts):>8} {seconds:>8.2f} {len(texts) / seconds:>10.0f} {size / seconds:>7.2f} "
+              f"{sum(len(found) for found in results) / len(texts):>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark cold start: time to import the app, and time to warm it up.
+
+Each repetition runs a fresh interpreter so nothing is cached in sys.modules.
+LLM_BACKEND defaults to fake; set LLM_BACKEND=gemini to include importing
+and configuring the Gemini SDK in the warmup. Reports the median import time of the Flask app (--module), the median time of
+warmup.warmup() afterwards, and the modules with the largest cumulative import
+time as reported by python -X importtime. Run from the server directory:
+
+    python benchmarks/bench_startup.py [--repeat 5] [--module app] [--top 15]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_MEASURE = """
+import time
+started = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+import warmup
+warmup.warmup()
+print(imported - started, time.perf_counter() - imported)
+"""
+
+
+def run(code, *flags):
+    env = dict(os.environ, LLM_BACKEND=os.environ.get('LLM_BACKEND', 'fake'), LOG_LEVEL='WARNING')
+    return subprocess.run([sys.executable, *flags, '-c', code], cwd=SERVER_DIR, env=env,
+                          capture_output=True, text=True, check=True)
+
+
+def import_profile(module, top):
+    # -X importtime lines: "import time: self [us] | cumulative | imported package"
+    rows = []
+    for line in run(f'import {module}', '-X', 'importtime').stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((int(cumulative), depth, name.strip()))
+    # The app's direct imports and what they import in turn, slowest first.
+    rows = [row for row in rows if 1 <= row[1] <= 2]
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='fresh interpreters to time')
+    parser.add_argument('--module', default='app', help='entry module to import (app, asgi_app, wsgi)')
+    parser.add_argument('--top', type=int, default=15, help='slowest imports to list')
+    args = parser.parse_args()
+
+    imports, warmups = [], []
+    for _ in range(args.repeat):
+        imported, warmed = run(_MEASURE.format(module=args.module)).stdout.split()[-2:]
+        imports.append(float(imported) * 1000)
+        warmups.append(float(warmed) * 1000)
+    print(f"import {args.module}: median {statistics.median(imports):.0f} ms "
+          f"(min {min(imports):.0f}, max {max(imports):.0f}) over {args.repeat} runs")
+    print(f"warmup: median {statistics.median(warmups):.0f} ms (min {min(warmups):.0f}, max {max(warmups):.0f})")
+    print()
+    print(f"{'module':<40} {'cumulative ms':>14}")
+    for cumulative, depth, name in import_profile(args.module, args.top):
+        print(f"{'  ' * (depth - 1) + name:<40} {cumulative / 1000:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Local HTTP fixtures for benchmarks: a server handing out resume PDFs.
+
+GET /resume/<n>.pdf returns a distinct resume (the sample Markdown resume with
+candidate n's name and email), rendered once and then served from memory with
+an ETag. An optional latency models a storage bucket round trip.
+"""
+import functools
+import hashlib
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_render import render_markdown  # noqa: E402
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+
+
+@functools.lru_cache(maxsize=None)
+def resume_pdf(index):
+    with open(os.path.join(CORPUS, 'resume.md'), 'r', encoding='utf-8') as f:
+        markdown = f.read()
+    markdown = markdown.replace('Jane Smith', f'Candidate {index}').replace('jane.smith', f'candidate{index}')
+    return render_markdown(markdown).getvalue()
+
+
+class PDFServer:
+    """Serves resume PDFs from a background thread; use as a context manager."""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0):
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def url(self, index):
+        return f'{self.base_url}/resume/{index}.pdf'
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with fixture._lock:
+                    fixture.requests += 1
+                name = self.path.rsplit('/', 1)[-1]
+                if not (self.path.startswith('/resume/') and name.endswith('.pdf') and name[:-4].isdigit()):
+                    self.send_error(404)
+                    return
+                body = resume_pdf(int(name[:-4]))
+                etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+                if fixture.latency:
+                    time.sleep(fixture.latency)
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/pdf')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,188 @@
+"""Load test the HTTP API end to end without Gemini or Firebase.
+
+Starts the Flask app in-process with LLM_BACKEND=fake (recorded responses after
+a simulated latency, see fake_llm.py) and a local PDF server standing in for
+Firebase Storage, then drives the six API routes concurrently and reports
+latency percentiles, throughput and errors per route, plus where the time went
+per stage as reported in each response's Server-Timing header. Run from the
+server directory:
+
+    python benchmarks/load_test.py [--requests 300] [--concurrency 20] [--distinct 10]
+
+Pass --url to drive an already running server (Flask or hypercorn asgi_app:app)
+instead; it must be able to reach the PDF server, and its LLM backend is
+whatever that server was started with.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests  # noqa: E402
+
+from fixtures import CORPUS, PDFServer  # noqa: E402
+
+ROUTES = (
+    'get_recommendations', 'generate_resume', 'analyze_resume',
+    'convert_to_latex', 'export_to_pdf', 'process_submitted_resume',
+)
+
+_ROLES = ('Backend Engineer', 'Data Analyst', 'Frontend Developer', 'ML Engineer', 'DevOps Engineer')
+_TAGS = (['Python', 'Flask', 'SQL'], ['SQL', 'Tableau', 'Excel'], ['React', 'TypeScript', 'CSS'],
+         ['Python', 'PyTorch', 'AWS'], ['Docker', 'Kubernetes', 'AWS'])
+
+
+def sample_jobs(count):
+    return [
+        {
+            'id': f'job-{i}',
+            'companyName': f'Company {i}',
+            'role': _ROLES[i % len(_ROLES)],
+            'classification': 'Information & Communication Technology',
+            'tags': _TAGS[i % len(_TAGS)],
+            'descriptions': f'Join team {i} to build and operate {_ROLES[i % len(_ROLES)].lower()} tooling '
+                            'used across the company. ' * 4,
+            'requirements': 'Degree in Computer Science or related field; 1-3 years of experience.',
+        }
+        for i in range(count)
+    ]
+
+
+def request_body(route, index, distinct, pdf_server, jobs, markdown):
+    resume = index % distinct
+    resume_url = pdf_server.url(resume)
+    if route == 'get_recommendations':
+        return {'pdfUrl': resume_url, 'jobs': jobs}
+    if route == 'generate_resume':
+        return {
+            'fullName': f'Candidate {resume}', 'email': f'candidate{resume}@example.com', 'phone': '+60 12-345 6789',
+            'education': 'BSc Computer Science, University of Malaya', 'experience': 'Software Engineer Intern, Shopee',
+            'skills': 'Python, Flask, SQL', 'targetIndustry': 'Technology',
+        }
+    if route == 'export_to_pdf':
+        return {'markdown': markdown.replace('Jane Smith', f'Candidate {resume}')}
+    if route == 'process_submitted_resume':
+        return {'resumeUrl': resume_url, 'job': jobs[resume % len(jobs)]}
+    return {'resumeUrl': resume_url}
+
+
+def parse_server_timing(header):
+    stages = {}
+    for entry in (header or '').split(','):
+        name, _, params = entry.strip().partition(';')
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if name and key == 'dur':
+                stages[name] = float(value)
+    return stages
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def start_app(args):
+    # The app reads its configuration at import time.
+    os.environ.setdefault('LLM_BACKEND', 'fake')
+    os.environ.setdefault('FAKE_LLM_LATENCY', str(args.llm_latency))
+    os.environ.setdefault('FAKE_LLM_ERROR_RATE', str(args.llm_error_rate))
+    os.environ.setdefault('LLM_CACHE_BACKEND', 'memory' if args.cache else 'none')
+    os.environ.setdefault('ANALYSIS_STORE_BACKEND', 'memory' if args.cache else 'none')
+    os.environ.setdefault('EXPORT_CACHE_DIR', tempfile.mkdtemp(prefix='export-cache-') if args.cache else '')
+    import logging
+    from werkzeug.serving import make_server
+    from app import app
+
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='base URL of a running server (default: start the Flask app in-process)')
+    parser.add_argument('--requests', type=int, default=300, help='total requests, spread evenly across routes')
+    parser.add_argument('--concurrency', type=int, default=20, help='requests in flight at once')
+    parser.add_argument('--distinct', type=int, default=10, help='distinct resumes the requests cycle through')
+    parser.add_argument('--jobs', type=int, default=20, help='jobs per /get_recommendations request')
+    parser.add_argument('--routes', default=','.join(ROUTES), help='comma-separated routes to exercise')
+    parser.add_argument('--llm-latency', type=float, default=0.5, help='fake model latency in seconds')
+    parser.add_argument('--llm-error-rate', type=float, default=0.0, help='fraction of fake model calls that fail')
+    parser.add_argument('--pdf-latency', type=float, default=0.05, help='PDF server latency in seconds')
+    parser.add_argument('--cache', action='store_true', help='enable the completion, analysis and export caches')
+    args = parser.parse_args()
+
+    routes = [route for route in args.routes.split(',') if route]
+    jobs = sample_jobs(args.jobs)
+    with open(os.path.join(CORPUS, 'resume.md'), 'r', encoding='utf-8') as f:
+        markdown = f.read()
+
+    with PDFServer(latency=args.pdf_latency) as pdf_server:
+        server = None
+        base_url = args.url
+        if not base_url:
+            server, base_url = start_app(args)
+
+        sessions = threading.local()
+        results = defaultdict(list)
+        stages = defaultdict(list)
+        results_lock = threading.Lock()
+
+        def send(index):
+            route = routes[index % len(routes)]
+            if not hasattr(sessions, 'session'):
+                sessions.session = requests.Session()
+            body = request_body(route, index // len(routes), args.distinct, pdf_server, jobs, markdown)
+            started = time.perf_counter()
+            try:
+                response = sessions.session.post(f'{base_url}/{route}', json=body, timeout=300)
+                response.content
+                ok = response.status_code == 200
+                timing = parse_server_timing(response.headers.get('Server-Timing'))
+            except requests.RequestException:
+                ok, timing = False, {}
+            elapsed = time.perf_counter() - started
+            with results_lock:
+                results[route].append((elapsed, ok))
+                for stage, ms in timing.items():
+                    stages[stage].append(ms)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            list(executor.map(send, range(args.requests)))
+        wall = time.perf_counter() - started
+
+        if server is not None:
+            server.shutdown()
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {args.distinct} distinct resumes, "
+          f"{wall:.1f}s wall, {args.requests / wall:.1f} req/s, {pdf_server.requests} PDF downloads")
+    print()
+    print(f"{'route':<26} {'count':>6} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>7}")
+    for route in routes:
+        samples = results[route]
+        latencies = [elapsed * 1000 for elapsed, _ in samples]
+        errors = sum(1 for _, ok in samples if not ok)
+        print(f"{route:<26} {len(samples):>6} {errors:>6} {percentile(latencies, 0.5):>8.1f} "
+              f"{percentile(latencies, 0.95):>8.1f} {percentile(latencies, 0.99):>8.1f} {len(samples) / wall:>7.1f}")
+    if stages:
+        print()
+        print(f"{'stage (Server-Timing)':<26} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for stage, values in sorted(stages.items()):
+            print(f"{stage:<26} {len(values):>6} {percentile(values, 0.5):>8.1f} "
+                  f"{percentile(values, 0.95):>8.1f} {percentile(values, 0.99):>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,401 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def hash_key(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, (bytes, bytearray)):
+            part = str(part).encode('utf-8')
+        digest.update(part)
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+def _sizeof(value):
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    return sys.getsizeof(value)
+
+
+class CacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self.counters)
+        hits = counters.get('hits', 0)
+        lookups = hits + counters.get('misses', 0)
+        counters['hit_rate'] = round(hits / lookups, 4) if lookups else 0.0
+        return counters
+
+
+class LRUCache:
+    """Thread-safe in-memory LRU with entry-count, size and TTL limits."""
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024, ttl=3600):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.incr('misses')
+                return None
+            value, size, stored_at = entry
+            if self.ttl and time.time() - stored_at > self.ttl:
+                self._remove(key)
+                self.stats.incr('expired')
+                self.stats.incr('misses')
+                return None
+            self._entries.move_to_end(key)
+            self.stats.incr('hits')
+            return value
+
+    def set(self, key, value):
+        size = _sizeof(value)
+        if self.max_bytes and size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.time())
+            self._bytes += size
+            while self._entries and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes and self._bytes > self.max_bytes)
+            ):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.stats.incr('evictions')
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def info(self):
+        info = self.stats.snapshot()
+        info.update(entries=len(self._entries), bytes=self._bytes)
+        return info
+
+
+class DiskCache:
+    """JSON-per-key store on disk so cached values survive restarts.
+
+    Files are evicted oldest-access first once the directory grows past
+    max_bytes, and ignored once they are older than ttl.
+    """
+
+    suffix = '.json'
+
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024, ttl=7 * 24 * 3600):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._bytes = sum(
+            entry.stat().st_size for entry in os.scandir(directory) if entry.name.endswith(self.suffix)
+        )
+
+    def _path(self, key):
+        return os.path.join(self.directory, hash_key(key) + self.suffix)
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+        except FileNotFoundError:
+            self.stats.incr('misses')
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Discarding unreadable cache file %s: %s", path, e)
+            self._unlink(path)
+            self.stats.incr('misses')
+            return None
+
+        if self.ttl and time.time() - payload.get('stored_at', 0) > self.ttl:
+            self._unlink(path)
+            self.stats.incr('expired')
+            self.stats.incr('misses')
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.stats.incr('hits')
+        return payload.get('value')
+
+    def set(self, key, value):
+        path = self._path(key)
+        data = json.dumps({'stored_at': time.time(), 'value': value}).encode('utf-8')
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            with self._lock:
+                previous = os.path.getsize(path) if os.path.exists(path) else 0
+                os.replace(tmp_path, path)
+                self._bytes += len(data) - previous
+        except OSError as e:
+            logger.warning("Failed to write cache file %s: %s", path, e)
+            self._unlink(tmp_path)
+            return
+        if self.max_bytes and self._bytes > self.max_bytes:
+            self._evict()
+
+    def delete(self, key):
+        self._unlink(self._path(key))
+
+    def _unlink(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        if path.endswith(self.suffix):
+            with self._lock:
+                self._bytes -= size
+
+    def _evict(self):
+        with self._lock:
+            entries = sorted(
+                (entry for entry in os.scandir(self.directory) if entry.name.endswith(self.suffix)),
+                key=lambda entry: entry.stat().st_mtime,
+            )
+            total = sum(entry.stat().st_size for entry in entries)
+            for entry in entries:
+                if total <= self.max_bytes * 0.9:
+                    break
+                try:
+                    size = entry.stat().st_size
+                    os.remove(entry.path)
+                except OSError:
+                    continue
+                total -= size
+                self.stats.incr('evictions')
+            self._bytes = total
+
+    def info(self):
+        info = self.stats.snapshot()
+        info.update(directory=self.directory, bytes=self._bytes)
+        return info
+
+
+class FileCache(DiskCache):
+    """Bounded directory of files served by path, e.g. rendered PDFs.
+
+    Shares DiskCache's size accounting and oldest-access-first eviction. Keys are
+    expected to be content hashes, so an entry never goes stale; ttl counts from
+    the last access and only clears out files nobody asks for.
+    """
+
+    def __init__(self, directory, suffix='.bin', max_bytes=512 * 1024 * 1024, ttl=7 * 24 * 3600):
+        self.suffix = suffix
+        super().__init__(directory, max_bytes=max_bytes, ttl=ttl)
+
+    def get_path(self, key):
+        path = self._path(key)
+        try:
+            accessed_at = os.stat(path).st_mtime
+        except OSError:
+            self.stats.incr('misses')
+            return None
+        if self.ttl and time.time() - accessed_at > self.ttl:
+            self._unlink(path)
+            self.stats.incr('expired')
+            self.stats.incr('misses')
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.stats.incr('hits')
+        return path
+
+    def put(self, key, write):
+        """Store the file produced by write(f), an open binary file; returns its path."""
+        path = self._path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            size = os.path.getsize(tmp_path)
+            with self._lock:
+                previous = os.path.getsize(path) if os.path.exists(path) else 0
+                os.replace(tmp_path, path)
+                self._bytes += size - previous
+        except BaseException:
+            self._unlink(tmp_path)
+            raise
+        if self.max_bytes and self._bytes > self.max_bytes:
+            self._evict()
+        return path
+
+
+class TieredCache:
+    """Memory LRU in front of an optional persistent backend (DiskCache or SQLiteCache)."""
+
+    def __init__(self, memory, persistent=None):
+        self.memory = memory
+        self.persistent = persistent
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None or self.persistent is None:
+            return value
+        value = self.persistent.get(key)
+        if value is not None:
+            self.memory.set(key, value)
+        return value
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        if self.persistent is not None:
+            self.persistent.set(key, value)
+
+    def delete(self, key):
+        self.memory.delete(key)
+        if self.persistent is not None:
+            self.persistent.delete(key)
+
+    def info(self):
+        info = {'memory': self.memory.info()}
+        if self.persistent is not None:
+            info['persistent'] = self.persistent.info()
+        return info
+
+
+def build_tiered_cache(backend, path, ttl, max_entries, setting='cache backend'):
+    """A TieredCache for a memory | sqlite | disk backend name, or None for 'none'.
+
+    path is the SQLite file (with .sqlite3 appended) or the DiskCache directory;
+    setting names the environment variable in the warning for an unknown backend.
+    """
+    if backend == 'none':
+        return None
+
+    memory = LRUCache(max_entries=max_entries, ttl=ttl)
+    if backend == 'sqlite':
+        persistent = SQLiteCache(path + '.sqlite3', ttl=ttl)
+    elif backend == 'disk':
+        persistent = DiskCache(path, ttl=ttl)
+    else:
+        if backend != 'memory':
+            logger.warning("Unknown %s '%s', falling back to memory", setting, backend)
+        persistent = None
+    return TieredCache(memory, persistent)
+
+
+class SQLiteCache:
+    """Single-table SQLite store; evicts least recently used rows past max_entries."""
+
+    def __init__(self, path, max_entries=10000, ttl=7 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn_handle = None
+        self._conn_pid = None
+
+    @property
+    def _conn(self):
+        # Opened on first use in each process (callers hold self._lock): a SQLite
+        # connection must not be carried across fork(), e.g. by gunicorn's preload.
+        if self._conn_handle is None or self._conn_pid != os.getpid():
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            with conn:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS cache ('
+                    'key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+                )
+                conn.execute('CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)')
+            self._conn_handle, self._conn_pid = conn, os.getpid()
+        return self._conn_handle
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute('SELECT value, stored_at FROM cache WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.stats.incr('misses')
+                return None
+            value, stored_at = row
+            with self._conn:
+                if self.ttl and now - stored_at > self.ttl:
+                    self._conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+                    self.stats.incr('expired')
+                    self.stats.incr('misses')
+                    return None
+                self._conn.execute('UPDATE cache SET accessed_at = ? WHERE key = ?', (now, key))
+        self.stats.incr('hits')
+        return json.loads(value)
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO cache (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)',
+                (key, json.dumps(value), now, now),
+            )
+            count = self._conn.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+            if count > self.max_entries:
+                excess = count - self.max_entries
+                self._conn.execute(
+                    'DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)',
+                    (excess,),
+                )
+                self.stats.incr('evictions', excess)
+
+    def delete(self, key):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def info(self):
+        info = self.stats.snapshot()
+        with self._lock:
+            info.update(path=self.path, entries=self._conn.execute('SELECT COUNT(*) FROM cache').fetchone()[0])
+        return info
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from google.api_core import exceptions as api_exceptions
+from dotenv import load_dotenv
+from prompt_budget import estimate_tokens
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# Local stand-in for Gemini, selected with LLM_BACKEND=fake. It answers from
+# recorded responses after a simulated latency, so the server can be load tested
+# without API keys, cost or network variance.
+FAKE_LLM_CORPUS = os.getenv('FAKE_LLM_CORPUS', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'corpus'))
+FAKE_LLM_LATENCY = float(os.getenv('FAKE_LLM_LATENCY', 0.5))
+# Latency varies uniformly by this fraction either way.
+FAKE_LLM_JITTER = float(os.getenv('FAKE_LLM_JITTER', 0.2))
+# Extra seconds per 1000 output tokens, to model generation speed.
+FAKE_LLM_SECONDS_PER_1K_TOKENS = float(os.getenv('FAKE_LLM_SECONDS_PER_1K_TOKENS', 0.0))
+FAKE_LLM_ERROR_RATE = float(os.getenv('FAKE_LLM_ERROR_RATE', 0.0))
+FAKE_LLM_SEED = int(os.getenv('FAKE_LLM_SEED', 0))
+
+# Listings are rendered with compact_json, so they sit on a single line.
+_JOB_LISTINGS_RE = re.compile(r"Job Listings:\s*\n\s*(\[.*\])")
+_STREAM_CHUNK_CHARS = 200
+
+_rng = random.Random(FAKE_LLM_SEED)
+_rng_lock = threading.Lock()
+_recordings = None
+_recordings_lock = threading.Lock()
+
+
+class FakeUsage:
+    def __init__(self, prompt, text):
+        self.prompt_token_count = estimate_tokens(prompt)
+        self.candidates_token_count = estimate_tokens(text)
+
+
+class FakeResponse:
+    def __init__(self, prompt, text):
+        self.text = text
+        self.usage_metadata = FakeUsage(prompt, text)
+
+
+class FakeStream:
+    # Iterates like a streamed GenerateContentResponse and carries usage after it.
+    def __init__(self, prompt, text, delay):
+        self.chunks = [FakeResponse(prompt, text[i:i + _STREAM_CHUNK_CHARS])
+                       for i in range(0, len(text), _STREAM_CHUNK_CHARS)] or [FakeResponse(prompt, '')]
+        self.delay = delay
+        self.usage_metadata = FakeUsage(prompt, text)
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            time.sleep(self.delay / len(self.chunks))
+            yield chunk
+
+
+class FakeModel:
+    """Mimics the parts of genai.GenerativeModel the server uses."""
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+
+    def generate_content(self, prompt, generation_config=None, request_options=None, stream=False):
+        text, delay, error = self._prepare(prompt, request_options)
+        if error is not None:
+            time.sleep(delay)
+            raise error
+        if stream:
+            return FakeStream(prompt, text, delay)
+        time.sleep(delay)
+        return FakeResponse(prompt, text)
+
+    async def generate_content_async(self, prompt, generation_config=None, request_options=None):
+        text, delay, error = self._prepare(prompt, request_options)
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return FakeResponse(prompt, text)
+
+    def _prepare(self, prompt, request_options):
+        # Returns (text, delay, error); callers wait out the delay themselves so
+        # the async path doesn't block the event loop, then raise error if set.
+        text = fake_response(prompt)
+        with _rng_lock:
+            delay = FAKE_LLM_LATENCY * (1 + _rng.uniform(-FAKE_LLM_JITTER, FAKE_LLM_JITTER))
+            failed = _rng.random() < FAKE_LLM_ERROR_RATE
+        delay += estimate_tokens(text) / 1000 * FAKE_LLM_SECONDS_PER_1K_TOKENS
+        timeout = (request_options or {}).get('timeout')
+        if failed:
+            return text, delay / 2, api_exceptions.ServiceUnavailable("Fake model error")
+        if timeout is not None and delay > timeout:
+            return text, timeout, api_exceptions.DeadlineExceeded("Fake model timed out")
+        return text, delay, None
+
+
+def fake_response(prompt):
+    """The recorded response for the kind of prompt the server built."""
+    recordings = _load_recordings()
+    if 'Job Listings:' in prompt:
+        return _job_assessments(prompt, recordings['job_scoring'])
+    if 'Job Description:' in prompt:
+        return recordings['screening']
+    if 'into a LaTeX format' in prompt:
+        return recordings['latex']
+    if 'Generate a professional resume' in prompt:
+        return recordings['markdown']
+    if 'detailed assessment' in prompt:
+        return recordings['analysis']
+    return 'OK'
+
+
+def _job_assessments(prompt, templates):
+    # One recorded assessment per listing in the prompt, so the count always matches.
+    match = _JOB_LISTINGS_RE.search(prompt)
+    try:
+        jobs = json.loads(match.group(1)) if match else []
+    except ValueError:
+        jobs = []
+    assessments = []
+    for index, job in enumerate(jobs):
+        assessment = dict(templates[index % len(templates)])
+        assessment.update(
+            companyName=job.get('companyName', ''),
+            role=job.get('role', ''),
+            tags=job.get('tags') or assessment['tags'],
+        )
+        assessments.append(assessment)
+    return json.dumps(assessments)
+
+
+def _load_recordings():
+    global _recordings
+    with _recordings_lock:
+        if _recordings is None:
+            recordings = {}
+            with open(os.path.join(FAKE_LLM_CORPUS, 'llm_responses.jsonl'), 'r', encoding='utf-8') as f:
+                for line in f:
+                    record = json.loads(line)
+                    if record['note'] != 'clean' and record['note'] != 'flat clean':
+                        continue
+                    if record['kind'] == 'job_scoring' and 'job_scoring' not in recordings:
+                        recordings['job_scoring'] = json.loads(record['text'])
+                    elif record['kind'] != 'job_scoring':
+                        recordings.setdefault(record['kind'], record['text'])
+            for kind, name in (('latex', 'resume.tex'), ('markdown', 'resume.md')):
+                with open(os.path.join(FAKE_LLM_CORPUS, name), 'r', encoding='utf-8') as f:
+                    recordings[kind] = f.read()
+            _recordings = recordings
+            logger.info("Fake LLM loaded recorded responses from %s", FAKE_LLM_CORPUS)
+        return _recordings
@@ -0,0 +1,44 @@
+"""gunicorn settings for the Flask app: gunicorn -c gunicorn.conf.py wsgi:app"""
+import logging
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('PORT', 5000)}")
+# One worker by default: the task queue, the job store and the snapshot
+# scheduler keep their state in process memory, so with several workers a task
+# polled on another worker is not found and POST /jobs updates only one corpus.
+# Raise it only once that state lives in a shared backend.
+workers = int(os.getenv('GUNICORN_WORKERS', 1))
+# Requests mostly wait on Gemini and Firebase Storage, so the worker runs a
+# thread pool; CPU work (PDF parsing) already goes to parser processes.
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 180))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+# Import the app once in the master and fork workers from it, so startup cost is
+# paid once. Threads, parser processes and SQLite connections are all created
+# on first use in the worker (or by the warmup in post_worker_init), never at
+# import, so none of them is carried across the fork.
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+# Recycle workers now and then to bound memory growth from the in-process caches.
+# A recycled worker drops its queued and finished async tasks.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 0))
+accesslog = os.getenv('GUNICORN_ACCESS_LOG') or None
+
+
+def when_ready(server):
+    server.log.info("Master ready, starting %s workers x %s threads", workers, threads)
+    if workers > 1:
+        server.log.warning("GUNICORN_WORKERS=%s: async tasks, the job store and recommendation snapshots "
+                           "are per worker and will disagree between them", workers)
+
+
+def post_worker_init(worker):
+    from warmup import WARMUP_ON_START, start_warmup
+    if WARMUP_ON_START:
+        start_warmup()
+    logging.getLogger(__name__).info("Worker %s started", worker.pid)
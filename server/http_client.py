@@ -0,0 +1,90 @@
+import logging
+import os
+import threading
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+from resilience import CircuitBreaker, time_remaining
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 16))
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 5))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 30))
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', 2))
+HTTP_BACKOFF_FACTOR = float(os.getenv('HTTP_BACKOFF_FACTOR', 0.3))
+HTTP_BREAKER_FAILURES = int(os.getenv('HTTP_BREAKER_FAILURES', 5))
+HTTP_BREAKER_RESET_SECONDS = float(os.getenv('HTTP_BREAKER_RESET_SECONDS', 30))
+
+
+def build_session():
+    retry = Retry(
+        total=HTTP_RETRIES,
+        connect=HTTP_RETRIES,
+        read=HTTP_RETRIES,
+        status=HTTP_RETRIES,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+# Shared keep-alive session; requests.Session is safe to share for plain GETs.
+session = build_session()
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(url):
+    host = urlparse(url).netloc
+    with _breakers_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = _breakers[host] = CircuitBreaker(
+                host, failure_threshold=HTTP_BREAKER_FAILURES, reset_timeout=HTTP_BREAKER_RESET_SECONDS
+            )
+        return breaker
+
+
+def breaker_states():
+    with _breakers_lock:
+        return {host: breaker.state for host, breaker in _breakers.items()}
+
+
+def get(url, **kwargs):
+    """GET through the shared session with timeouts bounded by the request deadline.
+
+    Connection errors, timeouts and 5xx responses (after retries) count against
+    the host's circuit breaker; while it is open, calls fail immediately.
+    """
+    read_timeout = time_remaining(HTTP_READ_TIMEOUT)
+    kwargs.setdefault('timeout', (min(HTTP_CONNECT_TIMEOUT, read_timeout), read_timeout))
+    breaker = breaker_for(url)
+    breaker.before_call()
+    try:
+        response = session.get(url, **kwargs)
+    except (requests.ConnectionError, requests.Timeout):
+        breaker.record_failure()
+        raise
+    except Exception:
+        # Invalid URLs, redirect loops: the request's fault, not the host's.
+        breaker.record_success()
+        raise
+    except BaseException:
+        breaker.release()
+        raise
+    if response.status_code >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    return response
@@ -0,0 +1,127 @@
+import re
+import zlib
+import numpy as np
+
+# Jobs and resumes are mapped into a fixed hashed feature space (word unigrams and
+# bigrams), so vectors can be computed without a fitted vocabulary and stay valid as
+# the job corpus changes. Only IDF depends on the corpus and is applied at query time.
+FEATURE_BITS = 18
+FEATURE_DIM = 1 << FEATURE_BITS
+
+# Fields of a job that describe the work itself; location, time etc. only add noise.
+JOB_TEXT_FIELDS = ('role', 'classification', 'tags', 'descriptions')
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+
+# Similarity thresholds used to label jobs when no LLM assessment is available.
+LITE_EXCELLENT_THRESHOLD = 0.25
+LITE_AVERAGE_THRESHOLD = 0.1
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _feature_index(term):
+    # crc32 rather than hash(): str hashes are salted per process, and feature
+    # indices must be stable across restarts for persisted indexes.
+    return zlib.crc32(term.encode('utf-8')) & (FEATURE_DIM - 1)
+
+
+def hashed_features(text):
+    """Return (indices, weights) of a sparse, sublinear-TF term vector for text."""
+    tokens = tokenize(text)
+    terms = tokens + [a + ' ' + b for a, b in zip(tokens, tokens[1:])]
+    if not terms:
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+    indices = np.fromiter((_feature_index(term) for term in terms), dtype=np.int32, count=len(terms))
+    indices, counts = np.unique(indices, return_counts=True)
+    return indices.astype(np.int32), (1.0 + np.log(counts)).astype(np.float32)
+
+
+def job_text(job):
+    parts = []
+    for field in JOB_TEXT_FIELDS:
+        value = job.get(field)
+        if isinstance(value, (list, tuple)):
+            parts.extend(str(item) for item in value)
+        elif value:
+            parts.append(str(value))
+    return '\n'.join(parts)
+
+
+def build_matrix(feature_rows):
+    """Stack (indices, weights) rows into CSR arrays (indptr, indices, data)."""
+    lengths = [len(indices) for indices, _ in feature_rows]
+    indptr = np.zeros(len(feature_rows) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    if feature_rows:
+        indices = np.concatenate([row[0] for row in feature_rows]).astype(np.int32)
+        data = np.concatenate([row[1] for row in feature_rows]).astype(np.float32)
+    else:
+        indices = np.zeros(0, dtype=np.int32)
+        data = np.zeros(0, dtype=np.float32)
+    return indptr, indices, data
+
+
+def document_frequencies(indices):
+    return np.bincount(indices, minlength=FEATURE_DIM).astype(np.int32)
+
+
+def cosine_scores(query, indptr, indices, data, df, n_docs):
+    """Cosine similarity of one TF-IDF query against every row of a CSR matrix.
+
+    All rows are scored with a handful of vectorized operations instead of a
+    Python loop over jobs.
+    """
+    n_rows = len(indptr) - 1
+    if n_rows == 0:
+        return np.zeros(0, dtype=np.float32)
+
+    idf = (np.log((1.0 + n_docs) / (1.0 + df)) + 1.0).astype(np.float32)
+    query_indices, query_weights = query
+    dense_query = np.zeros(FEATURE_DIM, dtype=np.float32)
+    dense_query[query_indices] = query_weights * idf[query_indices]
+    query_norm = np.linalg.norm(dense_query)
+    if query_norm == 0:
+        return np.zeros(n_rows, dtype=np.float32)
+
+    weighted = data * idf[indices]
+    rows = np.repeat(np.arange(n_rows), np.diff(indptr))
+    dots = np.bincount(rows, weights=weighted * dense_query[indices], minlength=n_rows)
+    norms = np.sqrt(np.bincount(rows, weights=weighted * weighted, minlength=n_rows))
+    norms[norms == 0] = 1.0
+    return (dots / (norms * query_norm)).astype(np.float32)
+
+
+def rank_jobs(resume_text, jobs, top_k=None):
+    """Return [(job_index, similarity)] ordered from most to least similar."""
+    feature_rows = [hashed_features(job_text(job)) for job in jobs]
+    indptr, indices, data = build_matrix(feature_rows)
+    scores = cosine_scores(hashed_features(resume_text), indptr, indices, data, document_frequencies(indices), len(jobs))
+    order = np.argsort(-scores, kind='stable')
+    if top_k is not None:
+        order = order[:top_k]
+    return [(int(i), round(float(scores[i]), 4)) for i in order]
+
+
+def lite_assessment(job, similarity):
+    if similarity >= LITE_EXCELLENT_THRESHOLD:
+        match_score = "Excellent"
+    elif similarity >= LITE_AVERAGE_THRESHOLD:
+        match_score = "Average"
+    else:
+        match_score = "Poor"
+    tags = job.get('tags') or []
+    assessment = {
+        "companyName": job.get('companyName', ''),
+        "role": job.get('role', ''),
+        "tags": tags if isinstance(tags, list) else [tags],
+        "matchReason": f"Ranked by text similarity between your resume and this job ({similarity:.2f}).",
+        "matchScore": match_score,
+        "detailedAnalysis": "",
+        "similarityScore": similarity,
+    }
+    if job.get('id'):
+        assessment["jobId"] = job['id']
+    return assessment
@@ -0,0 +1,309 @@
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+import numpy as np
+from dotenv import load_dotenv
+from cache import hash_key
+from job_ranking import build_matrix, cosine_scores, document_frequencies, hashed_features, job_text
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+JOB_STORE_DIR = os.getenv('JOB_STORE_DIR', os.path.join('.cache', 'jobs'))
+# jobs.log is folded into jobs.json once it has this many records (or more
+# records than there are jobs, whichever is larger).
+JOB_STORE_COMPACT_RECORDS = int(os.getenv('JOB_STORE_COMPACT_RECORDS', 1000))
+
+_INDEX_ARRAYS = ('indptr', 'indices', 'data', 'df')
+
+
+def job_id_for(job):
+    job_id = job.get('id') or job.get('jobId')
+    if job_id:
+        return str(job_id)
+    return hash_key(job.get('companyName', ''), job.get('role', ''), job.get('location', ''))[:16]
+
+
+def job_content_hash(job):
+    return hash_key(json.dumps(job, sort_keys=True, default=str))
+
+
+def matches_filters(job, filters):
+    for field, expected in (filters or {}).items():
+        value = job.get(field)
+        if isinstance(value, list):
+            wanted = expected if isinstance(expected, list) else [expected]
+            have = {str(item).lower() for item in value}
+            if not any(str(item).lower() in have for item in wanted):
+                return False
+        elif isinstance(expected, list):
+            if str(value).lower() not in {str(item).lower() for item in expected}:
+                return False
+        elif str(value).lower() != str(expected).lower():
+            return False
+    return True
+
+
+class JobStore:
+    """Server-side job corpus with a precomputed, memory-mapped feature index.
+
+    Jobs are vectorized once when they are upserted; only changed jobs are
+    re-tokenized. Each change is appended to jobs.log as it happens; a
+    background thread rebuilds the CSR index over all jobs from the stored
+    per-job features, writes it as .npy files that are memory-mapped on
+    startup, and now and then compacts the log into jobs.json. Requests never
+    wait on more than appending their own changes.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self._lock = threading.RLock()
+        # job_id -> {'job': dict, 'hash': str, 'version': int}, in insertion order
+        self._entries = {}
+        # job_id -> (indices, weights)
+        self._features = {}
+        self.version = 0
+        self._index = None
+        self._index_version = None
+        self._index_written = None
+        self._log_records = 0
+        self._flush_event = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._flusher = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, job_id):
+        entry = self._entries.get(job_id)
+        return dict(entry['job']) if entry else None
+
+    def jobs(self):
+        with self._lock:
+            return [dict(entry['job']) for entry in self._entries.values()]
+
+    def upsert(self, jobs):
+        ids = []
+        records = []
+        with self._lock:
+            for job in jobs:
+                job_id = job_id_for(job)
+                job = dict(job, id=job_id)
+                content_hash = job_content_hash(job)
+                ids.append(job_id)
+                entry = self._entries.get(job_id)
+                if entry and entry['hash'] == content_hash:
+                    continue
+                if not records:
+                    self.version += 1
+                entry = self._entries[job_id] = {'job': job, 'hash': content_hash, 'version': self.version}
+                self._features[job_id] = hashed_features(job_text(job))
+                records.append({'op': 'upsert', 'version': self.version, 'entry': entry})
+            if records:
+                self._index = None
+                self._append_log(records)
+        if records:
+            self._schedule_flush()
+        return ids
+
+    def delete(self, job_id):
+        with self._lock:
+            if job_id not in self._entries:
+                return False
+            del self._entries[job_id]
+            del self._features[job_id]
+            self.version += 1
+            self._index = None
+            self._append_log([{'op': 'delete', 'version': self.version, 'id': job_id}])
+        self._schedule_flush()
+        return True
+
+    def rank(self, resume_text, filters=None, top_k=None):
+        """Return [(job, similarity)] for stored jobs matching filters, most similar first."""
+        ids, entries, indptr, indices, data, df = self._current_index()
+        if not ids:
+            return []
+        scores = cosine_scores(hashed_features(resume_text), indptr, indices, data, df, len(ids))
+        if filters:
+            mask = np.array([matches_filters(entry['job'], filters) for entry in entries])
+            scores = np.where(mask, scores, -1.0)
+        order = [i for i in np.argsort(-scores, kind='stable') if scores[i] >= 0]
+        if top_k is not None:
+            order = order[:top_k]
+        return [(dict(entries[i]['job']), round(float(scores[i]), 4)) for i in order]
+
+    def _current_index(self):
+        # Normally already built by the background flush after a change; a query
+        # that gets here first builds it in memory and leaves the writing to it.
+        with self._lock:
+            if self._index is None:
+                ids = list(self._entries)
+                indptr, indices, data = build_matrix([self._features[job_id] for job_id in ids])
+                df = document_frequencies(indices)
+                self._index = (ids, [self._entries[job_id] for job_id in ids], indptr, indices, data, df)
+                self._index_version = self.version
+            return self._index
+
+    def _load(self):
+        jobs_path = os.path.join(self.directory, 'jobs.json')
+        try:
+            if os.path.exists(jobs_path):
+                with open(jobs_path, 'r', encoding='utf-8') as f:
+                    stored = json.load(f)
+                self.version = stored['version']
+                for entry in stored['jobs']:
+                    self._entries[entry['job']['id']] = entry
+            self._replay_log()
+        except (OSError, ValueError, KeyError) as e:
+            logger.error("Failed to load job store from %s: %s", self.directory, e)
+            self._entries.clear()
+            self.version = 0
+            return
+
+        ids = list(self._entries)
+        arrays = self._load_index()
+        if arrays and len(arrays['indptr']) == len(ids) + 1:
+            indptr = arrays['indptr']
+            for row, job_id in enumerate(ids):
+                start, end = indptr[row], indptr[row + 1]
+                self._features[job_id] = (arrays['indices'][start:end], arrays['data'][start:end])
+            self._index = (ids, [self._entries[job_id] for job_id in ids],
+                           indptr, arrays['indices'], arrays['data'], arrays['df'])
+            self._index_version = self._index_written = self.version
+        else:
+            logger.info("Job index missing or out of date, re-vectorizing stored jobs")
+            for job_id, entry in self._entries.items():
+                self._features[job_id] = hashed_features(job_text(entry['job']))
+        logger.info("Loaded %s jobs from job store (version %s)", len(ids), self.version)
+
+    def _replay_log(self):
+        # Records up to the version in jobs.json are already part of it. A torn
+        # last line from a crash mid-append is skipped.
+        if not os.path.exists(self._log_path()):
+            return
+        snapshot_version = self.version
+        with open(self._log_path(), 'r', encoding='utf-8') as f:
+            for line in f:
+                self._log_records += 1
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record['version'] <= snapshot_version:
+                    continue
+                if record['op'] == 'upsert':
+                    self._entries[record['entry']['job']['id']] = record['entry']
+                else:
+                    self._entries.pop(record['id'], None)
+                self.version = max(self.version, record['version'])
+
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.directory, 'index.json'), 'r', encoding='utf-8') as f:
+                index_version = json.load(f)['version']
+            if index_version != self.version:
+                return None
+            return {
+                name: np.load(self._index_path(name, index_version), mmap_mode='r')
+                for name in _INDEX_ARRAYS
+            }
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _index_path(self, name, version):
+        # Arrays are versioned by file name rather than overwritten in place, since
+        # the previous generation may still be memory-mapped.
+        return os.path.join(self.directory, f"{name}.{version}.npy")
+
+    def _log_path(self):
+        return os.path.join(self.directory, 'jobs.log')
+
+    def _append_log(self, records):
+        # Called with the lock held, so records land in version order.
+        if not self.directory:
+            return
+        with open(self._log_path(), 'a', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(record) + '\n' for record in records))
+        self._log_records += len(records)
+
+    def _schedule_flush(self):
+        if not self.directory:
+            return
+        with self._lock:
+            if self._flusher is None or not self._flusher.is_alive():
+                self._flusher = threading.Thread(target=self._run_flusher, name='job-store-flush', daemon=True)
+                self._flusher.start()
+        self._flush_event.set()
+
+    def _run_flusher(self):
+        while True:
+            self._flush_event.wait()
+            self._flush_event.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error("Failed to persist job store index: %s", e)
+
+    def flush(self):
+        """Build and write the index for the current version, compacting the log if it has grown."""
+        # One flush at a time: compaction relies on nothing else truncating the log.
+        with self._flush_lock:
+            self._current_index()
+            with self._lock:
+                index, version = self._index, self._index_version
+                threshold = max(JOB_STORE_COMPACT_RECORDS, len(self._entries))
+                compact = 0 < self._log_records >= threshold
+                if compact:
+                    # Entries are replaced on change, never mutated, so the list can be
+                    # serialized outside the lock.
+                    snapshot = {'version': self.version, 'jobs': list(self._entries.values())}
+                    log_offset = os.path.getsize(self._log_path())
+            if index is not None and version != self._index_written:
+                self._write_index(index, version)
+            if compact:
+                self._compact(snapshot, log_offset)
+
+    def _compact(self, snapshot, log_offset):
+        _atomic_write(os.path.join(self.directory, 'jobs.json'), json.dumps(snapshot).encode('utf-8'))
+        with self._lock:
+            # Keep only what was appended while the snapshot was being written.
+            with open(self._log_path(), 'rb') as f:
+                f.seek(log_offset)
+                tail = f.read()
+            _atomic_write(self._log_path(), tail)
+            self._log_records = tail.count(b'\n')
+        logger.info("Compacted job store log at version %s", snapshot['version'])
+
+    def _write_index(self, index, version):
+        _, _, indptr, indices, data, df = index
+        for name, array in zip(_INDEX_ARRAYS, (indptr, indices, data, df)):
+            buffer = io.BytesIO()
+            np.save(buffer, np.asarray(array))
+            _atomic_write(self._index_path(name, version), buffer.getvalue())
+        # index.json is written last so a crash mid-write leaves the old index in use.
+        _atomic_write(os.path.join(self.directory, 'index.json'), json.dumps({'version': version}).encode('utf-8'))
+        self._index_written = version
+
+        current = {os.path.basename(self._index_path(name, version)) for name in _INDEX_ARRAYS}
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.npy') and entry.name not in current:
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+
+def _atomic_write(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+job_store = JobStore(JOB_STORE_DIR)
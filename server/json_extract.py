@@ -0,0 +1,159 @@
+import json
+import re
+
+# Strings (possibly unterminated, when the output was cut off) and structural
+# characters; everything else is skipped by the scanner.
+_TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*("?)|[{}\[\],:]', re.DOTALL)
+
+_TYPES = {
+    'object': dict,
+    'array': list,
+    'string': str,
+    'number': (int, float),
+    'integer': int,
+    'boolean': bool,
+}
+
+
+class JSONExtractionError(ValueError):
+    pass
+
+
+class SchemaError(ValueError):
+    pass
+
+
+def strip_code_fences(text):
+    # Plain string searches; a lazy DOTALL regex is several times slower on long output.
+    opening = text.find('```')
+    if opening < 0:
+        return text
+    body_start = text.find('\n', opening)
+    if body_start < 0:
+        return text[opening + 3:]
+    closing = text.find('```', body_start)
+    return text[body_start + 1:closing] if closing >= 0 else text[body_start + 1:]
+
+
+def extract_json(text, schema=None, salvage=True):
+    """Return (value, truncated) for the first JSON object or array in model output.
+
+    Prose around the JSON and Markdown code fences are ignored. If the output was
+    cut off, the value is rebuilt from the elements that were complete (with
+    salvage=True) and truncated is True. With a schema, the value is validated;
+    for a truncated array, trailing items that don't match the item schema are
+    dropped, since they are usually partial objects.
+    """
+    if not text:
+        raise JSONExtractionError("Empty response")
+    body = strip_code_fences(text)
+    start = _find_start(body, schema)
+    if start < 0:
+        raise JSONExtractionError("No JSON object or array found")
+
+    # Fast path: well-formed output, which is the common case in JSON mode.
+    closer = '}' if body[start] == '{' else ']'
+    end = body.rfind(closer)
+    if end > start:
+        try:
+            value = json.loads(body[start:end + 1])
+            if schema is not None:
+                validate(value, schema)
+            return value, False
+        except ValueError:
+            pass
+
+    value, truncated = _scan(body, start, salvage)
+    if schema is not None:
+        if truncated and isinstance(value, list) and schema.get('items'):
+            value = _complete_items(value, schema['items'])
+        validate(value, schema)
+    return value, truncated
+
+
+def _find_start(body, schema):
+    expected = (schema or {}).get('type')
+    if expected == 'object':
+        return body.find('{')
+    if expected == 'array':
+        return body.find('[')
+    positions = [i for i in (body.find('{'), body.find('[')) if i >= 0]
+    return min(positions) if positions else -1
+
+
+def _scan(body, start, salvage):
+    # Tracks open containers so the text can be cut after the last complete value
+    # and closed off. Each frame is [opening char, expecting an object key];
+    # closers is the suffix that would close every open container.
+    stack = []
+    closers = ''
+    cuts = []
+    for match in _TOKEN_RE.finditer(body, start):
+        token = match.group(0)
+        if token[0] == '"':
+            if not match.group(1):
+                break
+            if stack and stack[-1][1]:
+                continue
+            cuts.append((match.end(), closers))
+        elif token == '{' or token == '[':
+            stack.append([token, token == '{'])
+            closers = ('}' if token == '{' else ']') + closers
+        elif token == '}' or token == ']':
+            if not stack:
+                break
+            stack.pop()
+            closers = closers[1:]
+            if not stack:
+                return json.loads(body[start:match.end()]), False
+            cuts.append((match.end(), closers))
+        elif token == ':':
+            if stack:
+                stack[-1][1] = False
+        elif stack:
+            # A comma: whatever preceded it (including numbers and literals, which
+            # the scanner doesn't tokenize) is a complete value.
+            cuts.append((match.start(), closers))
+            stack[-1][1] = stack[-1][0] == '{'
+
+    if not salvage:
+        raise JSONExtractionError("Truncated JSON")
+    for position, suffix in reversed(cuts[-8:]):
+        try:
+            return json.loads(body[start:position] + suffix), True
+        except ValueError:
+            continue
+    if stack and body[start] == '[':
+        return [], True
+    raise JSONExtractionError("Truncated JSON with no complete values")
+
+
+def _complete_items(items, item_schema):
+    while items:
+        try:
+            validate(items[-1], item_schema)
+            break
+        except SchemaError:
+            items = items[:-1]
+    return items
+
+
+def validate(value, schema, path='$'):
+    """Check value against a small subset of JSON Schema: type, required, properties, items, enum."""
+    expected = schema.get('type')
+    if expected:
+        kind = _TYPES[expected]
+        if not isinstance(value, kind) or (expected in ('number', 'integer') and isinstance(value, bool)):
+            raise SchemaError(f"{path}: expected {expected}, got {type(value).__name__}")
+    if 'enum' in schema and value not in schema['enum']:
+        raise SchemaError(f"{path}: {value!r} is not one of {schema['enum']}")
+    if isinstance(value, dict):
+        for name in schema.get('required', ()):
+            if name not in value:
+                raise SchemaError(f"{path}: missing required field '{name}'")
+        for name, field_schema in schema.get('properties', {}).items():
+            if name in value:
+                validate(value[name], field_schema, f"{path}.{name}")
+    elif isinstance(value, list) and 'items' in schema:
+        for index, item in enumerate(value):
+            validate(item, schema['items'], f"{path}[{index}]")
@@ -0,0 +1,233 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from dotenv import load_dotenv
+from llm_cache import completion_cache, completion_key, normalize_prompt
+from metrics import record_tokens
+from prompt_budget import check_budget, estimate_tokens
+from resilience import CircuitBreaker, run_in_context, time_remaining
+from single_flight import SingleFlight
+from timing import record, span
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = 'gemini-1.5-flash'
+# gemini | fake (recorded responses with simulated latency, see fake_llm.py)
+LLM_BACKEND = os.getenv('LLM_BACKEND', 'gemini').lower()
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', 60))
+LLM_BREAKER_FAILURES = int(os.getenv('LLM_BREAKER_FAILURES', 5))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv('LLM_BREAKER_RESET_SECONDS', 30))
+
+
+llm_breaker = CircuitBreaker('gemini', failure_threshold=LLM_BREAKER_FAILURES, reset_timeout=LLM_BREAKER_RESET_SECONDS)
+
+# Identical prompts issued concurrently (app retries, several screens loading the
+# same resume) share one Gemini call.
+llm_flight = SingleFlight('gemini')
+
+_models = {}
+_models_lock = threading.Lock()
+
+_genai = None
+_genai_lock = threading.Lock()
+
+# model name -> {'calls', 'input_tokens', 'output_tokens'}
+_usage = {}
+_usage_lock = threading.Lock()
+
+
+def configure_genai():
+    """Import and configure the Gemini SDK, once per process.
+
+    google.generativeai and grpc take most of the server's import time, so this
+    runs on the first model call (or during warmup) rather than at startup.
+    """
+    global _genai
+    with _genai_lock:
+        if _genai is None:
+            import google.generativeai as genai
+            genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+            _genai = genai
+        return _genai
+
+
+def safety_settings():
+    from google.generativeai.types import HarmCategory, HarmBlockThreshold
+    return {
+        HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
+        HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
+        HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
+        HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
+    }
+
+
+def get_model(model_name=DEFAULT_MODEL):
+    # GenerativeModel holds no per-request state, so one configured instance per
+    # model name is reused across calls and threads.
+    with _models_lock:
+        model = _models.get(model_name)
+        if model is None:
+            if LLM_BACKEND == 'fake':
+                from fake_llm import FakeModel
+                model = _models[model_name] = FakeModel(model_name)
+            else:
+                genai = configure_genai()
+                model = _models[model_name] = genai.GenerativeModel(model_name, safety_settings=safety_settings())
+        return model
+
+
+def is_upstream_failure(e):
+    # Bad requests are our fault, not a sign that Gemini is unhealthy.
+    from google.api_core import exceptions as api_exceptions
+    return not isinstance(e, api_exceptions.ClientError) or isinstance(e, api_exceptions.TooManyRequests)
+
+
+def _request_options():
+    return {'timeout': time_remaining(LLM_TIMEOUT)}
+
+
+def _prepare_prompt(prompt):
+    # Template indentation is dropped before sending; it only costs input tokens.
+    prompt = normalize_prompt(prompt)
+    check_budget(prompt)
+    return prompt
+
+
+def _record_usage(model_name, prompt, response, text):
+    # Token counts come from the response metadata; they are estimated locally
+    # when the response doesn't carry any.
+    usage = getattr(response, 'usage_metadata', None)
+    input_tokens = getattr(usage, 'prompt_token_count', 0) or estimate_tokens(prompt)
+    output_tokens = getattr(usage, 'candidates_token_count', 0) or estimate_tokens(text)
+    with _usage_lock:
+        totals = _usage.setdefault(model_name, {'calls': 0, 'input_tokens': 0, 'output_tokens': 0})
+        totals['calls'] += 1
+        totals['input_tokens'] += input_tokens
+        totals['output_tokens'] += output_tokens
+    record_tokens(input_tokens, output_tokens)
+    logger.debug("Gemini call to %s: %s input tokens, %s output tokens", model_name, input_tokens, output_tokens)
+
+
+def token_usage():
+    with _usage_lock:
+        return {model_name: dict(totals) for model_name, totals in _usage.items()}
+
+
+def generate_text(prompt, generation_config, model_name=DEFAULT_MODEL, validate=None):
+    # validate(text) should raise if the response is unusable, so that a malformed
+    # completion is never cached and a retry reaches the model again.
+    cached = completion_cache.get(model_name, prompt, generation_config)
+    if cached is not None:
+        logger.debug("Serving Gemini response from completion cache")
+        return cached
+
+    key = completion_key(model_name, prompt, generation_config)
+    return llm_flight.do(key, _generate_uncached, prompt, generation_config, model_name, validate)
+
+
+def _generate_uncached(prompt, generation_config, model_name, validate):
+    sent_prompt = _prepare_prompt(prompt)
+    with span('llm'):
+        response = llm_breaker.call(
+            get_model(model_name).generate_content,
+            sent_prompt,
+            generation_config=generation_config,
+            request_options=_request_options(),
+            is_failure=is_upstream_failure,
+        )
+    text = response.text
+    _record_usage(model_name, sent_prompt, response, text)
+    if validate is not None:
+        validate(text)
+    completion_cache.set(model_name, prompt, generation_config, text)
+    return text
+
+
+async def generate_text_async(prompt, generation_config, model_name=DEFAULT_MODEL, validate=None):
+    # Coroutine counterpart of generate_text for the asyncio server path; shares its
+    # completion cache, model registry and circuit breaker. The cache may be on
+    # SQLite or disk, so it is read and written from the executor.
+    cached = await asyncio.get_running_loop().run_in_executor(
+        None, run_in_context(completion_cache.get), model_name, prompt, generation_config
+    )
+    if cached is not None:
+        logger.debug("Serving Gemini response from completion cache")
+        return cached
+
+    key = completion_key(model_name, prompt, generation_config)
+    return await llm_flight.do_async(key, _generate_uncached_async, prompt, generation_config, model_name, validate)
+
+
+async def _generate_uncached_async(prompt, generation_config, model_name, validate):
+    sent_prompt = _prepare_prompt(prompt)
+    llm_breaker.before_call()
+    try:
+        with span('llm'):
+            response = await get_model(model_name).generate_content_async(
+                sent_prompt,
+                generation_config=generation_config,
+                request_options=_request_options(),
+            )
+    except Exception as e:
+        if is_upstream_failure(e):
+            llm_breaker.record_failure()
+        else:
+            llm_breaker.record_success()
+        raise
+    except BaseException:
+        llm_breaker.release()
+        raise
+    llm_breaker.record_success()
+
+    text = response.text
+    _record_usage(model_name, sent_prompt, response, text)
+    if validate is not None:
+        validate(text)
+    await asyncio.get_running_loop().run_in_executor(
+        None, completion_cache.set, model_name, prompt, generation_config, text
+    )
+    return text
+
+
+def stream_text(prompt, generation_config, model_name=DEFAULT_MODEL):
+    cached = completion_cache.get(model_name, prompt, generation_config)
+    if cached is not None:
+        logger.debug("Serving Gemini response from completion cache")
+        yield cached
+        return
+
+    sent_prompt = _prepare_prompt(prompt)
+    llm_breaker.before_call()
+    chunks = []
+    started = time.perf_counter()
+    try:
+        response = get_model(model_name).generate_content(
+            sent_prompt,
+            generation_config=generation_config,
+            request_options=_request_options(),
+            stream=True,
+        )
+        for chunk in response:
+            text = chunk.text
+            if text:
+                chunks.append(text)
+                yield text
+    except GeneratorExit:
+        # The client went away; that says nothing about Gemini's health.
+        llm_breaker.record_success()
+        raise
+    except Exception as e:
+        if is_upstream_failure(e):
+            llm_breaker.record_failure()
+        else:
+            llm_breaker.record_success()
+        raise
+    llm_breaker.record_success()
+    record('llm', time.perf_counter() - started)
+    text = ''.join(chunks)
+    _record_usage(model_name, sent_prompt, response, text)
+    # Only a stream that ran to completion is cached.
+    completion_cache.set(model_name, prompt, generation_config, text)
@@ -0,0 +1,73 @@
+import json
+import logging
+import os
+import re
+from dotenv import load_dotenv
+from cache import CacheStats, build_tiered_cache, hash_key
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# memory | sqlite | disk | none
+LLM_CACHE_BACKEND = os.getenv('LLM_CACHE_BACKEND', 'memory').lower()
+LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH', os.path.join('.cache', 'llm'))
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', 24 * 3600))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', 1024))
+# Sampling above this temperature is meant to vary between calls, so it is not cached
+# unless LLM_CACHE_HIGH_TEMPERATURE is set.
+LLM_CACHE_MAX_TEMPERATURE = float(os.getenv('LLM_CACHE_MAX_TEMPERATURE', 0.5))
+LLM_CACHE_HIGH_TEMPERATURE = os.getenv('LLM_CACHE_HIGH_TEMPERATURE', '').lower() in ('1', 'true', 'yes')
+
+
+def normalize_prompt(prompt):
+    # Prompts are built from indented triple-quoted f-strings; indentation and
+    # trailing whitespace carry no meaning for the model.
+    lines = [line.strip() for line in prompt.strip().splitlines()]
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines))
+
+
+def completion_key(model_name, prompt, generation_config):
+    config = json.dumps(generation_config or {}, sort_keys=True, default=str)
+    return hash_key(model_name, normalize_prompt(prompt), config)
+
+
+class CompletionCache:
+    def __init__(self, store, max_temperature=LLM_CACHE_MAX_TEMPERATURE, cache_high_temperature=LLM_CACHE_HIGH_TEMPERATURE):
+        self.store = store
+        self.max_temperature = max_temperature
+        self.cache_high_temperature = cache_high_temperature
+        self.stats = CacheStats()
+
+    def is_cacheable(self, generation_config):
+        if self.store is None:
+            return False
+        temperature = (generation_config or {}).get('temperature', 1.0)
+        return self.cache_high_temperature or temperature <= self.max_temperature
+
+    def get(self, model_name, prompt, generation_config):
+        if not self.is_cacheable(generation_config):
+            self.stats.incr('skipped')
+            return None
+        value = self.store.get(completion_key(model_name, prompt, generation_config))
+        self.stats.incr('hits' if value is not None else 'misses')
+        return value
+
+    def set(self, model_name, prompt, generation_config, text):
+        if self.is_cacheable(generation_config) and text:
+            self.store.set(completion_key(model_name, prompt, generation_config), text)
+
+    def info(self):
+        info = self.stats.snapshot()
+        info['backend'] = LLM_CACHE_BACKEND
+        if self.store is not None:
+            info['store'] = self.store.info()
+        return info
+
+
+def build_completion_cache(backend=LLM_CACHE_BACKEND):
+    return CompletionCache(build_tiered_cache(
+        backend, LLM_CACHE_PATH, LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES, 'LLM_CACHE_BACKEND'
+    ))
+
+
+completion_cache = build_completion_cache()
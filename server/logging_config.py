@@ -0,0 +1,19 @@
+import logging
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+# Request bodies, prompts, resume text and model responses are large and contain
+# personal data, so they are only logged when this is set and LOG_LEVEL=DEBUG.
+LOG_PAYLOADS = os.getenv('LOG_PAYLOADS', '').lower() in ('1', 'true', 'yes')
+
+
+def configure_logging():
+    logging.basicConfig(level=LOG_LEVEL)
+
+
+def log_payload(logger, message, *args):
+    if LOG_PAYLOADS and logger.isEnabledFor(logging.DEBUG):
+        logger.debug(message, *args)
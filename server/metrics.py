@@ -0,0 +1,117 @@
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from timing import percentile
+
+# Upper bounds of the request latency histogram buckets, in milliseconds.
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+# Most recent latencies kept per route for percentiles.
+METRICS_SAMPLES = int(os.getenv('METRICS_SAMPLES', 2048))
+
+# The request being served: {'route', 'started', 'finished'}. Worker threads
+# started through resilience.run_in_context see the same request, so the Gemini
+# calls they make are attributed to its route.
+_current_request = contextvars.ContextVar('current_request', default=None)
+
+_lock = threading.Lock()
+_routes = {}
+
+
+def _route_stats(route):
+    stats = _routes.get(route)
+    if stats is None:
+        stats = _routes[route] = {
+            'count': 0,
+            'client_errors': 0,
+            'errors': 0,
+            'in_flight': 0,
+            'total_seconds': 0.0,
+            'buckets': [0] * (len(LATENCY_BUCKETS_MS) + 1),
+            'samples': deque(maxlen=METRICS_SAMPLES),
+            'llm_calls': 0,
+            'input_tokens': 0,
+            'output_tokens': 0,
+        }
+    return stats
+
+
+def request_started(route):
+    _current_request.set({'route': route, 'started': time.perf_counter(), 'finished': False})
+    with _lock:
+        _route_stats(route)['in_flight'] += 1
+
+
+def request_finished(status_code):
+    """Record the current request's latency; only the first call per request counts."""
+    current = _current_request.get()
+    if current is None or current['finished']:
+        return
+    current['finished'] = True
+    seconds = time.perf_counter() - current['started']
+    milliseconds = seconds * 1000
+    bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if milliseconds <= bound), len(LATENCY_BUCKETS_MS))
+    with _lock:
+        stats = _route_stats(current['route'])
+        stats['in_flight'] -= 1
+        stats['count'] += 1
+        stats['total_seconds'] += seconds
+        stats['buckets'][bucket] += 1
+        stats['samples'].append(seconds)
+        if status_code >= 500:
+            stats['errors'] += 1
+        elif status_code >= 400:
+            stats['client_errors'] += 1
+
+
+def record_tokens(input_tokens, output_tokens):
+    current = _current_request.get()
+    route = current['route'] if current else 'background'
+    with _lock:
+        stats = _route_stats(route)
+        stats['llm_calls'] += 1
+        stats['input_tokens'] += input_tokens
+        stats['output_tokens'] += output_tokens
+
+
+def route_summary():
+    with _lock:
+        snapshot = {route: dict(stats, buckets=list(stats['buckets']), samples=list(stats['samples']))
+                    for route, stats in _routes.items()}
+    summary = {}
+    for route, stats in snapshot.items():
+        samples = stats['samples']
+        summary[route] = {
+            'count': stats['count'],
+            'errors': stats['errors'],
+            'client_errors': stats['client_errors'],
+            'in_flight': stats['in_flight'],
+            'mean_ms': round(stats['total_seconds'] / stats['count'] * 1000, 2) if stats['count'] else 0.0,
+            'p50_ms': round(percentile(samples, 0.5) * 1000, 2),
+            'p95_ms': round(percentile(samples, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(samples, 0.99) * 1000, 2),
+            # Requests at or under each bound in ms (cumulative, like a Prometheus histogram).
+            'histogram_ms': [{'le': bound, 'count': count} for bound, count
+                             in zip(LATENCY_BUCKETS_MS + ('+Inf',), _cumulative(stats['buckets']))],
+            'llm': {
+                'calls': stats['llm_calls'],
+                'input_tokens': stats['input_tokens'],
+                'output_tokens': stats['output_tokens'],
+            },
+        }
+    return summary
+
+
+def _cumulative(counts):
+    total = 0
+    cumulative = []
+    for count in counts:
+        total += count
+        cumulative.append(total)
+    return cumulative
+
+
+def reset():
+    with _lock:
+        _routes.clear()
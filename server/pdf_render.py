@@ -0,0 +1,468 @@
+import functools
+import io
+import logging
+import re
+from xml.sax.saxutils import escape
+
+logger = logging.getLogger(__name__)
+
+# Documents are parsed into a flat list of blocks, which both the LaTeX and the
+# Markdown front ends produce and render_blocks turns into flowables:
+#   ('title', markup) | ('heading', level, markup) | ('paragraph', markup)
+#   ('bullet', markup, depth, label) | ('rule',)
+# markup is reportlab's paragraph mini-language (<b>, <i>, <u>, <a>, <br/>), with
+# all document text XML-escaped.
+
+# Part of the export cache key; bump when rendering output changes so previously
+# cached PDFs are not served.
+RENDERER_VERSION = 1
+
+BULLET = '•'
+
+_LATEX_TOKEN_RE = re.compile(r"""
+    (?P<comment>%[^\n]*)
+  | (?P<command>\\(?:[a-zA-Z]+\*?|.))
+  | (?P<par>\n[ \t]*\n\s*)
+  | (?P<open>\{)
+  | (?P<close>\})
+  | (?P<lbracket>\[)
+  | (?P<rbracket>\])
+  | (?P<math>\$[^$]*\$)
+  | (?P<text>[^\\{}\[\]%$\n]+|\n|\$)
+""", re.VERBOSE)
+
+_SECTION_LEVELS = {'section': 1, 'subsection': 2, 'subsubsection': 3, 'paragraph': 3}
+_LIST_ENVIRONMENTS = ('itemize', 'enumerate', 'description')
+# Inline commands that wrap their argument in a tag.
+_INLINE_TAGS = {
+    'textbf': 'b', 'textit': 'i', 'emph': 'i', 'textsl': 'i', 'underline': 'u',
+    'texttt': 'font face="Courier"',
+}
+# Font switches inside a group, e.g. {\bf Name}.
+_SWITCH_TAGS = {'bf': 'b', 'bfseries': 'b', 'it': 'i', 'itshape': 'i', 'em': 'i', 'sl': 'i', 'slshape': 'i'}
+_ESCAPES = {
+    '&': '&', '%': '%', '$': '$', '#': '#', '_': '_', '{': '{', '}': '}',
+    ' ': ' ', ',': ' ', ';': ' ', '~': '~', '^': '^', '-': '', '/': '',
+}
+_SYMBOLS = {
+    'textbackslash': '\\', 'textbar': '|', 'textasciitilde': '~', 'ldots': '…',
+    'dots': '…', 'textbullet': BULLET, 'cdot': '·', 'quad': ' ', 'qquad': ' ',
+    'hfill': ' ', 'LaTeX': 'LaTeX', 'TeX': 'TeX', 'today': '', 'textendash': '–',
+    'textemdash': '—', 'newline': '<br/>', 'linebreak': '<br/>', '\\': '<br/>',
+}
+# Layout and preamble commands: their arguments are consumed and nothing is output.
+_SKIPPED = {
+    'documentclass', 'usepackage', 'geometry', 'pagestyle', 'thispagestyle', 'setlength',
+    'addtolength', 'newcommand', 'renewcommand', 'providecommand', 'newenvironment',
+    'renewenvironment', 'definecolor', 'hypersetup', 'titleformat', 'titlespacing',
+    'titlerule', 'setlist', 'vspace', 'hspace', 'vskip', 'hskip', 'label', 'input',
+    'include', 'raggedright', 'raggedleft', 'centering', 'noindent', 'small', 'footnotesize',
+    'scriptsize', 'tiny', 'normalsize', 'large', 'Large', 'LARGE', 'huge', 'Huge',
+    'smallskip', 'medskip', 'bigskip', 'newpage', 'clearpage', 'pagebreak', 'color',
+    'textcolor', 'fontsize', 'selectfont', 'linespread', 'setcounter', 'pagenumbering',
+    'urlstyle', 'makeatletter', 'makeatother', 'hline', 'cline', 'toprule', 'midrule',
+    'bottomrule', 'par', 'phantom', 'strut', 'nopagebreak', 'columnbreak', 'faIcon', 'rule',
+}
+# Commands whose first argument is consumed silently but whose second is text,
+# e.g. \textcolor{blue}{text}.
+_SKIP_FIRST = {'textcolor', 'colorbox'}
+
+
+@functools.lru_cache(maxsize=None)
+def get_styles():
+    """Paragraph styles, built once per process and shared by every render."""
+    # reportlab is imported on first render; parsing and ETags don't need it.
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+
+    base = getSampleStyleSheet()
+    body = ParagraphStyle('ResumeBody', parent=base['BodyText'], fontName='Helvetica',
+                          fontSize=10, leading=13, spaceAfter=4)
+    return {
+        'title': ParagraphStyle('ResumeTitle', parent=base['Title'], fontName='Helvetica-Bold',
+                                fontSize=20, leading=24, alignment=TA_CENTER, spaceAfter=6),
+        1: ParagraphStyle('ResumeHeading1', parent=base['Heading1'], fontName='Helvetica-Bold',
+                          fontSize=13, leading=16, spaceBefore=10, spaceAfter=4,
+                          textColor=colors.HexColor('#1f3a5f')),
+        2: ParagraphStyle('ResumeHeading2', parent=base['Heading2'], fontName='Helvetica-Bold',
+                          fontSize=11, leading=14, spaceBefore=6, spaceAfter=2),
+        3: ParagraphStyle('ResumeHeading3', parent=base['Heading3'], fontName='Helvetica-BoldOblique',
+                          fontSize=10, leading=13, spaceBefore=4, spaceAfter=2),
+        'body': body,
+        'bullets': [
+            ParagraphStyle(f'ResumeBullet{depth}', parent=body, leftIndent=14 * (depth + 1),
+                           bulletIndent=14 * depth + 2, spaceAfter=2)
+            for depth in range(4)
+        ],
+    }
+
+
+def render_blocks(blocks, output=None):
+    """Lay out blocks as a letter-size PDF written to output (a new BytesIO by default)."""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
+    from reportlab.platypus import HRFlowable, Paragraph, SimpleDocTemplate
+
+    output = output if output is not None else io.BytesIO()
+    styles = get_styles()
+    flowables = []
+    for block in blocks:
+        kind = block[0]
+        if kind == 'title':
+            flowables.append(Paragraph(block[1], styles['title']))
+        elif kind == 'heading':
+            flowables.append(Paragraph(block[2], styles[min(block[1], 3)]))
+            if block[1] == 1:
+                flowables.append(HRFlowable(width='100%', thickness=0.5, color=colors.grey, spaceAfter=4))
+        elif kind == 'bullet':
+            style = styles['bullets'][min(block[2], len(styles['bullets']) - 1)]
+            flowables.append(Paragraph(block[1], style, bulletText=block[3]))
+        elif kind == 'rule':
+            flowables.append(HRFlowable(width='100%', thickness=0.5, color=colors.grey, spaceBefore=4, spaceAfter=4))
+        else:
+            flowables.append(Paragraph(block[1], styles['body']))
+
+    doc = SimpleDocTemplate(output, pagesize=letter, leftMargin=0.75 * inch, rightMargin=0.75 * inch,
+                            topMargin=0.6 * inch, bottomMargin=0.6 * inch)
+    doc.build(flowables)
+    if hasattr(output, 'seek'):
+        output.seek(0)
+    return output
+
+
+def render_latex(content, output=None):
+    return render_blocks(parse_latex(content), output)
+
+
+def render_markdown(content, output=None):
+    return render_blocks(parse_markdown(content), output)
+
+
+def parse_latex(content):
+    return _LatexParser(content).parse()
+
+
+class _LatexParser:
+    """Single-pass parser for the LaTeX subset produced by convert_to_latex.
+
+    Handles the preamble, sectioning, list environments, inline formatting,
+    font switches in groups, escapes and tabular rows; unknown commands are
+    dropped while their braced arguments are kept as text.
+    """
+
+    def __init__(self, content):
+        self.tokens = [(match.lastgroup, match.group()) for match in _LATEX_TOKEN_RE.finditer(content)]
+        self.position = 0
+        self.blocks = []
+        self.inline = []
+        self.lists = []
+        self.bullet = None
+        self.title = None
+        self.author = None
+        self.in_tabular = False
+
+    def parse(self):
+        while self.position < len(self.tokens):
+            kind, value = self._next()
+            if kind == 'par':
+                self._flush()
+            elif kind == 'command':
+                self._block_command(value[1:])
+            else:
+                self.inline.append(self._inline_token(kind, value))
+        self._flush()
+        return self.blocks
+
+    def _next(self):
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def _peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def _flush(self):
+        markup = ''.join(self.inline).strip()
+        markup = re.sub(r'^(?:<br/>\s*)+|(?:\s*<br/>)+$', '', markup)
+        self.inline = []
+        if self.bullet is not None:
+            depth, label = self.bullet
+            self.blocks.append(('bullet', markup, depth, label))
+            self.bullet = None
+        elif markup:
+            self.blocks.append(('paragraph', markup))
+
+    def _block_command(self, name):
+        if name.rstrip('*') in _SECTION_LEVELS:
+            self._optional()
+            self._flush()
+            self.blocks.append(('heading', _SECTION_LEVELS[name.rstrip('*')], self._argument()))
+        elif name == 'item':
+            self._flush()
+            label = self._optional()
+            environment = self.lists[-1][0] if self.lists else 'itemize'
+            if environment == 'enumerate':
+                self.lists[-1][1] += 1
+                label = label or f"{self.lists[-1][1]}."
+            elif environment == 'description':
+                # Description terms are set in bold at the start of the item, unbulleted.
+                if label:
+                    self.inline.append(f"<b>{label}</b> ")
+                label = ''
+            self.bullet = (max(len(self.lists) - 1, 0), BULLET if label is None else label)
+        elif name == 'begin':
+            self._begin(self._raw_argument())
+        elif name == 'end':
+            self._end(self._raw_argument())
+        elif name in ('title', 'author'):
+            setattr(self, name, self._argument())
+        elif name == 'maketitle':
+            self._flush()
+            if self.title:
+                self.blocks.append(('title', self.title))
+            if self.author:
+                self.blocks.append(('paragraph', self.author))
+        else:
+            self.inline.append(self._inline_command(name))
+
+    def _begin(self, environment):
+        if environment == 'document':
+            # Anything before \begin{document} is preamble.
+            self.blocks = []
+            self.inline = []
+        elif environment in _LIST_ENVIRONMENTS:
+            self._flush()
+            self.lists.append([environment, 0])
+        elif environment.startswith('tabular'):
+            self._optional()
+            self._raw_argument()
+            self._flush()
+            self.in_tabular = True
+        elif environment in ('minipage',):
+            self._optional()
+            self._raw_argument()
+
+    def _end(self, environment):
+        if environment == 'document':
+            self.position = len(self.tokens)
+        elif environment in _LIST_ENVIRONMENTS:
+            self._flush()
+            if self.lists:
+                self.lists.pop()
+        elif environment.startswith('tabular'):
+            self._flush()
+            self.in_tabular = False
+
+    def _inline_token(self, kind, value):
+        if kind == 'text':
+            if value == '\n':
+                return ' '
+            if self.in_tabular and '&' in value:
+                return ' | '.join(_text(part) for part in value.split('&'))
+            return _text(value)
+        if kind == 'math':
+            return escape(value.strip('$').replace('\\', ''))
+        if kind == 'open':
+            return self._group()
+        if kind in ('lbracket', 'rbracket'):
+            return value
+        return ''
+
+    def _inline_command(self, name):
+        if len(name) == 1 and name in _ESCAPES:
+            return escape(_ESCAPES[name])
+        if name in ('\\', 'newline'):
+            # Line breaks take an optional spacing argument, \\[2pt], which may
+            # follow a space as in LaTeX.
+            kind, value = self._peek()
+            if kind == 'text' and value.strip(' \t') == '' and self.position + 1 < len(self.tokens) \
+                    and self.tokens[self.position + 1][0] == 'lbracket':
+                self.position += 1
+            self._optional()
+            return _SYMBOLS[name]
+        if name in _SYMBOLS:
+            return _SYMBOLS[name]
+        if name in _INLINE_TAGS:
+            tag = _INLINE_TAGS[name]
+            return f"<{tag}>{self._argument()}</{tag.split()[0]}>"
+        if name == 'href':
+            url = self._raw_argument()
+            return f'<a href="{escape(url, {chr(34): "&quot;"})}" color="blue">{self._argument()}</a>'
+        if name == 'url':
+            url = self._raw_argument()
+            return f'<a href="{escape(url, {chr(34): "&quot;"})}" color="blue">{escape(url)}</a>'
+        if name in _SKIP_FIRST:
+            self._raw_argument()
+            return self._argument()
+        if name in _SKIPPED or name.rstrip('*') in _SKIPPED:
+            self._skip_arguments()
+            return ''
+        # Unknown command (\name{...}, \textsc{...}, custom macros): keep argument text.
+        self._optional()
+        parts = []
+        while self._peek()[0] == 'open':
+            self.position += 1
+            parts.append(self._group())
+        return ' '.join(part for part in parts if part)
+
+    def _group(self):
+        # Called after an opening brace; returns the group's markup.
+        parts = []
+        closing = []
+        while self.position < len(self.tokens):
+            kind, value = self._next()
+            if kind == 'close':
+                break
+            if kind == 'command':
+                name = value[1:]
+                if name in _SWITCH_TAGS:
+                    parts.append(f"<{_SWITCH_TAGS[name]}>")
+                    closing.append(f"</{_SWITCH_TAGS[name]}>")
+                else:
+                    parts.append(self._inline_command(name))
+            elif kind == 'par':
+                parts.append('<br/>')
+            else:
+                parts.append(self._inline_token(kind, value))
+        return ''.join(parts) + ''.join(reversed(closing))
+
+    def _argument(self):
+        self._skip_space()
+        if self._peek()[0] != 'open':
+            return ''
+        self.position += 1
+        return self._group().strip()
+
+    def _raw_argument(self):
+        # Verbatim text of a braced argument (environment names, URLs).
+        self._skip_space()
+        if self._peek()[0] != 'open':
+            return ''
+        self.position += 1
+        depth = 1
+        parts = []
+        while self.position < len(self.tokens):
+            kind, value = self._next()
+            if kind == 'open':
+                depth += 1
+            elif kind == 'close':
+                depth -= 1
+                if depth == 0:
+                    break
+            parts.append(value[1:] if kind == 'command' and len(value) == 2 and not value[1].isalpha() else value)
+        return ''.join(parts).strip()
+
+    def _optional(self):
+        if self._peek()[0] != 'lbracket':
+            return None
+        self.position += 1
+        parts = []
+        while self.position < len(self.tokens):
+            kind, value = self._next()
+            if kind == 'rbracket':
+                break
+            if kind == 'command':
+                parts.append(self._inline_command(value[1:]))
+            else:
+                parts.append(self._inline_token(kind, value))
+        return ''.join(parts).strip()
+
+    def _skip_arguments(self):
+        while True:
+            kind = self._peek()[0]
+            if kind == 'lbracket':
+                self._optional()
+            elif kind == 'open':
+                self._raw_argument()
+            else:
+                return
+
+    def _skip_space(self):
+        while self._peek()[0] == 'text' and not self._peek()[1].strip():
+            self.position += 1
+
+
+def _text(value):
+    value = value.replace('---', '—').replace('--', '–')
+    value = value.replace('``', '“').replace("''", '”').replace('~', ' ')
+    return escape(value)
+
+
+_MD_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*$")
+_MD_BULLET_RE = re.compile(r"^(\s*)(?:[-*+]|(\d+)[.)])\s+(.*)$")
+_MD_RULE_RE = re.compile(r"^\s*(?:-{3,}|\*{3,}|_{3,})\s*$")
+_MD_INLINE_RE = re.compile(
+    r"\*\*(?P<bold>.+?)\*\*|__(?P<bold2>.+?)__"
+    r"|(?<![\w*])\*(?P<italic>[^*\n]+?)\*(?!\w)|(?<![\w_])_(?P<italic2>[^_\n]+?)_(?!\w)"
+    r"|`(?P<code>[^`\n]+)`|\[(?P<label>[^\]\n]+)\]\((?P<url>[^)\s]+)\)"
+)
+
+
+def parse_markdown(content):
+    """Blocks for the Markdown produced by generate_resume: headings, lists, rules,
+    paragraphs and bold/italic/code/link inline markup."""
+    blocks = []
+    paragraph = []
+
+    def flush():
+        if paragraph:
+            blocks.append(('paragraph', markdown_inline(' '.join(paragraph))))
+            paragraph.clear()
+
+    for line in content.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            flush()
+            continue
+        heading = _MD_HEADING_RE.match(stripped)
+        if heading:
+            flush()
+            level = len(heading.group(1))
+            if level == 1 and not blocks:
+                blocks.append(('title', markdown_inline(heading.group(2))))
+            else:
+                blocks.append(('heading', max(level - 1, 1), markdown_inline(heading.group(2))))
+            continue
+        if _MD_RULE_RE.match(line):
+            flush()
+            blocks.append(('rule',))
+            continue
+        bullet = _MD_BULLET_RE.match(line)
+        if bullet:
+            flush()
+            depth = len(bullet.group(1).expandtabs(4)) // 2
+            label = f"{bullet.group(2)}." if bullet.group(2) else BULLET
+            blocks.append(('bullet', markdown_inline(bullet.group(3)), depth, label))
+            continue
+        if blocks and blocks[-1][0] == 'bullet' and not paragraph and line[:1].isspace():
+            # Continuation line of a list item.
+            kind, markup, depth, label = blocks[-1]
+            blocks[-1] = (kind, f"{markup} {markdown_inline(stripped)}", depth, label)
+            continue
+        paragraph.append(stripped)
+    flush()
+    return blocks
+
+
+def markdown_inline(text):
+    def replace(match):
+        groups = match.groupdict()
+        if groups['bold'] or groups['bold2']:
+            return f"<b>{markdown_inline(groups['bold'] or groups['bold2'])}</b>"
+        if groups['italic'] or groups['italic2']:
+            return f"<i>{markdown_inline(groups['italic'] or groups['italic2'])}</i>"
+        if groups['code']:
+            return f'<font face="Courier">{escape(groups["code"])}</font>'
+        url = escape(groups['url'], {'"': '&quot;'})
+        return f'<a href="{url}" color="blue">{markdown_inline(groups["label"])}</a>'
+
+    parts = []
+    last = 0
+    for match in _MD_INLINE_RE.finditer(text):
+        parts.append(escape(text[last:match.start()]))
+        parts.append(replace(match))
+        last = match.end()
+    parts.append(escape(text[last:]))
+    return ''.join(parts)
@@ -0,0 +1,456 @@
+import io
+import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import threading
+import time
+from collections import namedtuple
+from dotenv import load_dotenv
+import http_client
+from cache import CacheStats, DiskCache, LRUCache, TieredCache, hash_key
+from resilience import time_remaining
+from single_flight import SingleFlight
+from logging_config import log_payload
+from timing import timed
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# A URL seen within this window is served from cache without touching the network.
+# After it, the cached ETag/Last-Modified is used to revalidate with a conditional GET.
+PDF_CACHE_FRESH_SECONDS = int(os.getenv('PDF_CACHE_FRESH_SECONDS', 300))
+PDF_CACHE_TTL = int(os.getenv('PDF_CACHE_TTL', 24 * 3600))
+PDF_CACHE_MAX_ENTRIES = int(os.getenv('PDF_CACHE_MAX_ENTRIES', 512))
+PDF_CACHE_MAX_BYTES = int(os.getenv('PDF_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+PDF_CACHE_DIR = os.getenv('PDF_CACHE_DIR')
+PDF_CACHE_DISK_MAX_BYTES = int(os.getenv('PDF_CACHE_DISK_MAX_BYTES', 512 * 1024 * 1024))
+PDF_PARSE_WORKERS = int(os.getenv('PDF_PARSE_WORKERS', os.cpu_count() or 2))
+# Limits so that one oversized or pathological upload can't tie up a worker.
+PDF_MAX_BYTES = int(os.getenv('PDF_MAX_BYTES', 20 * 1024 * 1024))
+PDF_MAX_PAGES = int(os.getenv('PDF_MAX_PAGES', 30))
+PDF_MAX_SECONDS = float(os.getenv('PDF_MAX_SECONDS', 20))
+# Documents with at least this many pages are split across the process pool.
+PDF_PARALLEL_MIN_PAGES = int(os.getenv('PDF_PARALLEL_MIN_PAGES', 16))
+
+Download = namedtuple('Download', 'status_code content headers')
+# truncated: fewer pages than the document has (PDF_MAX_PAGES included);
+# partial: pages within the limit were lost to the deadline, so don't cache it.
+PdfExtraction = namedtuple('PdfExtraction', 'text page_count pages_extracted page_seconds truncated partial')
+
+
+class PdfTooLargeError(ValueError):
+    pass
+
+
+class PdfParseTimeout(TimeoutError):
+    pass
+
+
+def _build_cache(name):
+    memory = LRUCache(max_entries=PDF_CACHE_MAX_ENTRIES, max_bytes=PDF_CACHE_MAX_BYTES, ttl=PDF_CACHE_TTL)
+    disk = None
+    if PDF_CACHE_DIR:
+        disk = DiskCache(os.path.join(PDF_CACHE_DIR, name), max_bytes=PDF_CACHE_DISK_MAX_BYTES, ttl=PDF_CACHE_TTL)
+    return TieredCache(memory, disk)
+
+
+# Extracted text is keyed by the SHA-256 of the PDF bytes, so the same file behind
+# different URLs (e.g. re-issued download tokens) is parsed only once.
+_text_cache = _build_cache('text')
+# URL -> {content_hash, etag, last_modified, checked_at}
+_url_cache = _build_cache('urls')
+_stats = CacheStats()
+# Concurrent requests for the same URL share one download and parse.
+pdf_flight = SingleFlight('pdf')
+
+_worker_pool = None
+_worker_pool_lock = threading.Lock()
+
+
+def extract_text_from_pdf(pdf_url, parse=None):
+    # parse(content) -> PdfExtraction; defaults to parse_pdf.
+    try:
+        return pdf_flight.do(pdf_url, _extract_cached, pdf_url, parse or parse_pdf)
+    except Exception as e:
+        logger.error("Error extracting text from PDF: %s", e)
+        return None
+
+
+def extraction_cache_info():
+    info = _stats.snapshot()
+    info['text_cache'] = _text_cache.info()
+    info['url_cache'] = _url_cache.info()
+    info['coalescing'] = pdf_flight.info()
+    return info
+
+
+def _extract_cached(pdf_url, parse):
+    text, meta = cached_text_for_url(pdf_url)
+    if text is not None:
+        return text
+
+    response = _download(pdf_url, conditional_headers(meta))
+    if response.status_code == 304:
+        text = revalidated_text(pdf_url, meta)
+        if text is not None:
+            return text
+        # The text was evicted while the URL entry survived; fetch the body again.
+        response = _download(pdf_url, {})
+
+    content_hash = hash_key(response.content)
+    text = cached_text_for_content(content_hash)
+    if text is not None:
+        remember_extraction(pdf_url, content_hash, response.headers, text)
+        return text
+    extraction = parse(response.content)
+    if not extraction.partial:
+        remember_extraction(pdf_url, content_hash, response.headers, extraction.text)
+    return extraction.text
+
+
+# The cache steps below are shared with the asyncio download path in async_pipeline.
+
+def cached_text_for_url(pdf_url):
+    """Return (text, meta): text if the URL was seen within the freshness window."""
+    meta = _url_cache.get('url:' + pdf_url)
+    if meta and time.time() - meta['checked_at'] < PDF_CACHE_FRESH_SECONDS:
+        text = _text_cache.get(meta['content_hash'])
+        if text is not None:
+            _stats.incr('hits')
+            return text, meta
+    return None, meta
+
+
+def conditional_headers(meta):
+    headers = {}
+    if meta:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+    return headers
+
+
+def revalidated_text(pdf_url, meta):
+    # Called on a 304 response to a conditional GET.
+    if not meta:
+        return None
+    text = _text_cache.get(meta['content_hash'])
+    if text is not None:
+        meta['checked_at'] = time.time()
+        _url_cache.set('url:' + pdf_url, meta)
+        _stats.incr('hits')
+        _stats.incr('revalidated')
+    return text
+
+
+def cached_text_for_content(content_hash):
+    text = _text_cache.get(content_hash)
+    if text is None:
+        _stats.incr('misses')
+    else:
+        _stats.incr('hits')
+        _stats.incr('content_hits')
+    return text
+
+
+def remember_extraction(pdf_url, content_hash, headers, text):
+    _text_cache.set(content_hash, text)
+    _url_cache.set('url:' + pdf_url, {
+        'content_hash': content_hash,
+        'etag': headers.get('ETag'),
+        'last_modified': headers.get('Last-Modified'),
+        'checked_at': time.time(),
+    })
+    log_payload(logger, "Extracted PDF text (first 1000 chars): %s", text[:1000])
+
+
+@timed('download')
+def _download(pdf_url, headers):
+    # Stream the body so a huge or endless response is cut off at PDF_MAX_BYTES
+    # instead of being buffered whole.
+    response = http_client.get(pdf_url, headers=headers, stream=True)
+    with response:
+        if response.status_code == 304:
+            return Download(response.status_code, b'', response.headers)
+        response.raise_for_status()
+        declared = response.headers.get('Content-Length')
+        if declared and declared.isdigit() and int(declared) > PDF_MAX_BYTES:
+            raise PdfTooLargeError(f"PDF is {declared} bytes, the limit is {PDF_MAX_BYTES}")
+        chunks = []
+        received = 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            # The read timeout applies per socket read; also stop a slow trickle at the deadline.
+            time_remaining()
+            received += len(chunk)
+            if received > PDF_MAX_BYTES:
+                raise PdfTooLargeError(f"PDF exceeds the {PDF_MAX_BYTES} byte limit")
+            chunks.append(chunk)
+        return Download(response.status_code, b''.join(chunks), response.headers)
+
+
+@timed('pdf_parse')
+def parse_pdf(content):
+    return extract_pdf(content)
+
+
+def extract_pdf(content, parallel=True):
+    """Extract text page by page within the PDF_MAX_PAGES / PDF_MAX_SECONDS limits.
+
+    Parsing runs in parser worker processes rather than the calling thread, so
+    the wall-time limit holds even for a single pathological page: a worker
+    still busy at the deadline is killed and replaced, and the pages it had sent
+    back are kept. Long documents are split into page ranges across idle workers.
+    Daemonic processes (hypercorn's workers) can't start parser processes and
+    parse in the calling thread instead. A result missing pages within the page
+    limit is marked partial and is not cached.
+    """
+    started = time.time()
+    deadline = started + PDF_MAX_SECONDS
+    if _in_daemon_process():
+        pages, page_count = _extract_in_thread(content, deadline)
+    else:
+        pages, page_count = _extract_in_workers(content, parallel, deadline)
+
+    pages.sort()
+    page_seconds = [seconds for _, _, seconds in pages]
+    truncated = len(pages) < page_count
+    partial = len(pages) < min(page_count, PDF_MAX_PAGES)
+    result = PdfExtraction(
+        text='\n'.join(text for _, text, _ in pages),
+        page_count=page_count,
+        pages_extracted=len(pages),
+        page_seconds=page_seconds,
+        truncated=truncated,
+        partial=partial,
+    )
+
+    _stats.incr('pages_extracted', len(pages))
+    if truncated:
+        _stats.incr('truncated')
+    if partial:
+        _stats.incr('partial')
+    logger.debug(
+        "Extracted %s/%s pages in %.3fs (slowest page %.3fs)",
+        len(pages), page_count, time.time() - started, max(page_seconds, default=0)
+    )
+    return result
+
+
+def _in_daemon_process():
+    # Daemonic processes, such as hypercorn's workers, may not start children.
+    return multiprocessing.current_process().daemon
+
+
+def _extract_in_thread(content, deadline):
+    # Without parser processes the deadline can only be checked between pages.
+    import PyPDF2
+
+    try:
+        reader = PyPDF2.PdfReader(io.BytesIO(content))
+        page_count = len(reader.pages)
+    except Exception as e:
+        raise ValueError(f"Unable to read PDF: {type(e).__name__}: {e}")
+    pages = []
+    for index in range(min(page_count, PDF_MAX_PAGES)):
+        if time.time() >= deadline:
+            logger.warning("PDF extraction exceeded %ss, stopped after %s pages", PDF_MAX_SECONDS, len(pages))
+            break
+        page_started = time.time()
+        text = reader.pages[index].extract_text() or ""
+        pages.append((index, text, round(time.time() - page_started, 4)))
+    return pages, page_count
+
+
+def _extract_in_workers(content, parallel, deadline):
+    pool = _get_worker_pool()
+    worker = pool.acquire(deadline - time.time())
+    if worker is None:
+        raise PdfParseTimeout(f"No PDF parser worker became free within {PDF_MAX_SECONDS}s")
+    # worker -> whether it can be reused; False means it is killed on release.
+    workers = {worker: True}
+    try:
+        try:
+            page_count = _page_count(worker, content, deadline)
+        except PdfParseTimeout:
+            workers[worker] = False
+            raise
+        page_limit = min(page_count, PDF_MAX_PAGES)
+
+        if parallel and page_limit >= PDF_PARALLEL_MIN_PAGES:
+            # Only workers that are idle right now; waiting for more could
+            # deadlock requests that each hold one.
+            while len(workers) < min(PDF_PARSE_WORKERS, page_limit):
+                extra = pool.acquire(0)
+                if extra is None:
+                    break
+                workers[extra] = True
+        step = -(-page_limit // len(workers)) if page_limit else 1
+        running = {}
+        for (assigned, _), start in zip(list(workers.items()), range(0, page_limit, step)):
+            # The first worker already has the document open from counting pages.
+            assigned.conn.send(('pages', None if assigned is worker else content, start, min(start + step, page_limit)))
+            running[assigned.conn] = assigned
+        pages, failed, error = _collect_pages(running, deadline)
+        for failed_worker in failed:
+            workers[failed_worker] = False
+    finally:
+        for used, healthy in workers.items():
+            pool.release(used, healthy)
+    if error is not None:
+        raise ValueError(f"PDF extraction failed: {error}")
+    if failed:
+        logger.warning("PDF extraction exceeded %ss, killed %s parser worker(s)", PDF_MAX_SECONDS, len(failed))
+    return pages, page_count
+
+
+def _page_count(worker, content, deadline):
+    worker.conn.send(('open', content))
+    if not worker.conn.poll(max(0.0, deadline - time.time())):
+        raise PdfParseTimeout(f"Opening the PDF took longer than {PDF_MAX_SECONDS}s")
+    try:
+        kind, value = worker.conn.recv()
+    except (EOFError, OSError):
+        raise PdfParseTimeout("PDF parser worker exited while opening the document")
+    if kind == 'error':
+        raise ValueError(f"Unable to read PDF: {value}")
+    return value
+
+
+def _collect_pages(running, deadline):
+    """Gather streamed pages until every worker is done or the deadline passes.
+
+    Returns (pages, workers to kill, error message or None).
+    """
+    pages = []
+    failed = []
+    error = None
+    while running:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            break
+        for conn in multiprocessing.connection.wait(list(running), timeout=remaining):
+            try:
+                kind, value = conn.recv()
+            except (EOFError, OSError):
+                failed.append(running.pop(conn))
+                continue
+            if kind == 'page':
+                pages.append(value)
+            else:
+                running.pop(conn)
+                if kind == 'error':
+                    error = value
+    failed.extend(running.values())
+    return pages, failed, error
+
+
+def _parser_worker(conn):
+    # Parser process main loop: 'open' reads a document and reports its page
+    # count; 'pages' streams (index, text, seconds) for a page range, re-opening
+    # the document when it is sent along.
+    import PyPDF2
+
+    reader = None
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        try:
+            if message[0] == 'open':
+                reader = PyPDF2.PdfReader(io.BytesIO(message[1]))
+                conn.send(('count', len(reader.pages)))
+                continue
+            _, content, start, end = message
+            if content is not None:
+                reader = PyPDF2.PdfReader(io.BytesIO(content))
+            for index in range(start, end):
+                page_started = time.time()
+                text = reader.pages[index].extract_text() or ""
+                conn.send(('page', (index, text, round(time.time() - page_started, 4))))
+            reader = None
+            conn.send(('done', None))
+        except Exception as e:
+            reader = None
+            conn.send(('error', f"{type(e).__name__}: {e}"))
+
+
+class _ParserProcess:
+    def __init__(self):
+        self.conn, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_parser_worker, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(1)
+        self.conn.close()
+
+
+class ParserPool:
+    """Up to `size` parser processes, each handling one document at a time.
+
+    Unlike a ProcessPoolExecutor, a single process can be killed (when it
+    overruns the deadline) without affecting documents running in the others.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.pid = os.getpid()
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout):
+        """An idle (or new) process, or None if none is free within timeout seconds."""
+        if not self._slots.acquire(timeout=max(0.0, timeout)):
+            return None
+        with self._lock:
+            worker = self._idle.pop() if self._idle else None
+        try:
+            if worker is not None and not worker.process.is_alive():
+                worker.kill()
+                worker = None
+            return worker or _ParserProcess()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, worker, healthy=True):
+        if healthy:
+            with self._lock:
+                self._idle.append(worker)
+        else:
+            worker.kill()
+            _stats.incr('workers_killed')
+        self._slots.release()
+
+
+def _get_worker_pool():
+    global _worker_pool
+    with _worker_pool_lock:
+        # A pool inherited through fork (e.g. gunicorn's preload) belongs to the parent.
+        if _worker_pool is None or _worker_pool.pid != os.getpid():
+            _worker_pool = ParserPool(PDF_PARSE_WORKERS)
+        return _worker_pool
+
+
+def warm_parser_pool():
+    """Start one parser process ahead of the first upload."""
+    if _in_daemon_process():
+        import PyPDF2  # noqa: F401
+        return
+    pool = _get_worker_pool()
+    worker = pool.acquire(PDF_MAX_SECONDS)
+    if worker is not None:
+        pool.release(worker)
+
+
+@timed('pdf_parse')
+def parse_pdf_in_process_pool(content):
+    # Bulk work already runs many documents at once, so each one is parsed whole
+    # by a single worker process rather than split by page.
+    return extract_pdf(content, parallel=False)
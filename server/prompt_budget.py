@@ -0,0 +1,153 @@
+import json
+import logging
+import os
+import re
+from dotenv import load_dotenv
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# Budgets are in estimated tokens (see estimate_tokens).
+PROMPT_MAX_INPUT_TOKENS = int(os.getenv('PROMPT_MAX_INPUT_TOKENS', 32000))
+PROMPT_RESUME_MAX_TOKENS = int(os.getenv('PROMPT_RESUME_MAX_TOKENS', 6000))
+PROMPT_JOB_MAX_TOKENS = int(os.getenv('PROMPT_JOB_MAX_TOKENS', 400))
+PROMPT_JOBS_CHUNK_MAX_TOKENS = int(os.getenv('PROMPT_JOBS_CHUNK_MAX_TOKENS', 12000))
+
+# Job fields the model needs to judge fit (location and working time included);
+# ids, timestamps, applicant lists etc. only cost tokens.
+PROMPT_JOB_FIELDS = (
+    'companyName', 'role', 'classification', 'location', 'time', 'tags', 'descriptions',
+    'requirements', 'qualifications', 'responsibilities',
+)
+
+# Gemini averages about four characters per token on English text.
+CHARS_PER_TOKEN = 4
+
+TRUNCATION_MARKER = '[...]'
+
+_LIGATURES = str.maketrans({
+    '\ufb00': 'ff', '\ufb01': 'fi', '\ufb02': 'fl', '\ufb03': 'ffi', '\ufb04': 'ffl',
+    '\u00a0': ' ', '\u2009': ' ', '\u200b': '', '\ufeff': '',
+})
+# Bullet glyphs from symbol fonts, often extracted as private-use characters.
+_BULLET_RE = re.compile(r"^[\u2022\u25cf\u25aa\u25a0\u25e6\u2023\u27a2\uf0b7\uf0a7\uf076]\s*", re.MULTILINE)
+_HYPHENATION_RE = re.compile(r"(\w)-\n(\w)")
+_SPACES_RE = re.compile(r"[ \t\f\v]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
+class PromptTooLargeError(ValueError):
+    pass
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def check_budget(prompt, max_tokens=PROMPT_MAX_INPUT_TOKENS):
+    tokens = estimate_tokens(prompt)
+    if tokens > max_tokens:
+        raise PromptTooLargeError(f"Prompt is ~{tokens} tokens, the budget is {max_tokens}")
+    return tokens
+
+
+def compact_text(text):
+    """Normalize whitespace and common PDF extraction artifacts."""
+    if not text:
+        return ''
+    text = text.translate(_LIGATURES).replace('\r\n', '\n').replace('\r', '\n')
+    text = _HYPHENATION_RE.sub(r'\1\2', text)
+    text = _SPACES_RE.sub(' ', text)
+    text = '\n'.join(line.strip() for line in text.split('\n'))
+    text = _BULLET_RE.sub('- ', text)
+    return _BLANK_LINES_RE.sub('\n\n', text).strip()
+
+
+def truncate_to_tokens(text, max_tokens):
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    cut = max(0, max_tokens * CHARS_PER_TOKEN - len(TRUNCATION_MARKER) - 1)
+    # Prefer ending on a line or word boundary near the cut.
+    boundary = max(text.rfind('\n', 0, cut), text.rfind(' ', 0, cut))
+    if boundary > cut // 2:
+        cut = boundary
+    return text[:cut].rstrip() + '\n' + TRUNCATION_MARKER
+
+
+def truncate_items(items, max_tokens):
+    """Drop trailing items, then truncate the last one kept, so the JSON list fits max_tokens."""
+    budget = max_tokens * CHARS_PER_TOKEN - 2
+    kept = []
+    for item in items:
+        size = len(compact_json(item)) + 1
+        if size > budget:
+            # Quotes, the separator and the marker's escaped newline.
+            room = (budget - 4) // CHARS_PER_TOKEN
+            if room >= 8:
+                kept.append(truncate_to_tokens(item, room))
+            break
+        kept.append(item)
+        budget -= size
+    return kept
+
+
+def prepare_resume(resume_text, max_tokens=PROMPT_RESUME_MAX_TOKENS):
+    compacted = compact_text(resume_text)
+    prepared = truncate_to_tokens(compacted, max_tokens)
+    if len(prepared) < len(compacted):
+        logger.warning("Resume text truncated from ~%s to %s tokens", estimate_tokens(compacted), max_tokens)
+    return prepared
+
+
+def compact_job(job, max_tokens=PROMPT_JOB_MAX_TOKENS):
+    compacted = {}
+    for field in PROMPT_JOB_FIELDS:
+        value = job.get(field)
+        if isinstance(value, (list, tuple)):
+            value = [compact_text(str(item)) for item in value if item]
+        elif isinstance(value, str):
+            value = compact_text(value)
+        if value:
+            compacted[field] = value
+    # Long free-text fields are the only part worth trimming; lists lose their
+    # trailing items first.
+    overflow = estimate_tokens(compact_json([compacted])) - max_tokens
+    for field in ('descriptions', 'responsibilities', 'requirements', 'qualifications'):
+        if overflow <= 0:
+            break
+        value = compacted.get(field)
+        if isinstance(value, str):
+            before = estimate_tokens(value)
+            compacted[field] = truncate_to_tokens(value, max(before - overflow, 32))
+            overflow -= before - estimate_tokens(compacted[field])
+        elif isinstance(value, list):
+            before = estimate_tokens(compact_json(value))
+            compacted[field] = truncate_items(value, max(before - overflow, 32))
+            overflow -= before - estimate_tokens(compact_json(compacted[field]))
+    return compacted
+
+
+def compact_json(value):
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+
+
+def prepare_jobs(jobs):
+    return compact_json([compact_job(job) for job in jobs])
+
+
+def split_by_budget(jobs, batch_size, max_tokens=PROMPT_JOBS_CHUNK_MAX_TOKENS):
+    """Chunk jobs so each chunk has at most batch_size jobs and ~max_tokens of job text."""
+    chunks = []
+    current = []
+    current_tokens = 0
+    for job in jobs:
+        tokens = estimate_tokens(compact_json([compact_job(job)]))
+        if current and (len(current) >= batch_size or current_tokens + tokens > max_tokens):
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.append(job)
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
@@ -0,0 +1,232 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from cache import CacheStats, build_tiered_cache, hash_key
+from job_store import job_store
+from pdf_text import extract_text_from_pdf
+from recommendations import incremental_recommendations
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# Precomputed /get_recommendations results per user, for requests that set
+# "snapshot": true. A snapshot is valid for one resume (by content hash) and one
+# job store version; when jobs change it is served as stale and refreshed in the
+# background, scoring only the new or changed jobs. memory | sqlite | disk | none
+SNAPSHOT_BACKEND = os.getenv('SNAPSHOT_BACKEND', 'sqlite').lower()
+SNAPSHOT_PATH = os.getenv('SNAPSHOT_PATH', os.path.join('.cache', 'snapshots'))
+SNAPSHOT_TTL = int(os.getenv('SNAPSHOT_TTL', 30 * 24 * 3600))
+SNAPSHOT_MAX_ENTRIES = int(os.getenv('SNAPSHOT_MAX_ENTRIES', 1024))
+# How often the scheduler looks for stale snapshots; adding or deleting jobs
+# through /jobs wakes it immediately.
+SNAPSHOT_REFRESH_INTERVAL = float(os.getenv('SNAPSHOT_REFRESH_INTERVAL', 300))
+SNAPSHOT_REFRESH_WORKERS = int(os.getenv('SNAPSHOT_REFRESH_WORKERS', 2))
+# Only snapshots read within this window are refreshed in the background.
+SNAPSHOT_ACTIVE_SECONDS = int(os.getenv('SNAPSHOT_ACTIVE_SECONDS', 7 * 24 * 3600))
+
+
+def snapshot_request_error(data, options):
+    """Validate the snapshot fields of a /get_recommendations body, or None if valid."""
+    if not data.get('userId'):
+        return "snapshot requires userId"
+    if data.get('jobs') is not None:
+        return "snapshot recommendations are drawn from the job store; omit jobs"
+    if options['mode'] != 'llm':
+        return "snapshot requires mode 'llm'"
+    return None
+
+
+def snapshot_key(user_id, options):
+    # batch_size only changes how jobs are chunked, not the result.
+    return hash_key('recommendations', str(user_id), json.dumps(options.get('filters'), sort_keys=True),
+                    options.get('top_k'))
+
+
+def resume_text_for(pdf_url):
+    resume_text = extract_text_from_pdf(pdf_url)
+    if not resume_text:
+        raise ValueError("Unable to extract text from the provided PDF.")
+    return resume_text
+
+
+class SnapshotScheduler:
+    """Stored snapshots plus the background thread that keeps them current.
+
+    Entries are {'pdf_url', 'resume_hash', 'jobs_version', 'assessments',
+    'recommendations', 'updated_at'}; assessments maps job id to the job's
+    content hash and its assessment, which is what lets a refresh skip jobs
+    that haven't changed.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        # key -> (last read, pdf_url, options) for snapshots that are being read
+        self._active = {}
+        self._refreshing = set()
+        self._wake = threading.Event()
+        self._thread = None
+        self._executor = None
+
+    def get(self, pdf_url, user_id, options):
+        """Serve a snapshot: (recommendations, snapshot status).
+
+        The resume is revalidated first (usually a cache hit or a 304 from the
+        extraction cache), so a re-upload to the same URL is noticed. A missing
+        snapshot, or one for different resume content, is computed before
+        returning. A stale one is returned as is and refreshed in the
+        background. Raises if the computation fails.
+        """
+        key = snapshot_key(user_id, options)
+        entry = self.store.get(key) if self.store is not None else None
+        self._touch(key, pdf_url, options)
+        resume_text = resume_text_for(pdf_url)
+        resume_hash = hash_key('resume', resume_text)
+        if entry is None or entry['resume_hash'] != resume_hash:
+            self.stats.incr('misses')
+            entry = self.refresh(key, pdf_url, options, entry, resume_text)
+            return entry['recommendations'], self.status(key, entry, computed=True)
+        if entry['pdf_url'] != pdf_url:
+            # Same resume behind a new download URL (e.g. a re-issued token).
+            entry = dict(entry, pdf_url=pdf_url)
+            self.store.set(key, entry)
+        if entry['jobs_version'] != job_store.version:
+            self.stats.incr('stale_hits')
+            self.schedule(key, pdf_url, options)
+        else:
+            self.stats.incr('hits')
+        return entry['recommendations'], self.status(key, entry)
+
+    def refresh(self, key, pdf_url, options, previous=None, resume_text=None):
+        """Recompute a snapshot, reusing the assessments in previous where possible."""
+        started = time.time()
+        jobs_version = job_store.version
+        resume_text = resume_text or resume_text_for(pdf_url)
+        resume_hash = hash_key('resume', resume_text)
+        reusable = previous['assessments'] if previous and previous['resume_hash'] == resume_hash else None
+
+        recommendations, assessments, scored = incremental_recommendations(
+            resume_text, reusable, top_k=options.get('top_k'), filters=options.get('filters'),
+            batch_size=options.get('batch_size'),
+        )
+        entry = {
+            'pdf_url': pdf_url, 'resume_hash': resume_hash, 'jobs_version': jobs_version,
+            'assessments': assessments, 'recommendations': recommendations, 'updated_at': time.time(),
+        }
+        if self.store is not None:
+            self.store.set(key, entry)
+        self.stats.incr('refreshes')
+        self.stats.incr('jobs_scored', scored)
+        self.stats.incr('jobs_reused', len(assessments) - scored)
+        logger.info("Refreshed recommendation snapshot in %.0f ms: %s of %s jobs scored",
+                    (time.time() - started) * 1000, scored, len(assessments))
+        return entry
+
+    def schedule(self, key, pdf_url, options):
+        """Refresh a snapshot in the background, unless a refresh is already running."""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=SNAPSHOT_REFRESH_WORKERS,
+                                                    thread_name_prefix='snapshot-refresh')
+        self._executor.submit(self._refresh_in_background, key, pdf_url, options)
+        return True
+
+    def _refresh_in_background(self, key, pdf_url, options):
+        try:
+            previous = self.store.get(key) if self.store is not None else None
+            if previous is not None and previous['pdf_url'] != pdf_url:
+                return
+            self.refresh(key, pdf_url, options, previous)
+        except Exception as e:
+            # The old snapshot keeps being served; the next pass retries.
+            self.stats.incr('refresh_errors')
+            logger.warning("Background snapshot refresh failed: %s", e)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def status(self, key, entry, computed=False):
+        with self._lock:
+            refreshing = key in self._refreshing
+        return {
+            "stale": entry['jobs_version'] != job_store.version,
+            "refreshing": refreshing,
+            "computed": computed,
+            "jobsVersion": entry['jobs_version'],
+            "currentJobsVersion": job_store.version,
+            "updatedAt": entry['updated_at'],
+            "ageSeconds": round(time.time() - entry['updated_at'], 1),
+        }
+
+    def notify(self):
+        """Wake the scheduler, e.g. after jobs were added or deleted."""
+        self._wake.set()
+
+    def _touch(self, key, pdf_url, options):
+        with self._lock:
+            self._active[key] = (time.time(), pdf_url, options)
+            if self._thread is None:
+                # Started on first use rather than at import, so gunicorn can fork
+                # the preloaded app safely.
+                self._thread = threading.Thread(target=self._run, name='snapshot-scheduler', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(SNAPSHOT_REFRESH_INTERVAL)
+            self._wake.clear()
+            try:
+                self.refresh_stale()
+            except Exception as e:
+                logger.error("Snapshot scheduler pass failed: %s", e)
+
+    def refresh_stale(self):
+        """Schedule a refresh of every recently read snapshot behind the job store."""
+        cutoff = time.time() - SNAPSHOT_ACTIVE_SECONDS
+        with self._lock:
+            for key in [key for key, (last_read, _, _) in self._active.items() if last_read < cutoff]:
+                del self._active[key]
+            active = list(self._active.items())
+        scheduled = 0
+        for key, (_, pdf_url, options) in active:
+            entry = self.store.get(key) if self.store is not None else None
+            if entry is not None and entry['jobs_version'] != job_store.version:
+                scheduled += self.schedule(key, pdf_url, options)
+        if scheduled:
+            logger.info("Scheduled %s recommendation snapshot refreshes", scheduled)
+        return scheduled
+
+    def info(self):
+        info = self.stats.snapshot()
+        info['backend'] = SNAPSHOT_BACKEND
+        with self._lock:
+            info['active'] = len(self._active)
+            info['refreshing'] = len(self._refreshing)
+        if self.store is not None:
+            info['store'] = self.store.info()
+        return info
+
+
+def build_snapshot_scheduler(backend=SNAPSHOT_BACKEND):
+    return SnapshotScheduler(build_tiered_cache(
+        backend, SNAPSHOT_PATH, SNAPSHOT_TTL, SNAPSHOT_MAX_ENTRIES, 'SNAPSHOT_BACKEND'
+    ))
+
+
+snapshot_scheduler = build_snapshot_scheduler()
+
+
+def snapshot_recommendations(pdf_url, user_id, options):
+    try:
+        return snapshot_scheduler.get(pdf_url, user_id, options)
+    except Exception as e:
+        logger.error("Error in snapshot_recommendations: %s", e)
+        return f"Error generating recommendations: {str(e)}", None
@@ -1,245 +1,579 @@
-import re
-import requests
-import PyPDF2
-import io
-import json
 import logging
-import google.generativeai as genai
-from google.generativeai.types import HarmCategory, HarmBlockThreshold
 import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
+from analysis_store import analysis_store
+from cache import hash_key
+from pdf_text import extract_text_from_pdf, parse_pdf_in_process_pool
+from llm import generate_text, stream_text
+from job_ranking import rank_jobs, lite_assessment
+from job_store import job_content_hash, job_store
+from json_extract import extract_json
+from logging_config import log_payload
+from prompt_budget import compact_job, compact_json, prepare_jobs, prepare_resume, split_by_budget
+from resilience import run_in_context
+from resume_sections import changed_sections, format_sections, resume_identity, section_hashes, split_sections
+from skill_extractor import match_skills
+from timing import timed
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-# Configure the Gemini API
-genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-
-def process_submitted_resume(resume_url, job):
+# Jobs are scored in chunks of this size so the output for each prompt stays well within
+# max_output_tokens, and chunks run concurrently so latency doesn't grow with the job count.
+RECOMMENDATION_BATCH_SIZE = int(os.getenv('RECOMMENDATION_BATCH_SIZE', 20))
+RECOMMENDATION_MAX_WORKERS = int(os.getenv('RECOMMENDATION_MAX_WORKERS', 4))
+RECOMMENDATION_CHUNK_RETRIES = int(os.getenv('RECOMMENDATION_CHUNK_RETRIES', 1))
+# Serve locally ranked results instead of an error when Gemini is unavailable.
+RECOMMENDATION_LITE_FALLBACK = os.getenv('RECOMMENDATION_LITE_FALLBACK', '').lower() in ('1', 'true', 'yes')
+
+BULK_MAX_RESUMES = int(os.getenv('BULK_MAX_RESUMES', 500))
+BULK_DOWNLOAD_WORKERS = int(os.getenv('BULK_DOWNLOAD_WORKERS', 16))
+BULK_LLM_CONCURRENCY = int(os.getenv('BULK_LLM_CONCURRENCY', 4))
+_bulk_llm_slots = threading.BoundedSemaphore(BULK_LLM_CONCURRENCY)
+# Fill skills_match and job_description_keywords with the local skill extractor and
+# only ask the model for the narrative fields.
+SCREENING_LOCAL_MATCHING = os.getenv('SCREENING_LOCAL_MATCHING', 'true').lower() in ('1', 'true', 'yes')
+
+def process_submitted_resume(resume_url, job, user_id=None):
     try:
         resume_text = extract_text_from_pdf(resume_url)
-        
-        prompt = f"""
-        Analyze the following resume against the provided job description. Provide a detailed analysis including:
-
-        1. Skills match: Identify skills in the resume that match the job requirements.
-        2. Education match: Assess if the candidate's education aligns with the job requirements.
-        3. Job description keywords: Extract key terms from the job description and check if they appear in the resume.
-        4. Interested parts: Identify sections of the resume that are particularly relevant to this job.
-
-        Resume:
-        {resume_text}
-
-        Job Description:
-        {json.dumps(job, indent=2)}
-
-        Provide the analysis as a JSON object with the following structure:
-            
-            "skills_match": [list of matching skills],
-            "education_match": "description of education alignment",
-            "job_description_keywords": [list of key terms found in both],
-            "interested_part": "description of relevant resume sections"
-
-        Return only the JSON object, without any additional text or explanation.
-        """
-
-        logger.debug(f"Generated prompt for resume processing: {prompt}")
-
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        response = model.generate_content(
-            prompt,
-            generation_config={
-                "temperature": 0.2,
-                "top_p": 1,
-                "top_k": 1,
-                "max_output_tokens": 2048,
-            },
-            safety_settings={
-                HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-            },
-        )
-
-        # Log the raw response for debugging
-        logger.debug(f"Raw Gemini API response: {response.text}")
-
-        # Attempt to reconstruct partial JSON
-        reconstructed_json = reconstruct_partial_json(response.text)
-
-        if reconstructed_json:
-            analysis = reconstructed_json
-        else:
-            # If reconstruction fails, return a structured error response
-            analysis = {
-                "error": "Failed to parse JSON",
-                "raw_response": response.text,
-                "skills_match": [],
-                "education_match": "Unable to determine",
-                "job_description_keywords": [],
-                "interested_part": "Unable to determine"
-            }
-
-        logger.debug(f"Processed Gemini API response: {analysis}")
-
-        return analysis
+        if not resume_text:
+            raise ValueError("Unable to extract text from the provided PDF.")
+
+        return screen_resume_text(resume_text, job, user_id)
     except Exception as e:
-        logger.error(f"Error in process_submitted_resume: {str(e)}")
-        return {
-            "error": f"Error processing submitted resume: {str(e)}",
-            "skills_match": [],
-            "education_match": "Unable to determine",
-            "job_description_keywords": [],
-            "interested_part": "Unable to determine"
-        }
-
-def reconstruct_partial_json(text):
+        logger.error("Error in process_submitted_resume: %s", e)
+        return submitted_resume_error(e)
+
+
+def process_submitted_resumes(resume_urls, job):
+    """Screen many resumes against one job, yielding each result as soon as it is ready.
+
+    Downloads run concurrently over the pooled session, parsing happens in a
+    process pool and LLM calls are capped by BULK_LLM_CONCURRENCY. A failing
+    resume produces an item with an "error" key instead of failing the batch.
+    """
+    def screen(resume_url):
+        resume_text = extract_text_from_pdf(resume_url, parse=parse_pdf_in_process_pool)
+        if not resume_text:
+            raise ValueError("Unable to extract text from the provided PDF.")
+        with _bulk_llm_slots:
+            return screen_resume_text(resume_text, job)
+
+    executor = ThreadPoolExecutor(max_workers=min(BULK_DOWNLOAD_WORKERS, len(resume_urls)) or 1)
+    # Bound to the request so token usage and spans are attributed to this route.
+    screen = run_in_context(screen)
+    futures = {executor.submit(screen, url): (index, url) for index, url in enumerate(resume_urls)}
     try:
-        # Attempt to find and parse the JSON object
-        json_match = re.search(r'\{[^}]*\}', text, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(0)
-            # Replace newlines and extra spaces
-            json_str = re.sub(r'\s+', ' ', json_str)
-            # Parse the JSON
-            return json.loads(json_str)
-        else:
-            # If no JSON object is found, construct one from the text
-            skills_match = re.findall(r'"skills_match":\s*\[(.*?)\]', text, re.DOTALL)
-            education_match = re.search(r'"education_match":\s*"(.*?)"', text)
-            keywords = re.findall(r'"job_description_keywords":\s*\[(.*?)\]', text, re.DOTALL)
-            interested_part = re.search(r'"interested_part":\s*"(.*?)"', text)
-
-            return {
-                "skills_match": skills_match[0].split(',') if skills_match else [],
-                "education_match": education_match.group(1) if education_match else "Unable to determine",
-                "job_description_keywords": keywords[0].split(',') if keywords else [],
-                "interested_part": interested_part.group(1) if interested_part else "Unable to determine"
-            }
-    except Exception as e:
-        logger.error(f"Error reconstructing JSON: {str(e)}")
-        return None
+        for future in as_completed(futures):
+            index, url = futures[future]
+            try:
+                yield {"index": index, "resumeUrl": url, "analysis": future.result()}
+            except Exception as e:
+                logger.error("Error screening resume %s: %s", url, e)
+                yield {"index": index, "resumeUrl": url, "error": f"Error processing submitted resume: {str(e)}"}
+    finally:
+        # Runs when the client disconnects too; don't start resumes nobody will read.
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def submitted_resume_error(e):
+    return {
+        "error": f"Error processing submitted resume: {str(e)}",
+        "skills_match": [],
+        "education_match": "Unable to determine",
+        "job_description_keywords": [],
+        "interested_part": "Unable to determine"
+    }
+
+
+SCREENING_CONFIG = {
+    "temperature": 0.2,
+    "top_p": 1,
+    "top_k": 1,
+    "max_output_tokens": 2048,
+    "response_mime_type": "application/json",
+}
+
+SCREENING_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "skills_match": {"type": "array"},
+        # Usually strings, but the model sometimes returns structured detail here.
+        "education_match": {},
+        "job_description_keywords": {"type": "array"},
+        "interested_part": {},
+    },
+}
+
+SCREENING_DEFAULTS = {
+    "skills_match": [],
+    "education_match": "Unable to determine",
+    "job_description_keywords": [],
+    "interested_part": "Unable to determine",
+}
+
+
+# Per screening field: the task description ({resume} is what the model is shown)
+# and its line in the requested JSON structure.
+SCREENING_TASKS = {
+    "skills_match": (
+        "Skills match: Identify skills in the {resume} that match the job requirements.",
+        '"skills_match": [list of matching skills]',
+    ),
+    "education_match": (
+        "Education match: Assess if the candidate's education aligns with the job requirements.",
+        '"education_match": "description of education alignment"',
+    ),
+    "job_description_keywords": (
+        "Job description keywords: Extract key terms from the job description and check if they appear in the {resume}.",
+        '"job_description_keywords": [list of key terms found in both]',
+    ),
+    "interested_part": (
+        "Interested parts: Identify sections of the resume that are particularly relevant to this job.",
+        '"interested_part": "description of relevant resume sections"',
+    ),
+}
+
+
+def screening_llm_fields():
+    if SCREENING_LOCAL_MATCHING:
+        return ('education_match', 'interested_part')
+    return tuple(SCREENING_TASKS)
+
+
+def _screening_instructions(resume):
+    fields = screening_llm_fields()
+    tasks = '\n    '.join(
+        f"{number}. {SCREENING_TASKS[field][0].format(resume=resume)}" for number, field in enumerate(fields, 1)
+    )
+    structure = ',\n        '.join(SCREENING_TASKS[field][1] for field in fields)
+    return tasks, structure
+
+
+@timed('prompt')
+def build_screening_prompt(resume_text, job):
+    tasks, structure = _screening_instructions('resume')
+    return f"""
+    Analyze the following resume against the provided job description. Provide a detailed analysis including:
+
+    {tasks}
+
+    Resume:
+    {prepare_resume(resume_text)}
+
+    Job Description:
+    {compact_json(compact_job(job))}
+
+    Provide the analysis as a JSON object with the following structure:
+
+        {structure}
+
+    Return only the JSON object, without any additional text or explanation.
+    """
+
+
+@timed('prompt')
+def build_section_screening_prompt(sections, changed, job, previous):
+    tasks, structure = _screening_instructions('updated sections')
+    return f"""
+    The following sections of a resume were updated. Analyze them against the provided job description. Provide a detailed analysis including:
+
+    {tasks}
+
+    Updated resume sections:
+    {prepare_resume(format_sections(sections, changed))}
+
+    Job Description:
+    {compact_json(compact_job(job))}
+
+    The other sections of the resume ({', '.join(name.title() for name in sections if name not in changed)}) are unchanged.
+    Before this update, the relevant parts of the resume were described as:
+    {previous.get('interested_part', '')}
+
+    Provide the analysis as a JSON object with the following structure:
+
+        {structure}
+
+    Return only the JSON object, without any additional text or explanation.
+    """
+
+
+# See resume_utils.AnalysisPlan; screenings are stored per job. local holds the
+# fields computed by the skill extractor, if enabled.
+ScreeningPlan = namedtuple('ScreeningPlan', 'sections hashes identity scope previous changed prompt local')
+
+
+def plan_screening(resume_text, job, user_id=None):
+    local = match_skills(resume_text, job) if SCREENING_LOCAL_MATCHING else None
+    sections = split_sections(resume_text)
+    hashes = section_hashes(sections)
+    identity = resume_identity(sections, user_id)
+    scope = hash_key(compact_json(compact_job(job)))
+    previous = analysis_store.get('screening', identity, scope)
+    if previous is not None:
+        changed = changed_sections(previous['hashes'], hashes)
+        unchanged = [name for name in hashes if name not in changed and name != 'contact']
+        if not changed:
+            return ScreeningPlan(sections, hashes, identity, scope, previous, changed, None, local)
+        if unchanged:
+            prompt = build_section_screening_prompt(sections, changed, job, previous['result'])
+            return ScreeningPlan(sections, hashes, identity, scope, previous, changed, prompt, local)
+    return ScreeningPlan(sections, hashes, identity, scope, None, None, build_screening_prompt(resume_text, job), local)
 
 
-def extract_text_from_pdf(pdf_url):
-    try:
-        response = requests.get(pdf_url)
-        response.raise_for_status()
-        pdf_file = io.BytesIO(response.content)
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text()
-        
-        logger.debug(f"Extracted PDF text (first 1000 chars): {text[:1000]}")
-        return text
-    except Exception as e:
-        logger.error(f"Error extracting text from PDF: {str(e)}")
-        return f"Error extracting PDF text: {str(e)}"
+def finish_screening(plan, response_text=None):
+    if plan.prompt is None:
+        analysis_store.record('unchanged', 0, len(plan.hashes))
+        return dict(plan.previous['result'], **(plan.local or {}))
+
+    analysis = parse_screening_response(response_text)
+    if 'error' in analysis:
+        return dict(analysis, **(plan.local or {}))
+    if plan.previous is not None:
+        analysis_store.record('incremental', len(plan.changed), len(plan.hashes))
+        analysis = merge_screening(plan.previous['result'], analysis, plan.sections, plan.changed)
+    else:
+        analysis_store.record('full', len(plan.hashes), len(plan.hashes))
+    if plan.local:
+        analysis.update(plan.local)
+    analysis_store.set('screening', plan.identity, plan.hashes, analysis, plan.scope)
+    return analysis
+
+
+def merge_screening(previous, analysis, sections, changed):
+    """Combine a screening of the changed sections with the previous screening.
+
+    Matched skills and keywords are kept from before while they still appear in
+    the resume. The education verdict is kept unless the education section changed.
+    """
+    resume_text = '\n'.join(sections.values()).lower()
+    merged = dict(analysis)
+    for field in ('skills_match', 'job_description_keywords'):
+        terms = [term for term in previous.get(field, []) if not isinstance(term, str) or term.lower() in resume_text]
+        seen = {str(term).lower() for term in terms}
+        terms += [term for term in analysis.get(field, []) if str(term).lower() not in seen]
+        merged[field] = terms
+    if 'education' not in changed and 'education_match' in previous:
+        merged['education_match'] = previous['education_match']
+    return merged
+
+
+def screen_resume_text(resume_text, job, user_id=None):
+    plan = plan_screening(resume_text, job, user_id)
+    if plan.prompt is None:
+        return finish_screening(plan)
+
+    log_payload(logger, "Generated prompt for resume processing: %s", plan.prompt)
+
+    response_text = generate_text(plan.prompt, generation_config=SCREENING_CONFIG)
+
+    # Log the raw response for debugging
+    log_payload(logger, "Raw Gemini API response: %s", response_text)
+
+    return finish_screening(plan, response_text)
 
 
-def get_job_recommendations(pdf_url, jobs):
+@timed('response_parse')
+def parse_screening_response(response_text):
+    try:
+        analysis, truncated = extract_json(response_text, schema=SCREENING_SCHEMA)
+        if truncated:
+            logger.warning("Screening response was truncated, filling in missing fields")
+        for field, default in SCREENING_DEFAULTS.items():
+            analysis.setdefault(field, default)
+    except ValueError as e:
+        logger.error("Error parsing screening response: %s", e)
+        # If parsing fails, return a structured error response
+        analysis = dict(SCREENING_DEFAULTS, error="Failed to parse JSON", raw_response=response_text)
+
+    log_payload(logger, "Processed Gemini API response: %s", analysis)
+
+    return analysis
+
+
+def recommendation_options(data):
+    """Validate a /get_recommendations body; returns (options, error_message)."""
+    pdf_url = data.get('pdfUrl')
+    jobs = data.get('jobs')
+    filters = data.get('filters')
+    batch_size = data.get('batchSize')
+    top_k = data.get('topK')
+    mode = data.get('mode', 'llm')
+
+    if not pdf_url:
+        return None, "Missing PDF URL"
+    # Without a jobs list, recommendations are drawn from the server-side job store.
+    if jobs is not None and not jobs:
+        return None, "Missing jobs data"
+    if jobs is None and not len(job_store):
+        return None, "Missing jobs data and the job store is empty"
+    if filters is not None and not isinstance(filters, dict):
+        return None, "filters must be an object"
+    if batch_size is not None and (not isinstance(batch_size, int) or batch_size < 1):
+        return None, "batchSize must be a positive integer"
+    if top_k is not None and (not isinstance(top_k, int) or top_k < 1):
+        return None, "topK must be a positive integer"
+    if mode not in ('llm', 'lite'):
+        return None, "mode must be 'llm' or 'lite'"
+
+    return {"batch_size": batch_size, "top_k": top_k, "mode": mode, "filters": filters}, None
+
+
+def get_job_recommendations(pdf_url, jobs=None, batch_size=None, top_k=None, mode='llm', filters=None):
     try:
         resume_text = extract_text_from_pdf(pdf_url)
-        
-        prompt = f"""
-        Given the following resume and job listings, analyze all job listings and provide a suitability assessment for each job.
-        
-        Resume:
-        {resume_text}
-
-        Job Listings:
-        {json.dumps(jobs, indent=2)}
-
-        For each job, provide an assessment as a JSON object with the following fields:
-        - companyName: The name of the company
-        - role: The job title
-        - tags: An array of relevant skills or keywords
-        - matchReason: A detailed explanation of why this job is or isn't a good match for the candidate
-        - matchScore: A string representing the match quality: "Excellent" (for top matches), "Average" (for decent matches), or "Poor" (for less suitable matches)
-        - detailedAnalysis: A more in-depth analysis of the candidate's fit for the role, including strengths and potential areas for improvement
-
-        Return a JSON array containing an assessment for each job listing, without any additional text or explanation.
-        """
-
-        logger.debug(f"Generated prompt: {prompt}")
-
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        response = model.generate_content(
-            prompt,
-            generation_config={
-                "temperature": 0.2,
-                "top_p": 1,
-                "top_k": 1,
-                "max_output_tokens": 8192,  # Increased to handle more job listings
-            },
-            safety_settings={
-                HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-            },
-        )
-
-        recommendations = json.loads(response.text)
-        logger.debug(f"Gemini API response: {recommendations}")
+        if not resume_text:
+            raise ValueError("Unable to extract text from the provided PDF.")
+
+        candidates, similarities = rank_candidates(resume_text, jobs, top_k=top_k, filters=filters)
+
+        if mode == 'lite':
+            return lite_recommendations(candidates, similarities)
+
+        try:
+            recommendations = score_jobs(resume_text, candidates, batch_size)
+        except Exception as e:
+            if not RECOMMENDATION_LITE_FALLBACK:
+                raise
+            logger.warning("LLM scoring failed, falling back to local ranking: %s", e)
+            return lite_recommendations(candidates, similarities)
+
+        annotate_recommendations(recommendations, candidates, similarities)
+        log_payload(logger, "Gemini API response: %s", recommendations)
 
         return recommendations
     except Exception as e:
-        logger.error(f"Error in get_job_recommendations: {str(e)}")
+        logger.error("Error in get_job_recommendations: %s", e)
         return f"Error generating recommendations: {str(e)}"
-    
+
+
+def incremental_recommendations(resume_text, previous=None, top_k=None, filters=None, batch_size=None):
+    """Score the job store against a resume, reusing earlier assessments.
+
+    previous maps job id -> {'hash': job content hash, 'assessment': ...} from an
+    earlier run against the same resume. Only candidates that are new or whose
+    content changed since are sent to the model; the list is then re-ranked
+    locally. Returns (recommendations, assessments, number of jobs scored).
+    """
+    previous = previous or {}
+    candidates, similarities = rank_candidates(resume_text, top_k=top_k, filters=filters)
+    hashes = [job_content_hash(job) for job in candidates]
+    unscored = [job for job, content_hash in zip(candidates, hashes)
+                if previous.get(job['id'], {}).get('hash') != content_hash]
+    scored = dict(zip((job['id'] for job in unscored), score_jobs(resume_text, unscored, batch_size) if unscored else []))
+
+    assessments = {}
+    for job, content_hash in zip(candidates, hashes):
+        if job['id'] in scored:
+            assessments[job['id']] = {'hash': content_hash, 'assessment': scored[job['id']]}
+        else:
+            assessments[job['id']] = previous[job['id']]
+    recommendations = [dict(assessments[job['id']]['assessment']) for job in candidates]
+    annotate_recommendations(recommendations, candidates, similarities)
+    return recommendations, assessments, len(unscored)
+
+
+def rank_candidates(resume_text, jobs=None, top_k=None, filters=None):
+    # Local pre-ranking: cheap enough to always run, and lets top_k keep obviously
+    # irrelevant jobs out of the prompt. Without a jobs list, rank the server-side
+    # job store using its precomputed index.
+    if jobs is None:
+        ranked = job_store.rank(resume_text, filters=filters, top_k=top_k)
+    else:
+        ranking = rank_jobs(resume_text, jobs, top_k=top_k)
+        if top_k is None:
+            ranking.sort()
+        ranked = [(jobs[index], similarity) for index, similarity in ranking]
+    return [job for job, _ in ranked], [similarity for _, similarity in ranked]
+
+
+def lite_recommendations(candidates, similarities):
+    return [lite_assessment(job, similarity) for job, similarity in zip(candidates, similarities)]
+
+
+def annotate_recommendations(recommendations, candidates, similarities):
+    for recommendation, job, similarity in zip(recommendations, candidates, similarities):
+        if isinstance(recommendation, dict):
+            recommendation['similarityScore'] = similarity
+            if job.get('id'):
+                recommendation['jobId'] = job['id']
+
+
+def chunk_jobs(jobs, batch_size=None):
+    # Chunks are also capped by estimated job-text tokens, so a few very long
+    # listings don't push one prompt past its budget.
+    return split_by_budget(jobs, batch_size or RECOMMENDATION_BATCH_SIZE)
+
+
+def score_jobs(resume_text, jobs, batch_size=None):
+    chunks = chunk_jobs(jobs, batch_size)
+
+    if len(chunks) == 1:
+        return score_job_chunk(resume_text, chunks[0])
+
+    # Each chunk is an independent prompt; executor.map keeps results in job order.
+    max_workers = min(RECOMMENDATION_MAX_WORKERS, len(chunks))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        score_chunk = run_in_context(lambda chunk: score_job_chunk(resume_text, chunk))
+        results = executor.map(score_chunk, chunks)
+        return [item for chunk_result in results for item in chunk_result]
+
+
+JOB_SCORING_CONFIG = {
+    "temperature": 0.2,
+    "top_p": 1,
+    "top_k": 1,
+    "max_output_tokens": 8192,
+    "response_mime_type": "application/json",
+}
+
+JOB_ASSESSMENTS_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "required": ["companyName", "role", "tags", "matchReason", "matchScore", "detailedAnalysis"],
+        "properties": {
+            "companyName": {"type": "string"},
+            "role": {"type": "string"},
+            "tags": {"type": "array"},
+            "matchReason": {"type": "string"},
+            "matchScore": {"type": "string"},
+            "detailedAnalysis": {"type": "string"},
+        },
+    },
+}
+
+
+class PartialAssessmentsError(ValueError):
+    # Raised for a truncated response; carries the assessments that were complete.
+    def __init__(self, message, assessments):
+        super().__init__(message)
+        self.assessments = assessments
+
+
+@timed('prompt')
+def build_job_scoring_prompt(resume_text, jobs):
+    return f"""
+    Given the following resume and job listings, analyze all job listings and provide a suitability assessment for each job.
+
+    Resume:
+    {prepare_resume(resume_text)}
+
+    Job Listings:
+    {prepare_jobs(jobs)}
+
+    For each job, provide an assessment as a JSON object with the following fields:
+    - companyName: The name of the company
+    - role: The job title
+    - tags: An array of relevant skills or keywords
+    - matchReason: A detailed explanation of why this job is or isn't a good match for the candidate
+    - matchScore: A string representing the match quality: "Excellent" (for top matches), "Average" (for decent matches), or "Poor" (for less suitable matches)
+    - detailedAnalysis: A more in-depth analysis of the candidate's fit for the role, including strengths and potential areas for improvement
+
+    Return a JSON array containing an assessment for each job listing, in the same order as the listings, without any additional text or explanation.
+    """
+
+
+@timed('response_parse')
+def parse_job_assessments(text, jobs):
+    assessments, truncated = extract_json(text, schema=JOB_ASSESSMENTS_SCHEMA)
+    if truncated and len(assessments) < len(jobs):
+        raise PartialAssessmentsError(f"Response truncated after {len(assessments)} of {len(jobs)} assessments", assessments)
+    if len(assessments) != len(jobs):
+        raise ValueError(f"Expected {len(jobs)} assessments, got {len(assessments)}")
+    return assessments
+
+
+def score_job_chunk(resume_text, jobs, retries=None):
+    retries = RECOMMENDATION_CHUNK_RETRIES if retries is None else retries
+    scored = []
+
+    for attempt in range(retries + 1):
+        # After a truncated response only the jobs it didn't cover are sent again.
+        remaining = jobs[len(scored):]
+        prompt = build_job_scoring_prompt(resume_text, remaining)
+        log_payload(logger, "Generated prompt: %s", prompt)
+        try:
+            response_text = generate_text(
+                prompt,
+                generation_config=JOB_SCORING_CONFIG,
+                validate=lambda text: parse_job_assessments(text, remaining),
+            )
+            return scored + parse_job_assessments(response_text, remaining)
+        except PartialAssessmentsError as e:
+            scored += e.assessments
+            if attempt == retries:
+                raise
+            logger.warning("Re-scoring %s jobs missing from a truncated response", len(jobs) - len(scored))
+        except Exception as e:
+            if attempt == retries:
+                raise
+            logger.warning("Retrying job chunk of %s after error: %s", len(remaining), e)
+
+
+RESUME_GENERATION_CONFIG = {
+    "temperature": 0.7,
+    "top_p": 1,
+    "top_k": 1,
+    "max_output_tokens": 2048,
+}
+
+
+@timed('prompt')
+def build_resume_prompt(user_input):
+    return f"""
+    Generate a professional resume based on the following information:
+
+    Full Name: {user_input['fullName']}
+    Email: {user_input['email']}
+    Phone: {user_input['phone']}
+    Education: {user_input['education']}
+    Work Experience: {user_input['experience']}
+    Skills: {user_input['skills']}
+    Target Industry: {user_input['targetIndustry']}
+
+    Please create a well-structured resume that highlights the candidate's strengths and is tailored to the {user_input['targetIndustry']} industry. 
+    The resume should include the following sections:
+    1. Contact Information
+    2. Professional Summary
+    3. Work Experience
+    4. Education
+    5. Skills
+
+    Format the resume using Markdown for better readability.
+    Generate some recommendations as well for in writing a good resume.
+    """
+
 
 def generate_resume(user_input):
     try:
-        prompt = f"""
-        Generate a professional resume based on the following information:
-
-        Full Name: {user_input['fullName']}
-        Email: {user_input['email']}
-        Phone: {user_input['phone']}
-        Education: {user_input['education']}
-        Work Experience: {user_input['experience']}
-        Skills: {user_input['skills']}
-        Target Industry: {user_input['targetIndustry']}
-
-        Please create a well-structured resume that highlights the candidate's strengths and is tailored to the {user_input['targetIndustry']} industry. 
-        The resume should include the following sections:
-        1. Contact Information
-        2. Professional Summary
-        3. Work Experience
-        4. Education
-        5. Skills
-
-        Format the resume using Markdown for better readability.
-        Generate some recommendations as well for in writing a good resume.
-        """
-
-        logger.debug(f"Generated resume prompt: {prompt}")
-
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        response = model.generate_content(
-            prompt,
-            generation_config={
-                "temperature": 0.7,
-                "top_p": 1,
-                "top_k": 1,
-                "max_output_tokens": 2048,
-            },
-            safety_settings={
-                HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-            },
-        )
-
-        generated_resume = response.text
-        logger.debug(f"Generated resume: {generated_resume}")
+        prompt = build_resume_prompt(user_input)
+
+        log_payload(logger, "Generated resume prompt: %s", prompt)
+
+        response_text = generate_text(prompt, generation_config=RESUME_GENERATION_CONFIG)
+
+        generated_resume = response_text
+        log_payload(logger, "Generated resume: %s", generated_resume)
 
         return generated_resume
     except Exception as e:
-        logger.error(f"Error in generate_resume: {str(e)}")
-        return f"Error generating resume: {str(e)}"
\ No newline at end of file
+        logger.error("Error in generate_resume: %s", e)
+        return f"Error generating resume: {str(e)}"
+
+
+def generate_resume_stream(user_input):
+    try:
+        prompt = build_resume_prompt(user_input)
+    except Exception as e:
+        logger.error("Error in generate_resume_stream: %s", e)
+        return f"Error generating resume: {str(e)}"
+
+    return stream_text(prompt, generation_config=RESUME_GENERATION_CONFIG)
@@ -0,0 +1,141 @@
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Absolute time.monotonic() by which the current request must finish, or None.
+_deadline = contextvars.ContextVar('deadline', default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+@contextmanager
+def deadline(seconds):
+    """Bound all downstream calls made in this context to `seconds` from now.
+
+    A nested deadline can only shorten the current one, never extend it.
+    """
+    expires_at = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        expires_at = min(expires_at, current)
+    token = _deadline.set(expires_at)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def start_deadline(seconds):
+    # For frameworks that bracket a request with separate before/after hooks
+    # rather than a single with-block; pair with clear_deadline().
+    _deadline.set(time.monotonic() + seconds)
+
+
+def clear_deadline():
+    _deadline.set(None)
+
+
+def time_remaining(default=None):
+    """Seconds left before the current deadline, or `default` if none is set.
+
+    Raises DeadlineExceeded if the deadline has already passed, so callers fail
+    fast instead of starting work nobody is waiting for.
+    """
+    expires_at = _deadline.get()
+    if expires_at is None:
+        return default
+    remaining = expires_at - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+    return remaining if default is None else min(remaining, default)
+
+
+def run_in_context(fn):
+    # Worker threads don't inherit context variables; bind the caller's context
+    # (including its deadline) to a callable before handing it to an executor.
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(fn, *args, **kwargs)
+
+
+class CircuitBreaker:
+    """Stops calling an upstream after repeated failures.
+
+    After failure_threshold consecutive failures the breaker opens and calls fail
+    immediately with CircuitOpenError for reset_timeout seconds. Then a single
+    trial call is let through: success closes the breaker, failure reopens it.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return 'half_open'
+            return 'open'
+
+    def before_call(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_flight:
+                raise CircuitOpenError(f"{self.name} is unavailable (circuit open)")
+            self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._trial_in_flight:
+                    logger.warning("Opening circuit for %s after %s failures", self.name, self._failures)
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def release(self):
+        # For calls that ended without saying anything about the upstream
+        # (cancelled, interrupted): lets the next call be the trial.
+        with self._lock:
+            self._trial_in_flight = False
+
+    def call(self, fn, *args, is_failure=None, **kwargs):
+        # is_failure(exc) decides whether an exception counts against the upstream;
+        # by default every exception does.
+        self.before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            if is_failure is None or is_failure(e):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        except BaseException:
+            self.release()
+            raise
+        self.record_success()
+        return result
@@ -0,0 +1,91 @@
+import re
+from cache import hash_key
+from prompt_budget import compact_text
+
+# Canonical section name -> headings that introduce it. Text before the first
+# recognised heading (name, email, links) is the 'contact' section.
+SECTION_HEADINGS = {
+    'summary': ('summary', 'professional summary', 'profile', 'professional profile', 'objective',
+                'career objective', 'about me', 'personal statement'),
+    'experience': ('experience', 'work experience', 'professional experience', 'employment',
+                   'employment history', 'work history', 'internships', 'internship experience',
+                   'relevant experience'),
+    'education': ('education', 'academic background', 'education and qualifications', 'academic qualifications'),
+    'skills': ('skills', 'technical skills', 'key skills', 'core competencies', 'skills and tools',
+               'technologies', 'tools and technologies'),
+    'projects': ('projects', 'personal projects', 'academic projects', 'selected projects', 'key projects'),
+    'certifications': ('certifications', 'certificates', 'licenses and certifications', 'courses'),
+    'awards': ('awards', 'honors', 'honours', 'achievements', 'awards and achievements'),
+    'activities': ('activities', 'leadership', 'volunteering', 'volunteer experience',
+                   'extracurricular activities', 'leadership and activities', 'co-curricular activities'),
+    'languages': ('languages',),
+    'publications': ('publications', 'research'),
+    'references': ('references',),
+    'recommendations': ('recommendations',),
+}
+GENERAL_SECTION = 'general'
+
+_HEADINGS = {heading: name for name, headings in SECTION_HEADINGS.items() for heading in headings}
+_HEADING_MAX_CHARS = 40
+_HEADING_MARKS_RE = re.compile(r"^[#*_\s\d.]+|[*_:\s]+$")
+
+
+def section_for_heading(line):
+    """The canonical section a heading line introduces, or None if it isn't one."""
+    if len(line) > _HEADING_MAX_CHARS:
+        return None
+    heading = _HEADING_MARKS_RE.sub('', line).lower().replace('&', 'and')
+    return _HEADINGS.get(' '.join(heading.split()))
+
+
+def canonical_section(label):
+    """Map a section label chosen by the model (e.g. "Work Experience") to a section name."""
+    return section_for_heading(label) or label.strip().lower() or GENERAL_SECTION
+
+
+def split_sections(resume_text):
+    """Split extracted resume text into {section: text}, in document order.
+
+    Repeated headings (two "Experience" blocks) are merged into one section.
+    """
+    sections = {}
+    current = 'contact'
+    for line in compact_text(resume_text).split('\n'):
+        name = section_for_heading(line)
+        if name is not None:
+            current = name
+            sections.setdefault(current, [])
+            continue
+        sections.setdefault(current, []).append(line)
+    return {name: '\n'.join(lines).strip() for name, lines in sections.items() if '\n'.join(lines).strip()}
+
+
+def section_hashes(sections):
+    # Hashed after compact_text, so re-exports that only change spacing, ligatures
+    # or bullet glyphs hash the same.
+    return {name: hash_key('section', name, text) for name, text in sections.items()}
+
+
+def changed_sections(previous_hashes, hashes):
+    """Sections that are new or whose content differs from the previous version."""
+    return [name for name, digest in hashes.items() if previous_hashes.get(name) != digest]
+
+
+def resume_identity(sections, user_id=None):
+    """Key under which past analyses of "the same resume" are stored.
+
+    The caller's user id when given, otherwise the contact block: a re-upload by
+    the same person keeps their name and email. None when neither is available.
+    """
+    if user_id:
+        return hash_key('user', str(user_id))
+    contact = sections.get('contact')
+    if not contact:
+        return None
+    return hash_key('contact', contact.lower())
+
+
+def format_sections(sections, names=None):
+    """Render sections as labelled blocks for a prompt."""
+    names = names if names is not None else list(sections)
+    return '\n\n'.join(f"[{name.title()}]\n{sections[name]}" for name in names if name in sections)
@@ -1,54 +1,49 @@
-import requests
-import io
-import PyPDF2
-import google.generativeai as genai
-from google.generativeai.types import HarmCategory, HarmBlockThreshold
 import os
+import re
+import tempfile
+from collections import namedtuple
 from dotenv import load_dotenv
+from analysis_store import analysis_store
+from cache import FileCache, hash_key
+from pdf_text import extract_text_from_pdf
+from llm import generate_text, stream_text
+from prompt_budget import prepare_resume
+from pdf_render import RENDERER_VERSION, render_latex, render_markdown
+from resume_sections import (
+    GENERAL_SECTION, canonical_section, changed_sections, format_sections, resume_identity, section_hashes,
+    split_sections
+)
+from single_flight import SingleFlight
+from timing import timed
 import json
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.units import inch
 import logging
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
-# Configure the Gemini API
-genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+# Rendered PDFs are kept on disk by content hash; set EXPORT_CACHE_DIR to an empty
+# value to disable the cache.
+EXPORT_CACHE_DIR = os.getenv('EXPORT_CACHE_DIR', os.path.join('.cache', 'exports'))
+EXPORT_CACHE_MAX_BYTES = int(os.getenv('EXPORT_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+EXPORT_CACHE_TTL = int(os.getenv('EXPORT_CACHE_TTL', 7 * 24 * 3600))
+# Without the cache, renders larger than this are spooled to a temp file rather than kept in memory.
+EXPORT_SPOOL_MAX_BYTES = int(os.getenv('EXPORT_SPOOL_MAX_BYTES', 1024 * 1024))
 
-def extract_text_from_pdf(pdf_url):
-    try:
-        response = requests.get(pdf_url)
-        response.raise_for_status()
-        pdf_file = io.BytesIO(response.content)
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text()
-        return text
-    except Exception as e:
-        print(f"Error extracting text from PDF: {str(e)}")
-        return None
+_export_cache = None
+if EXPORT_CACHE_DIR:
+    _export_cache = FileCache(EXPORT_CACHE_DIR, suffix='.pdf', max_bytes=EXPORT_CACHE_MAX_BYTES, ttl=EXPORT_CACHE_TTL)
+_export_flight = SingleFlight('export')
 
-def analyze_resume(pdf_url):
-    resume_text = extract_text_from_pdf(pdf_url)
-    if not resume_text:
-        return json.dumps({"error": "Unable to extract text from the provided PDF."})
+ANALYSIS_GENERATION_CONFIG = {
+    "temperature": 0.7,
+    "top_p": 1,
+    "top_k": 1,
+    "max_output_tokens": 2048,
+}
 
-    prompt = f"""
-    Analyze the following resume and provide a detailed assessment:
-
-    {resume_text}
-
-    Please provide an analysis that includes:
-    1. Overall impression
-    2. Strengths of the resume (pros)
-    3. Areas for improvement (cons)
-    4. Suggestions for enhancing the resume
+ANALYSIS_CATEGORIES = ('pros', 'cons', 'suggestions')
 
+_ANALYSIS_FORMAT = """
     Format your response as follows:
     OVERALL IMPRESSION:
     [Your overall impression here]
@@ -68,102 +63,243 @@ def analyze_resume(pdf_url):
     - [Suggestion 2]
     - [Suggestion 3]
 
+    Start every bullet with the resume section it is about in square brackets, for example
+    "- [Experience] Achievements are quantified in every role". Use [General] for points about
+    the resume as a whole.
+
     Ensure that each section is clearly separated and follows this exact format.
     """
 
-    model = genai.GenerativeModel('gemini-1.5-flash')
-    response = model.generate_content(
-        prompt,
-        generation_config={
-            "temperature": 0.7,
-            "top_p": 1,
-            "top_k": 1,
-            "max_output_tokens": 2048,
-        },
-        safety_settings={
-            HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-            HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-            HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-            HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-        },
-    )
-
-    # Parse the response and format it as JSON
+@timed('prompt')
+def build_analysis_prompt(resume_text):
+    return f"""
+    Analyze the following resume and provide a detailed assessment:
+
+    {prepare_resume(format_sections(split_sections(resume_text)))}
+
+    Please provide an analysis that includes:
+    1. Overall impression
+    2. Strengths of the resume (pros)
+    3. Areas for improvement (cons)
+    4. Suggestions for enhancing the resume
+    {_ANALYSIS_FORMAT}"""
+
+@timed('prompt')
+def build_section_analysis_prompt(sections, changed, previous_impression):
+    unchanged = [name.title() for name in sections if name not in changed]
+    return f"""
+    The following sections of a resume were updated. Analyze them and provide a detailed assessment:
+
+    {prepare_resume(format_sections(sections, changed))}
+
+    The other sections ({', '.join(unchanged)}) are unchanged and have already been assessed.
+    The previous overall impression of the whole resume was:
+    {previous_impression}
+
+    Please provide an analysis that includes:
+    1. An updated overall impression of the whole resume
+    2. Strengths of the updated sections (pros)
+    3. Areas for improvement in the updated sections (cons)
+    4. Suggestions for enhancing the updated sections
+    {_ANALYSIS_FORMAT}"""
+
+# What analyze_resume sends to the model: the whole resume (changed is None), only
+# the changed sections, or nothing when an identical resume was analyzed before
+# (prompt is None).
+AnalysisPlan = namedtuple('AnalysisPlan', 'sections hashes identity previous changed prompt')
+
+def plan_analysis(resume_text, user_id=None):
+    sections = split_sections(resume_text)
+    hashes = section_hashes(sections)
+    identity = resume_identity(sections, user_id)
+    previous = analysis_store.get('analysis', identity)
+    if previous is not None:
+        changed = changed_sections(previous['hashes'], hashes)
+        unchanged = [name for name in hashes if name not in changed and name != 'contact']
+        if not changed:
+            return AnalysisPlan(sections, hashes, identity, previous, changed, None)
+        if unchanged:
+            prompt = build_section_analysis_prompt(sections, changed, previous['result']['overall_impression'])
+            return AnalysisPlan(sections, hashes, identity, previous, changed, prompt)
+    return AnalysisPlan(sections, hashes, identity, None, None, build_analysis_prompt(resume_text))
+
+def finish_analysis(plan, response_text=None):
+    """Merge the model's findings for the plan with the stored ones; returns the analysis JSON."""
+    if plan.prompt is None:
+        analysis_store.record('unchanged', 0, len(plan.hashes))
+        findings = merge_findings(plan.previous['result'], None, plan.sections, plan.changed)
+    else:
+        try:
+            findings = parse_analysis_findings(response_text)
+        except Exception as e:
+            logger.error("Error parsing AI response: %s", e)
+            return json.dumps({"error": "Failed to parse the analysis. Please try again."})
+        if plan.previous is not None:
+            analysis_store.record('incremental', len(plan.changed), len(plan.hashes))
+            findings = merge_findings(plan.previous['result'], findings, plan.sections, plan.changed)
+        else:
+            analysis_store.record('full', len(plan.hashes), len(plan.hashes))
+    analysis_store.set('analysis', plan.identity, plan.hashes, findings)
+    return analysis_json(findings)
+
+def analyze_resume(pdf_url, user_id=None):
+    resume_text = extract_text_from_pdf(pdf_url)
+    if not resume_text:
+        return json.dumps({"error": "Unable to extract text from the provided PDF."})
+
+    plan = plan_analysis(resume_text, user_id)
+    if plan.prompt is None:
+        return finish_analysis(plan)
+
+    response_text = generate_text(plan.prompt, generation_config=ANALYSIS_GENERATION_CONFIG)
+
+    return finish_analysis(plan, response_text)
+
+def merge_findings(previous, findings, sections, changed):
+    """Previous findings about unchanged sections plus the new findings about changed ones.
+
+    Findings about the resume as a whole are kept from the previous analysis
+    unless the new one has its own; findings about removed sections are dropped.
+    """
+    order = {name: index for index, name in enumerate(list(sections) + [GENERAL_SECTION])}
+    merged = {"overall_impression": (findings or previous)["overall_impression"]}
+    for category in ANALYSIS_CATEGORIES:
+        new_items = (findings or {}).get(category, [])
+        new_general = any(section == GENERAL_SECTION for section, _ in new_items)
+        kept = [
+            [section, text] for section, text in previous.get(category, [])
+            if section in sections and section not in changed or section == GENERAL_SECTION and not new_general
+        ]
+        items = kept + [list(item) for item in new_items]
+        merged[category] = sorted(items, key=lambda item: order.get(item[0], len(order)))
+    return merged
+
+def analysis_json(findings):
+    analysis = {"overall_impression": findings["overall_impression"]}
+    for category in ANALYSIS_CATEGORIES:
+        analysis[category] = [text for _, text in findings.get(category, [])]
+    return json.dumps(analysis)
+
+# Section headers as requested in build_analysis_prompt. Models sometimes add
+# Markdown emphasis or heading marks, or start the content on the header line.
+_ANALYSIS_HEADER_RE = re.compile(
+    r"^[#*_\s]*(overall impression|pros|cons|suggestions)[*_\s]*(?::|$)[*_\s]*(.*)$",
+    re.IGNORECASE,
+)
+_BULLET_RE = re.compile(r"^\s*(?:[-*\u2022]|\d+[.)])\s+")
+# "[Experience]" at the start of a finding, naming the resume section it is about.
+_SECTION_TAG_RE = re.compile(r"^\*{0,2}\[([^\]]{1,40})\]\*{0,2}:?\s*")
+
+def parse_analysis_response(response_text):
     try:
-        sections = response.text.split('\n\n')
-        analysis = {
-            "overall_impression": sections[0].replace("OVERALL IMPRESSION:\n", "").strip(),
-            "pros": [item.strip('- ') for item in sections[1].replace("PROS:\n", "").split('\n') if item.strip()],
-            "cons": [item.strip('- ') for item in sections[2].replace("CONS:\n", "").split('\n') if item.strip()],
-            "suggestions": [item.strip('- ') for item in sections[3].replace("SUGGESTIONS:\n", "").split('\n') if item.strip()]
-        }
-        return json.dumps(analysis)
+        return analysis_json(parse_analysis_findings(response_text))
     except Exception as e:
-        print(f"Error parsing AI response: {str(e)}")
+        logger.error("Error parsing AI response: %s", e)
         return json.dumps({"error": "Failed to parse the analysis. Please try again."})
-    
 
+@timed('response_parse')
+def parse_analysis_findings(response_text):
+    """{'overall_impression': text, category: [[section, finding], ...]} from a model response."""
+    # Split on the section headers rather than on blank lines, so extra paragraphs
+    # or missing spacing from the model don't shift the sections.
+    sections = {}
+    current = 'overall impression'
+    for line in response_text.splitlines():
+        header = _ANALYSIS_HEADER_RE.match(line)
+        if header:
+            current = header.group(1).lower()
+            line = header.group(2)
+        sections.setdefault(current, []).append(line)
 
-def convert_to_latex(pdf_url):
-    resume_text = extract_text_from_pdf(pdf_url)
-    if not resume_text:
-        return "Error: Unable to extract text from the provided PDF."
+    if not any(name in sections for name in ANALYSIS_CATEGORIES):
+        raise ValueError("No analysis sections found")
+
+    findings = {"overall_impression": '\n'.join(sections.get('overall impression', [])).strip()}
+    for category in ANALYSIS_CATEGORIES:
+        findings[category] = [_tagged_finding(item) for item in _analysis_items(sections.get(category, []))]
+    return findings
+
+def _tagged_finding(item):
+    tag = _SECTION_TAG_RE.match(item)
+    if not tag:
+        return [GENERAL_SECTION, item]
+    return [canonical_section(tag.group(1)), item[tag.end():].strip()]
+
+def _analysis_items(lines):
+    items = []
+    for line in lines:
+        if not line.strip():
+            continue
+        if _BULLET_RE.match(line) or not items:
+            items.append(_BULLET_RE.sub('', line).strip().strip('*').strip())
+        else:
+            # A wrapped continuation of the previous bullet.
+            items[-1] = f"{items[-1]} {line.strip()}"
+    return items
+
+
+LATEX_GENERATION_CONFIG = {
+    "temperature": 0.3,
+    "top_p": 1,
+    "top_k": 1,
+    "max_output_tokens": 4096,
+}
 
-    prompt = f"""
+@timed('prompt')
+def build_latex_prompt(resume_text):
+    return f"""
     Convert the following resume content into a LaTeX format:
 
-    {resume_text}
+    {prepare_resume(resume_text)}
 
     Please use a professional LaTeX resume template and structure the content appropriately.
     Include necessary LaTeX packages and commands.
     """
 
-    model = genai.GenerativeModel('gemini-1.5-flash')
-    response = model.generate_content(
-        prompt,
-        generation_config={
-            "temperature": 0.3,
-            "top_p": 1,
-            "top_k": 1,
-            "max_output_tokens": 4096,
-        },
-        safety_settings={
-            HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-            HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-            HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-            HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-        },
-    )
-
-    return response.text
-
-def export_to_pdf(content):
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-    flowables = []
-
-    # Parse the content and create PDF elements
-    lines = content.split('\n')
-    for line in lines:
-        if line.startswith('\\section'):
-            # Create a section title
-            title = line.replace('\\section{', '').replace('}', '')
-            flowables.append(Paragraph(title, styles['Heading1']))
-        elif line.startswith('\\subsection'):
-            # Create a subsection title
-            title = line.replace('\\subsection{', '').replace('}', '')
-            flowables.append(Paragraph(title, styles['Heading2']))
-        elif line.strip().startswith('\\item'):
-            # Create a bullet point
-            text = line.replace('\\item', '').strip()
-            flowables.append(Paragraph(f"• {text}", styles['BodyText']))
-        elif line.strip():
-            # Create a normal paragraph
-            flowables.append(Paragraph(line, styles['BodyText']))
-        
-        flowables.append(Spacer(1, 0.2*inch))
-
-    doc.build(flowables)
-    buffer.seek(0)
-    return buffer
\ No newline at end of file
+def convert_to_latex(pdf_url):
+    resume_text = extract_text_from_pdf(pdf_url)
+    if not resume_text:
+        return "Error: Unable to extract text from the provided PDF."
+
+    response_text = generate_text(build_latex_prompt(resume_text), generation_config=LATEX_GENERATION_CONFIG)
+
+    return response_text
+
+def convert_to_latex_stream(pdf_url):
+    # The PDF is extracted before streaming starts so that extraction failures can
+    # still be reported with a regular error response.
+    resume_text = extract_text_from_pdf(pdf_url)
+    if not resume_text:
+        return "Error: Unable to extract text from the provided PDF."
+
+    return stream_text(build_latex_prompt(resume_text), generation_config=LATEX_GENERATION_CONFIG)
+
+@timed('render')
+def export_to_pdf(content, content_format='latex', output=None):
+    # content_format is 'latex' (from convert_to_latex) or 'markdown' (from generate_resume).
+    if content_format == 'markdown':
+        return render_markdown(content, output)
+    return render_latex(content, output)
+
+def export_etag(content, content_format='latex'):
+    return hash_key('export', RENDERER_VERSION, content_format, content)[:32]
+
+def export_pdf_file(content, content_format='latex'):
+    """Return (pdf, etag), where pdf is the path of a cached render or, with the
+    cache disabled, an open temporary file positioned at the start."""
+    etag = export_etag(content, content_format)
+    if _export_cache is None:
+        spool = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_BYTES)
+        export_to_pdf(content, content_format, spool)
+        return spool, etag
+
+    path = _export_cache.get_path(etag)
+    if path is None:
+        # Rendered straight into a temp file in the cache directory, then moved into place.
+        path = _export_flight.do(etag, _export_cache.put, etag, lambda f: export_to_pdf(content, content_format, f))
+    return path, etag
+
+def export_cache_info():
+    info = _export_cache.info() if _export_cache is not None else {}
+    info['coalescing'] = _export_flight.info()
+    return info
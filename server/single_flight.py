@@ -0,0 +1,86 @@
+import asyncio
+import logging
+import threading
+from resilience import DeadlineExceeded, time_remaining
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it is
+    in flight wait for it and receive the same result or exception. Nothing is
+    kept once the call finishes, so this complements the caches rather than
+    replacing them: it covers the window before a result has been cached.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._tasks = {}
+        self._counters = {'executed': 0, 'coalesced': 0}
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            self._counters['executed' if leader else 'coalesced'] += 1
+
+        if not leader:
+            # Followers still honour their own request deadline while waiting.
+            if not call.done.wait(time_remaining()):
+                raise DeadlineExceeded("Request deadline exceeded")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        except BaseException as e:
+            # KeyboardInterrupt, SystemExit etc. belong to the leader's thread;
+            # followers get an ordinary error rather than a None result.
+            call.error = RuntimeError(f"Coalesced {self.name} call was interrupted: {type(e).__name__}")
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key, fn, *args, **kwargs):
+        # Coroutine variant: fn(*args, **kwargs) must return an awaitable. The
+        # shared task is shielded so one caller being cancelled doesn't cancel it
+        # for the others.
+        with self._lock:
+            task = self._tasks.get(key)
+            leader = task is None
+            if leader:
+                task = self._tasks[key] = asyncio.ensure_future(fn(*args, **kwargs))
+                task.add_done_callback(lambda finished: self._forget_task(key, finished))
+            self._counters['executed' if leader else 'coalesced'] += 1
+        return await asyncio.shield(task)
+
+    def _forget_task(self, key, task):
+        with self._lock:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+
+    def info(self):
+        with self._lock:
+            info = dict(self._counters)
+            info['in_flight'] = len(self._calls) + len(self._tasks)
+        return info
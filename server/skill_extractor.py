@@ -0,0 +1,137 @@
+import functools
+import json
+import logging
+import os
+from collections import deque
+from dotenv import load_dotenv
+from job_ranking import tokenize
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# {"skills": {canonical: [phrase, ...]}, "keywords": {...}}. Only the listed
+# phrases are matched, not the canonical names, so ambiguous names ("Go", "R")
+# can be restricted to unambiguous spellings ("golang", "r programming").
+SKILLS_DICTIONARY_PATH = os.getenv(
+    'SKILLS_DICTIONARY_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'skills.json')
+)
+
+# Job fields searched for required skills; unlike job_ranking.JOB_TEXT_FIELDS this
+# includes the requirement lists, which is where most skills are named.
+JOB_SKILL_FIELDS = (
+    'role', 'tags', 'descriptions', 'requirements', 'qualifications', 'responsibilities',
+)
+
+
+class SkillExtractor:
+    """Aho-Corasick automaton over tokens for a dictionary of skill phrases.
+
+    Text is tokenized like job_ranking (lowercase, "node.js", "c++" and "c#" kept
+    whole, other punctuation dropped), so phrases match regardless of case,
+    hyphenation or line breaks, and only on whole tokens. find() makes a single
+    pass over the tokens whatever the dictionary size.
+    """
+
+    def __init__(self, dictionary):
+        self.kinds = {}
+        # Per state: token transitions, failure link, and the (length, canonical)
+        # phrases ending there.
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for kind, entries in dictionary.items():
+            for canonical, phrases in entries.items():
+                self.kinds[canonical] = kind
+                for phrase in phrases:
+                    self._add(tokenize(phrase), canonical)
+        self._link()
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def _add(self, tokens, canonical):
+        if not tokens:
+            return
+        state = 0
+        for token in tokens:
+            next_state = self._goto[state].get(token)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][token] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = next_state
+        if (len(tokens), canonical) not in self._out[state]:
+            self._out[state].append((len(tokens), canonical))
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(token, 0)
+                self._out[next_state].extend(self._out[self._fail[next_state]])
+
+    def find(self, text):
+        """Canonical names found in text, in order of first occurrence.
+
+        Where phrases overlap, the leftmost longest one wins, so "react native"
+        doesn't also count as "react" and "pl/sql" not as "sql".
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        matches = []
+        state = 0
+        for end, token in enumerate(tokenize(text), 1):
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for length, canonical in out[state]:
+                matches.append((end - length, end, canonical))
+
+        found = {}
+        covered = 0
+        for start, end, canonical in sorted(matches, key=lambda match: (match[0], -match[1])):
+            if start >= covered:
+                found.setdefault(canonical, None)
+                covered = end
+        return list(found)
+
+
+@functools.lru_cache(maxsize=None)
+def get_skill_extractor(path=SKILLS_DICTIONARY_PATH):
+    with open(path, 'r', encoding='utf-8') as f:
+        extractor = SkillExtractor(json.load(f))
+    logger.info("Loaded %s skills and keywords from %s", len(extractor), path)
+    return extractor
+
+
+def job_skill_text(job):
+    parts = []
+    for field in JOB_SKILL_FIELDS:
+        value = job.get(field)
+        if isinstance(value, (list, tuple)):
+            parts.extend(str(item) for item in value)
+        elif value:
+            parts.append(str(value))
+    return '\n'.join(parts)
+
+
+def match_skills(resume_text, job, extractor=None):
+    """The screening fields that are plain term matching, computed locally.
+
+    skills_match lists the dictionary skills named in both the job and the
+    resume; job_description_keywords adds the other shared terms (methodologies,
+    degrees, soft skills). Both follow the order in which the job names them.
+    """
+    extractor = extractor or get_skill_extractor()
+    resume_terms = set(extractor.find(resume_text))
+    shared = [term for term in extractor.find(job_skill_text(job)) if term in resume_terms]
+    return {
+        "skills_match": [term for term in shared if extractor.kinds[term] == 'skills'],
+        "job_description_keywords": shared,
+    }
@@ -0,0 +1,36 @@
+from recommendations import get_job_recommendations, process_submitted_resume
+from resume_utils import analyze_resume, convert_to_latex
+from recommendation_snapshots import snapshot_recommendations
+
+# Handlers for the slow endpoints return (payload, status_code) so they can run
+# either inline or on the task queue when the request sets "async": true. Both
+# app.py and asgi_app.py queue these.
+def recommendations_result(pdf_url, jobs, **options):
+    recommendations = get_job_recommendations(pdf_url, jobs, **options)
+    if isinstance(recommendations, str) and recommendations.startswith("Error"):
+        return {"error": recommendations}, 500
+    return recommendations, 200
+
+def snapshot_result(pdf_url, user_id, options):
+    recommendations, snapshot = snapshot_recommendations(pdf_url, user_id, options)
+    if isinstance(recommendations, str) and recommendations.startswith("Error"):
+        return {"error": recommendations}, 500
+    return {"recommendations": recommendations, "snapshot": snapshot}, 200
+
+def analysis_result(pdf_url, user_id=None):
+    analysis = analyze_resume(pdf_url, user_id)
+    if isinstance(analysis, str) and analysis.startswith("Error"):
+        return {"error": analysis}, 500
+    return {"analysis": analysis}, 200
+
+def latex_result(pdf_url):
+    latex_content = convert_to_latex(pdf_url)
+    if isinstance(latex_content, str) and latex_content.startswith("Error"):
+        return {"error": latex_content}, 500
+    return {"latex": latex_content}, 200
+
+def submitted_resume_result(resume_url, job, user_id=None):
+    analysis = process_submitted_resume(resume_url, job, user_id)
+    if isinstance(analysis, str) and analysis.startswith("Error"):
+        return {"error": analysis}, 500
+    return {"analysis": analysis}, 200
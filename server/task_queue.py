@@ -0,0 +1,204 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+TASK_MAX_WORKERS = int(os.getenv('TASK_MAX_WORKERS', 8))
+TASK_MAX_QUEUE_DEPTH = int(os.getenv('TASK_MAX_QUEUE_DEPTH', 500))
+TASK_RESULT_TTL = int(os.getenv('TASK_RESULT_TTL', 15 * 60))
+# Per-endpoint concurrency, e.g. "get_recommendations=2,analyze_resume=4".
+# Endpoints not listed may use the whole pool.
+TASK_ENDPOINT_LIMITS = os.getenv('TASK_ENDPOINT_LIMITS', '')
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class TaskBackend(ABC):
+    """Storage for task records.
+
+    Records are plain JSON-serializable dicts, so an implementation backed by a
+    key-value server (hash per task, key expiry for TTL) can replace the
+    in-process one without changes to TaskQueue.
+    """
+
+    @abstractmethod
+    def put(self, task_id, record, ttl=None):
+        pass
+
+    @abstractmethod
+    def update(self, task_id, fields, ttl=None):
+        pass
+
+    @abstractmethod
+    def get(self, task_id):
+        pass
+
+    @abstractmethod
+    def purge_expired(self):
+        pass
+
+
+class InMemoryTaskBackend(TaskBackend):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records = {}
+        self._expires_at = {}
+
+    def put(self, task_id, record, ttl=None):
+        with self._lock:
+            self._records[task_id] = dict(record)
+            self._set_expiry(task_id, ttl)
+
+    def update(self, task_id, fields, ttl=None):
+        with self._lock:
+            if task_id in self._records:
+                self._records[task_id].update(fields)
+                self._set_expiry(task_id, ttl)
+
+    def get(self, task_id):
+        with self._lock:
+            expires_at = self._expires_at.get(task_id)
+            if expires_at is not None and expires_at < time.time():
+                self._records.pop(task_id, None)
+                self._expires_at.pop(task_id, None)
+                return None
+            record = self._records.get(task_id)
+            return dict(record) if record else None
+
+    def purge_expired(self):
+        now = time.time()
+        with self._lock:
+            expired = [task_id for task_id, expires_at in self._expires_at.items() if expires_at < now]
+            for task_id in expired:
+                self._records.pop(task_id, None)
+                self._expires_at.pop(task_id, None)
+        return len(expired)
+
+    def _set_expiry(self, task_id, ttl):
+        if ttl is None:
+            self._expires_at.pop(task_id, None)
+        else:
+            self._expires_at[task_id] = time.time() + ttl
+
+
+def parse_endpoint_limits(spec):
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, value = item.partition('=')
+        try:
+            limits[name.strip()] = max(1, int(value))
+        except ValueError:
+            logger.warning("Ignoring invalid TASK_ENDPOINT_LIMITS entry: %s", item)
+    return limits
+
+
+class TaskQueue:
+    """Bounded worker pool for submit/poll execution of slow endpoint handlers.
+
+    Handlers return (payload, status_code), the same pair a synchronous route
+    would respond with; the pair is stored on the task record for polling.
+    Tasks wait in per-endpoint queues and are dispatched round-robin, so one busy
+    endpoint cannot occupy every worker.
+    """
+
+    def __init__(self, backend=None, max_workers=TASK_MAX_WORKERS, endpoint_limits=None,
+                 max_queue_depth=TASK_MAX_QUEUE_DEPTH, result_ttl=TASK_RESULT_TTL):
+        self.backend = backend or InMemoryTaskBackend()
+        self.max_workers = max_workers
+        self.endpoint_limits = endpoint_limits or {}
+        self.max_queue_depth = max_queue_depth
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='task')
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._running = {}
+        self._counters = {'submitted': 0, 'succeeded': 0, 'failed': 0, 'rejected': 0}
+
+    def submit(self, endpoint, handler, *args, **kwargs):
+        self.backend.purge_expired()
+        with self._lock:
+            depth = sum(len(queue) for queue in self._pending.values())
+            if depth >= self.max_queue_depth:
+                self._counters['rejected'] += 1
+                raise QueueFullError(f"Task queue is full ({depth} pending)")
+            task_id = uuid.uuid4().hex
+            self.backend.put(task_id, {
+                'id': task_id,
+                'endpoint': endpoint,
+                'status': 'queued',
+                'submitted_at': time.time(),
+            })
+            self._pending.setdefault(endpoint, deque()).append((task_id, handler, args, kwargs))
+            self._counters['submitted'] += 1
+            self._dispatch_locked()
+        return task_id
+
+    def get(self, task_id):
+        return self.backend.get(task_id)
+
+    def metrics(self):
+        with self._lock:
+            endpoints = set(self._pending) | set(self._running)
+            return {
+                'max_workers': self.max_workers,
+                'queue_depth': sum(len(queue) for queue in self._pending.values()),
+                'running': sum(self._running.values()),
+                'endpoints': {
+                    endpoint: {
+                        'queued': len(self._pending.get(endpoint, ())),
+                        'running': self._running.get(endpoint, 0),
+                        'limit': self.endpoint_limits.get(endpoint, self.max_workers),
+                    }
+                    for endpoint in sorted(endpoints)
+                },
+                **self._counters,
+            }
+
+    def _dispatch_locked(self):
+        dispatched = True
+        while dispatched and sum(self._running.values()) < self.max_workers:
+            dispatched = False
+            for endpoint, queue in self._pending.items():
+                if not queue:
+                    continue
+                if self._running.get(endpoint, 0) >= self.endpoint_limits.get(endpoint, self.max_workers):
+                    continue
+                if sum(self._running.values()) >= self.max_workers:
+                    break
+                task = queue.popleft()
+                self._running[endpoint] = self._running.get(endpoint, 0) + 1
+                self._executor.submit(self._run, endpoint, *task)
+                dispatched = True
+
+    def _run(self, endpoint, task_id, handler, args, kwargs):
+        self.backend.update(task_id, {'status': 'running', 'started_at': time.time()})
+        try:
+            payload, status_code = handler(*args, **kwargs)
+            outcome = 'succeeded' if status_code < 400 else 'failed'
+        except Exception as e:
+            logger.error("Task %s (%s) failed: %s", task_id, endpoint, e)
+            payload, status_code = {"error": "An unexpected error occurred"}, 500
+            outcome = 'failed'
+        self.backend.update(task_id, {
+            'status': outcome,
+            'finished_at': time.time(),
+            'status_code': status_code,
+            'result': payload,
+        }, ttl=self.result_ttl)
+        with self._lock:
+            self._counters[outcome] += 1
+            self._running[endpoint] -= 1
+            self._dispatch_locked()
+
+
+task_queue = TaskQueue(endpoint_limits=parse_endpoint_limits(TASK_ENDPOINT_LIMITS))
@@ -0,0 +1,103 @@
+import pytest
+
+from json_extract import JSONExtractionError, SchemaError, extract_json, strip_code_fences, validate
+
+ASSESSMENTS = {
+    'type': 'array',
+    'items': {
+        'type': 'object',
+        'required': ['id', 'score'],
+        'properties': {'id': {'type': 'string'}, 'score': {'type': 'integer'}},
+    },
+}
+
+
+def test_well_formed_json():
+    assert extract_json('{"score": 80, "tags": ["a", "b"]}') == ({'score': 80, 'tags': ['a', 'b']}, False)
+
+
+def test_fenced_json_with_prose():
+    text = 'Here is the result:\n```json\n[{"id": "1", "score": 70}]\n```\nLet me know if you need more.'
+
+    assert extract_json(text, ASSESSMENTS) == ([{'id': '1', 'score': 70}], False)
+
+
+def test_unclosed_fence():
+    assert strip_code_fences('```json\n{"a": 1}') == '{"a": 1}'
+    assert extract_json('```json\n{"a": 1}') == ({'a': 1}, False)
+
+
+def test_brackets_inside_strings_are_ignored():
+    text = '{"reason": "Strong fit [see notes] {very}", "score": 90}'
+
+    assert extract_json(text) == ({'reason': 'Strong fit [see notes] {very}', 'score': 90}, False)
+
+
+def test_truncated_array_keeps_complete_items():
+    text = '[{"id": "1", "score": 70}, {"id": "2", "score": 55}, {"id": "3", "sco'
+
+    value, truncated = extract_json(text, ASSESSMENTS)
+
+    assert truncated
+    assert value == [{'id': '1', 'score': 70}, {'id': '2', 'score': 55}]
+
+
+def test_truncated_array_drops_partial_item_that_fails_schema():
+    # The third object is syntactically closable but lacks its required score.
+    text = '```json\n[{"id": "1", "score": 70}, {"id": "2", "score": 55}, {"id": "3", "reason": "Good'
+
+    value, truncated = extract_json(text, ASSESSMENTS)
+
+    assert truncated
+    assert [item['id'] for item in value] == ['1', '2']
+
+
+def test_truncated_object_keeps_complete_fields():
+    text = '{"skills_match": ["Python", "SQL"], "education_match": "Bachelor", "interested_part": "The team wor'
+
+    value, truncated = extract_json(text)
+
+    assert truncated
+    assert value == {'skills_match': ['Python', 'SQL'], 'education_match': 'Bachelor'}
+
+
+def test_truncated_after_number():
+    value, truncated = extract_json('[{"id": "1", "score": 70}, {"id": "2", "score": 5')
+
+    assert truncated
+    assert value[0] == {'id': '1', 'score': 70}
+
+
+def test_truncated_without_salvage_raises():
+    with pytest.raises(JSONExtractionError):
+        extract_json('[{"id": "1", "score": 70}, {"id": "2"', salvage=False)
+
+
+def test_truncated_array_with_nothing_complete():
+    # Without a schema the closable prefix of the first object is kept; the item
+    # schema drops it.
+    assert extract_json('[{"id": "1", "sco') == ([{'id': '1'}], True)
+    assert extract_json('[{"id": "1", "sco', ASSESSMENTS) == ([], True)
+
+
+@pytest.mark.parametrize('text', ['', 'No JSON here, sorry.'])
+def test_missing_json_raises(text):
+    with pytest.raises(JSONExtractionError):
+        extract_json(text)
+
+
+def test_schema_selects_the_expected_container():
+    text = 'Scores {for reference}: [{"id": "1", "score": 70}]'
+
+    assert extract_json(text, ASSESSMENTS) == ([{'id': '1', 'score': 70}], False)
+
+
+def test_validate_rejects_wrong_types():
+    with pytest.raises(SchemaError, match=r'\$\[0\]\.score'):
+        validate([{'id': '1', 'score': '70'}], ASSESSMENTS)
+    with pytest.raises(SchemaError):
+        validate([{'id': '1', 'score': True}], ASSESSMENTS)
+    with pytest.raises(SchemaError, match='missing required'):
+        validate([{'id': '1'}], ASSESSMENTS)
+    with pytest.raises(SchemaError):
+        validate('lite', {'enum': ['llm', 'lite-only']})
@@ -0,0 +1,52 @@
+from prompt_budget import TRUNCATION_MARKER, compact_job, compact_json, estimate_tokens
+
+
+def job_tokens(job):
+    return estimate_tokens(compact_json([job]))
+
+
+def test_compact_job_keeps_location_and_time():
+    job = {'id': 'job-1', 'role': 'Nurse', 'location': 'Sydney', 'time': 'Part-time', 'applicants': ['a', 'b']}
+
+    assert compact_job(job) == {'role': 'Nurse', 'location': 'Sydney', 'time': 'Part-time'}
+
+
+def test_compact_job_trims_long_string_fields():
+    job = {'role': 'Nurse', 'descriptions': 'patient care ' * 2000}
+
+    compacted = compact_job(job, max_tokens=300)
+
+    assert job_tokens(compacted) <= 300
+    assert compacted['descriptions'].endswith(TRUNCATION_MARKER)
+
+
+def test_compact_job_trims_list_fields():
+    job = {
+        'role': 'Nurse',
+        'requirements': ['registered nurse ' * 2500 for _ in range(5)],
+        'qualifications': ['RN'],
+    }
+
+    compacted = compact_job(job, max_tokens=300)
+
+    assert job_tokens(compacted) <= 300
+    assert len(compacted['requirements']) == 1
+    assert compacted['requirements'][0].endswith(TRUNCATION_MARKER)
+    assert compacted['qualifications'] == ['RN']
+
+
+def test_compact_job_drops_trailing_list_items_first():
+    job = {'role': 'Nurse', 'requirements': ['Current AHPRA registration', 'word ' * 400, 'Driver licence']}
+
+    compacted = compact_job(job, max_tokens=100)
+
+    assert job_tokens(compacted) <= 100
+    assert compacted['requirements'][0] == 'Current AHPRA registration'
+    assert compacted['requirements'][-1].endswith(TRUNCATION_MARKER)
+    assert 'Driver licence' not in compacted['requirements']
+
+
+def test_compact_job_leaves_small_jobs_alone():
+    job = {'role': 'Nurse', 'requirements': ['RN', 'First aid']}
+
+    assert compact_job(job) == job
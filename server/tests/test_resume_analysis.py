@@ -0,0 +1,142 @@
+import pytest
+
+from resume_sections import canonical_section, changed_sections, resume_identity, section_hashes, split_sections
+from resume_utils import analysis_json, merge_findings, parse_analysis_findings
+
+RESUME = """Jane Doe
+jane@example.com
+
+PROFESSIONAL SUMMARY
+Nurse with five years of acute care experience.
+
+Work Experience
+Registered Nurse, Sydney Hospital
+- Led a ward of 20 beds
+
+EDUCATION
+Bachelor of Nursing
+
+Skills:
+Patient care, triage
+"""
+
+RESPONSE = """**OVERALL IMPRESSION:** A solid resume
+for an experienced nurse.
+
+PROS:
+- [Experience] Leadership is quantified
+- [Work Experience] Relevant hospital role
+- Clear layout
+CONS:
+1. [Skills] Only two skills listed,
+   with no certifications.
+- **[General]** No cover letter mentioned
+
+## Suggestions
+* [Education] Add the graduation year
+"""
+
+
+def test_split_sections():
+    sections = split_sections(RESUME)
+
+    assert list(sections) == ['contact', 'summary', 'experience', 'education', 'skills']
+    assert sections['contact'] == 'Jane Doe\njane@example.com'
+    assert sections['skills'] == 'Patient care, triage'
+
+
+def test_repeated_headings_are_merged():
+    sections = split_sections("Experience\nRole A\nSkills\nPython\nExperience\nRole B")
+
+    assert sections['experience'] == 'Role A\nRole B'
+
+
+def test_section_hashes_ignore_spacing_changes():
+    respaced = RESUME.replace('Led a ward', 'Led  a   ward').replace('\n\n', '\n\n\n\n')
+
+    assert section_hashes(split_sections(respaced)) == section_hashes(split_sections(RESUME))
+
+
+def test_changed_sections():
+    hashes = section_hashes(split_sections(RESUME))
+    updated = section_hashes(split_sections(RESUME.replace('triage', 'triage, ICU')))
+
+    assert changed_sections(hashes, updated) == ['skills']
+
+
+def test_resume_identity():
+    sections = split_sections(RESUME)
+
+    assert resume_identity(sections, 'user-1') == resume_identity({}, 'user-1')
+    assert resume_identity(sections) == resume_identity(split_sections(RESUME.replace('triage', 'ICU')))
+    assert resume_identity({'skills': 'Python'}) is None
+
+
+@pytest.mark.parametrize('label, section', [
+    ('Work Experience', 'experience'), ('Experience', 'experience'), ('Technical Skills', 'skills'),
+    ('General', 'general'), ('Hobbies', 'hobbies'),
+])
+def test_canonical_section(label, section):
+    assert canonical_section(label) == section
+
+
+def test_parse_analysis_findings_tagged_and_untagged():
+    findings = parse_analysis_findings(RESPONSE)
+
+    assert findings['overall_impression'] == 'A solid resume\nfor an experienced nurse.'
+    assert findings['pros'] == [
+        ['experience', 'Leadership is quantified'],
+        ['experience', 'Relevant hospital role'],
+        ['general', 'Clear layout'],
+    ]
+    assert findings['cons'] == [
+        ['skills', 'Only two skills listed, with no certifications.'],
+        ['general', 'No cover letter mentioned'],
+    ]
+    assert findings['suggestions'] == [['education', 'Add the graduation year']]
+
+
+def test_parse_analysis_findings_without_sections_raises():
+    with pytest.raises(ValueError):
+        parse_analysis_findings("I'm sorry, I can't help with that.")
+
+
+def test_merge_findings_replaces_changed_sections_only():
+    sections = split_sections(RESUME)
+    previous = {
+        'overall_impression': 'Old impression',
+        'pros': [['experience', 'Leadership is quantified'], ['skills', 'Good skills'], ['general', 'Clear layout']],
+        'cons': [['skills', 'Few skills'], ['awards', 'Section was removed']],
+        'suggestions': [['general', 'Add a cover letter']],
+    }
+    findings = {
+        'overall_impression': 'New impression',
+        'pros': [['skills', 'Now lists ICU']],
+        'cons': [],
+        'suggestions': [['general', 'Tailor the summary']],
+    }
+
+    merged = merge_findings(previous, findings, sections, ['skills'])
+
+    assert merged['overall_impression'] == 'New impression'
+    # Ordered by section; the unchanged general finding is kept.
+    assert merged['pros'] == [
+        ['experience', 'Leadership is quantified'], ['skills', 'Now lists ICU'], ['general', 'Clear layout'],
+    ]
+    # Findings about changed or removed sections are dropped.
+    assert merged['cons'] == []
+    # A new general finding replaces the old ones.
+    assert merged['suggestions'] == [['general', 'Tailor the summary']]
+
+
+def test_merge_findings_unchanged_resume_keeps_previous():
+    sections = split_sections(RESUME)
+    previous = {'overall_impression': 'Old', 'pros': [['skills', 'Good']], 'cons': [], 'suggestions': []}
+
+    assert merge_findings(previous, None, sections, []) == previous
+
+
+def test_analysis_json_drops_section_tags():
+    findings = parse_analysis_findings(RESPONSE)
+
+    assert '"pros": ["Leadership is quantified", "Relevant hospital role", "Clear layout"]' in analysis_json(findings)
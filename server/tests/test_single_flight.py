@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def run_with_follower(flight, fn):
+    """Start fn as the leader, join one follower while it runs; return the follower's outcome."""
+    started = threading.Event()
+    release = threading.Event()
+    outcome = {}
+
+    def leader():
+        def work():
+            started.set()
+            release.wait(5)
+            return fn()
+        try:
+            flight.do('key', work)
+        except BaseException:
+            pass
+
+    def follower():
+        try:
+            outcome['result'] = flight.do('key', lambda: 'follower ran')
+        except Exception as e:
+            outcome['error'] = e
+
+    leader_thread = threading.Thread(target=leader)
+    leader_thread.start()
+    started.wait(5)
+    follower_thread = threading.Thread(target=follower)
+    follower_thread.start()
+    while flight.info()['coalesced'] == 0:
+        time.sleep(0.001)
+    release.set()
+    leader_thread.join(5)
+    follower_thread.join(5)
+    return outcome
+
+
+def test_follower_receives_leader_result():
+    assert run_with_follower(SingleFlight('test'), lambda: 'text') == {'result': 'text'}
+
+
+def test_follower_receives_leader_exception():
+    outcome = run_with_follower(SingleFlight('test'), lambda: (_ for _ in ()).throw(ValueError('bad pdf')))
+
+    assert isinstance(outcome['error'], ValueError)
+
+
+@pytest.mark.parametrize('interrupt', [KeyboardInterrupt, SystemExit, GeneratorExit])
+def test_follower_raises_when_leader_is_interrupted(interrupt):
+    def fn():
+        raise interrupt()
+
+    outcome = run_with_follower(SingleFlight('test'), fn)
+
+    assert 'result' not in outcome
+    assert isinstance(outcome['error'], RuntimeError)
+
+
+def test_leader_still_sees_its_interrupt():
+    flight = SingleFlight('test')
+
+    def fn():
+        raise KeyboardInterrupt()
+
+    with pytest.raises(KeyboardInterrupt):
+        flight.do('key', fn)
+    assert flight.info()['in_flight'] == 0
@@ -0,0 +1,79 @@
+import pytest
+
+from skill_extractor import SkillExtractor, get_skill_extractor, match_skills
+
+DICTIONARY = {
+    'skills': {
+        'React': ['react', 'react.js', 'reactjs'],
+        'React Native': ['react native'],
+        'SQL': ['sql'],
+        'PL/SQL': ['pl/sql', 'pl sql'],
+        'Machine Learning': ['machine learning', 'ml'],
+        'Deep Learning': ['deep learning'],
+        'C++': ['c++'],
+        'C#': ['c#'],
+        'Node.js': ['node.js', 'nodejs'],
+        'Go': ['golang'],
+    },
+    'keywords': {
+        'Agile': ['agile', 'scrum'],
+        "Bachelor's Degree": ["bachelor's degree", 'bachelor degree'],
+        'Learning Management': ['learning management'],
+    },
+}
+
+
+@pytest.fixture
+def extractor():
+    return SkillExtractor(DICTIONARY)
+
+
+def test_matches_are_case_and_line_break_insensitive(extractor):
+    assert extractor.find("Built apps in REACT.\nUsed Machine\nLearning daily") == ['React', 'Machine Learning']
+
+
+def test_longest_phrase_wins_over_its_prefix(extractor):
+    assert extractor.find("Shipped two React Native apps") == ['React Native']
+
+
+def test_longest_phrase_wins_over_its_suffix(extractor):
+    assert extractor.find("Wrote PL/SQL procedures") == ['PL/SQL']
+    assert extractor.find("Wrote PL/SQL and plain SQL") == ['PL/SQL', 'SQL']
+
+
+def test_overlapping_matches_take_the_leftmost(extractor):
+    # "machine learning" and "learning management" overlap on "learning".
+    assert extractor.find("machine learning management system") == ['Machine Learning']
+
+
+def test_symbol_tokens_are_kept_whole(extractor):
+    assert extractor.find("C++, C# and Node.js; also C") == ['C++', 'C#', 'Node.js']
+
+
+def test_only_whole_tokens_match(extractor):
+    assert extractor.find("Reactive programming, html, go-getter") == []
+
+
+def test_each_skill_is_reported_once_in_order_of_first_occurrence(extractor):
+    assert extractor.find("SQL, React, sql, ReactJS, scrum") == ['SQL', 'React', 'Agile']
+
+
+def test_match_skills_shared_terms_in_job_order(extractor):
+    resume = "Agile team member. Skills: SQL, React, Golang. Bachelor's degree in CS."
+    job = {
+        'role': 'Full-stack developer',
+        'descriptions': 'Agile squad building React Native and React apps',
+        'requirements': ['Golang or Node.js', 'SQL'],
+    }
+
+    assert match_skills(resume, job, extractor) == {
+        'skills_match': ['React', 'Go', 'SQL'],
+        'job_description_keywords': ['Agile', 'React', 'Go', 'SQL'],
+    }
+
+
+def test_bundled_dictionary_loads():
+    extractor = get_skill_extractor()
+
+    assert len(extractor) > 0
+    assert 'Python' in extractor.find("Experienced in Python")
@@ -0,0 +1,105 @@
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Most recent durations kept per stage for percentiles.
+TIMING_SAMPLES = int(os.getenv('TIMING_SAMPLES', 2048))
+
+# Spans recorded while serving the current request: [(stage, seconds)]. Worker
+# threads started through resilience.run_in_context share the request's list.
+_request_spans = contextvars.ContextVar('request_spans', default=None)
+
+_lock = threading.Lock()
+_samples = {}
+_totals = {}
+
+
+def start_request():
+    _request_spans.set([])
+
+
+def request_spans():
+    return list(_request_spans.get() or ())
+
+
+def record(stage, seconds):
+    spans = _request_spans.get()
+    if spans is not None:
+        spans.append((stage, seconds))
+    with _lock:
+        samples = _samples.get(stage)
+        if samples is None:
+            samples = _samples[stage] = deque(maxlen=TIMING_SAMPLES)
+            _totals[stage] = [0, 0.0]
+        samples.append(seconds)
+        _totals[stage][0] += 1
+        _totals[stage][1] += seconds
+
+
+@contextmanager
+def span(stage):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - started)
+
+
+def timed(stage):
+    """Decorator recording each call's duration under stage; works on coroutines too."""
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(stage):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def server_timing(spans):
+    """Server-Timing header value summing the given spans per stage, in ms."""
+    durations = {}
+    for stage, seconds in spans:
+        durations[stage] = durations.get(stage, 0.0) + seconds
+    return ', '.join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in durations.items())
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def stage_summary():
+    with _lock:
+        snapshot = {stage: (list(samples), _totals[stage]) for stage, samples in _samples.items()}
+    return {
+        stage: {
+            'count': count,
+            'mean_ms': round(total / count * 1000, 2) if count else 0.0,
+            'p50_ms': round(percentile(samples, 0.5) * 1000, 2),
+            'p95_ms': round(percentile(samples, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(samples, 0.99) * 1000, 2),
+        }
+        for stage, (samples, (count, total)) in snapshot.items()
+    }
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+        _totals.clear()
@@ -0,0 +1,106 @@
+import logging
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# Load the heavy dependencies (Gemini SDK, PyPDF2, reportlab styles, the skills
+# automaton) before the first request instead of inside it. /ready reports 503
+# until this has finished.
+WARMUP_ON_START = os.getenv('WARMUP_ON_START', 'true').lower() in ('1', 'true', 'yes')
+
+_state = {'ready': False, 'started': None, 'finished': None, 'steps': {}, 'errors': {}}
+_lock = threading.Lock()
+_thread = None
+
+
+def _model():
+    from llm import get_model
+    get_model()
+
+
+def _pdf_parser():
+    from pdf_text import warm_parser_pool
+    warm_parser_pool()
+
+
+def _pdf_styles():
+    from pdf_render import get_styles
+    get_styles()
+
+
+def _skills():
+    from skill_extractor import get_skill_extractor
+    get_skill_extractor()
+
+
+def _jobs():
+    # Loads (or builds) the stored jobs' feature index.
+    from job_store import job_store
+    job_store.rank('', top_k=0)
+
+
+WARMUP_STEPS = (
+    ('model', _model),
+    ('pdf_parser', _pdf_parser),
+    ('pdf_styles', _pdf_styles),
+    ('skills', _skills),
+    ('jobs', _jobs),
+)
+
+
+def warmup():
+    """Run every warmup step once and mark the process ready.
+
+    A failing step is logged and recorded but doesn't block readiness: the same
+    work is retried lazily by the first request that needs it.
+    """
+    with _lock:
+        if _state['started'] is not None:
+            return
+        _state['started'] = time.time()
+    for name, step in WARMUP_STEPS:
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            logger.warning("Warmup step %s failed: %s", name, e)
+            _state['errors'][name] = str(e)
+        _state['steps'][name] = round((time.perf_counter() - started) * 1000, 1)
+    _state['finished'] = time.time()
+    _state['ready'] = True
+    logger.info("Warmup finished in %.0f ms: %s",
+                (_state['finished'] - _state['started']) * 1000, _state['steps'])
+
+
+def start_warmup():
+    """Warm up in a background thread so the server can accept connections meanwhile."""
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=warmup, name='warmup', daemon=True)
+            _thread.start()
+        return _thread
+
+
+def readiness():
+    """(ready, details) for the /ready endpoint.
+
+    With WARMUP_ON_START off the process is ready at once and requests load
+    what they need lazily. Under a host that never started the warmup (flask
+    run, a WSGI server other than the bundled gunicorn config) the first call
+    starts it.
+    """
+    if not WARMUP_ON_START:
+        return True, {'ready': True, 'warmup': 'disabled'}
+    if _state['started'] is None:
+        start_warmup()
+    details = {'ready': _state['ready'], 'steps_ms': dict(_state['steps'])}
+    if _state['errors']:
+        details['errors'] = dict(_state['errors'])
+    if _state['finished'] is not None:
+        details['warmup_ms'] = round((_state['finished'] - _state['started']) * 1000, 1)
+    return _state['ready'], details
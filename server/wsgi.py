@@ -0,0 +1,7 @@
+"""Production entry point: gunicorn -c gunicorn.conf.py wsgi:app
+
+gunicorn.conf.py starts the warmup in the worker once it has forked, so with
+preload_app the imports are done once in the master while threads, parser
+processes, SQLite connections and network clients are created in the worker.
+"""
+from app import app  # noqa: F401